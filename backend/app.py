@@ -3,6 +3,7 @@ from flask_cors import cross_origin
 
 from dtos.response import Response
 from event_log_management.event_log_manager import EventLogManager
+from event_log_management.ingestion_job import IngestionJob
 from pattern_mining.evaluation_mode import EvaluationMode
 from pattern_mining.pattern_formula import PatternFormula
 from pattern_mining.pattern_mining_manager import PatternMiningManager
@@ -27,23 +28,47 @@ def upload_ocel():
         session_key, session_path = make_session()
         print("Creating session {0} for valid OCEL {1}".format(str(session_key), file.filename))
         elmo = EventLogManager()
-        elmo.enter_transmitted_file(file, extension)
-        pamela = PatternMiningManager(elmo.ocel)
-        pamela.initialize()
-        pamela.save()
+        file_path = elmo.save_transmitted_file(file, extension)
+        job = IngestionJob.submit(file_path, extension)
         return {
             'session_key': session.get('session_key', None),
-            'object_types': pamela.object_types,
-            'event_types': pamela.event_types,
-            'event_type_attributes': pamela.event_type_attributes,
-            'object_type_attributes': pamela.object_type_attributes,
-            "event_type_object_types": pamela.event_types_object_types,
-            'event_type_object_relations': pamela.event_type_object_relations,
-            'event_type_object_to_object_relations': pamela.event_type_object_to_object_relations,
-            'variable_prefixes': pamela.variable_prefixes
+            'job_id': job.jobId
         }
     return Response.get(False)
 
+@app.route('/upload-status', methods=['GET'])
+@cross_origin()
+def get_upload_status():
+    job_id = request.args.get('job-id')
+    job = IngestionJob.get(job_id)
+    if job is None:
+        return Response.get(False, "Unknown ingestion job " + str(job_id))
+    return job.get_status()
+
+@app.route('/append-ocel', methods=['POST'])
+@cross_origin()
+def append_ocel():
+    session_key = request.args.get('session-key')
+    session['session_key'] = session_key
+    file = request.files['file']
+    if file.filename == '' or not allowed_file(file.filename):
+        return Response.get(False)
+    print("Appending OCEL {0} to session {1}".format(file.filename, str(session_key)))
+    extension = get_file_extension(file.filename)
+    elmo = EventLogManager()
+    file_path = elmo.save_transmitted_file(file, extension, "_append")
+    elmo.load_file(file_path, extension)
+    pamela: PatternMiningManager = PatternMiningManager.load()
+    try:
+        appended_counts = pamela.append_log(elmo.ocel)
+    except ValueError as e:
+        return Response.get(False, str(e))
+    pamela.save()
+    return Response.get({
+        event_type: {"new_events": new_events, "affected_events": affected_events}
+        for event_type, (new_events, affected_events) in appended_counts.items()
+    })
+
 @app.route('/add-pattern', methods=['GET', 'POST'])
 @cross_origin()
 def add_pattern():
@@ -148,7 +173,10 @@ def load_tables():
     event_types = pamela.event_types_filter
     pamela.load_tables(event_types)
     pamela.save()
-    return Response.get(True)
+    err = None
+    if len(pamela.table_loading_errors) > 0:
+        err = "Loading the tables failed for event types: " + str(pamela.table_loading_errors)
+    return Response.get(True, err)
 
 @app.route('/search-rules', methods=['GET', 'POST'])
 @cross_origin()
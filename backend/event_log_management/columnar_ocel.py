@@ -0,0 +1,80 @@
+import copy
+import os
+
+from pm4py import OCEL
+
+from event_log_management.ocel_cache import OCEL_FRAMES
+from utils.columnar_utils import load_frame, replace_frame
+
+
+def _frame_property(frame_name):
+
+    def get_frame(self):
+        frames = self.__dict__.setdefault("frames", {})
+        if frame_name not in frames:
+            frames[frame_name] = load_frame(os.path.join(self.path, frame_name))
+        return frames[frame_name]
+
+    def set_frame(self, frame):
+        self.__dict__.setdefault("frames", {})[frame_name] = frame
+        self.__dict__.setdefault("modifiedFrames", set()).add(frame_name)
+
+    return property(get_frame, set_frame)
+
+
+class ColumnarOcel(OCEL):
+    events = _frame_property("events")
+    objects = _frame_property("objects")
+    relations = _frame_property("relations")
+    o2o = _frame_property("o2o")
+    e2e = _frame_property("e2e")
+    object_changes = _frame_property("object_changes")
+
+    @classmethod
+    def save(cls, ocel: OCEL, path):
+        '''
+        Stores the frames of a log in a directory, one subdirectory per frame in the columnar format of
+        columnar_utils.
+
+        :param ocel: The object-centric event log. If it is a ColumnarOcel of the same directory, only the frames that
+        have been set are written.
+        :param path: The directory
+        :return: A ColumnarOcel of the directory, which can be pickled without the frames
+        '''
+        os.makedirs(path, exist_ok=True)
+        for frame_name in OCEL_FRAMES:
+            if isinstance(ocel, ColumnarOcel) and ocel.path == path and frame_name not in ocel.modifiedFrames:
+                continue
+            replace_frame(getattr(ocel, frame_name), os.path.join(path, frame_name))
+        columnar_ocel = cls(path)
+        columnar_ocel.__dict__.update({
+            attribute: value for attribute, value in ocel.__dict__.items()
+            if attribute not in OCEL_FRAMES + ["frames", "modifiedFrames", "path"]
+        })
+        return columnar_ocel
+
+    def __init__(self, path):
+        '''
+        An OCEL whose frames are stored in a directory (see ColumnarOcel.save) and loaded, memory-mapped, when they are
+        first accessed. Frames that are set replace the stored ones for this object only, until the log is stored again.
+
+        :param path: The directory of the frames
+        '''
+        super().__init__()
+        self.frames = {}
+        self.modifiedFrames = set()
+        self.path = path
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["frames"] = {}
+        state["modifiedFrames"] = set()
+        return state
+
+    def __copy__(self):
+        # a copy shares the frames loaded so far
+        copied = self.__class__.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+        copied.__dict__["frames"] = copy.copy(self.__dict__.get("frames", {}))
+        copied.__dict__["modifiedFrames"] = copy.copy(self.__dict__.get("modifiedFrames", set()))
+        return copied
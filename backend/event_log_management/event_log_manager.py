@@ -4,6 +4,7 @@ import pickle
 from flask import session
 #from pm4py import read_ocel2_sqlite, read_ocel2_xml
 from event_log_management.load_ocel2_sqlite import load_ocel
+from event_log_management.ocel_cache import OcelCache
 
 from utils.session_utils import get_session_path
 
@@ -43,11 +44,25 @@ class EventLogManager:
             pickle.dump(self, wf)
 
     def enter_transmitted_file(self, file, extension):
+        file_path = self.save_transmitted_file(file, extension)
+        self.load_file(file_path, extension)
+
+    def save_transmitted_file(self, file, extension, suffix=""):
         session_path = get_session_path()
-        file_path = os.path.join(session_path, self.name + "." + extension)
+        file_path = os.path.join(session_path, self.name + suffix + "." + extension)
         file.save(file_path)
+        return file_path
+
+    def load_file(self, file_path, extension):
         if extension == "sqlite":
+            ocel_cache = OcelCache()
+            cache_key = OcelCache.get_key(file_path)
+            self.ocel = ocel_cache.get(cache_key)
+            if self.ocel is not None:
+                print("Loaded OCEL {0} from the cache".format(cache_key))
+                return
             self.ocel = load_ocel(file_path)
+            ocel_cache.put(cache_key, self.ocel)
             return
         if extension == "xml":
             raise AttributeError()
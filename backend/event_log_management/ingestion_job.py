@@ -0,0 +1,137 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+from flask import copy_current_request_context, session
+
+from event_log_management.event_log_manager import EventLogManager
+from pattern_mining.pattern_mining_manager import PatternMiningManager
+
+# number of logs that are ingested at the same time, further jobs wait in the queue
+MAX_INGESTION_WORKERS = 2
+# seconds after which a finished (or failed) job is dropped if its status has not been read
+FINISHED_JOB_TTL = 3600
+
+
+class IngestionStage(Enum):
+    QUEUED = "queued"
+    PARSE = "parse"
+    PREPROCESS = "preprocess"
+    RELATION_STATS = "relation stats"
+    SAVE = "save"
+    DONE = "done"
+
+
+class IngestionStatus(Enum):
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+
+
+INGESTION_STAGES = [IngestionStage.PARSE, IngestionStage.PREPROCESS, IngestionStage.RELATION_STATS,
+                    IngestionStage.SAVE]
+
+_executor = ThreadPoolExecutor(max_workers=MAX_INGESTION_WORKERS, thread_name_prefix="ingestion")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class IngestionJob:
+
+    @classmethod
+    def submit(cls, file_path, extension):
+        '''
+        Starts the ingestion of an uploaded log on a background thread. Has to be called inside the request that
+        created the session, since the job runs with a copy of that request context.
+
+        :param file_path: The path of the log file in the session folder
+        :param extension: The extension of the log file
+        :return: The job
+        '''
+        job = cls(file_path, extension)
+        with _jobs_lock:
+            _drop_expired_jobs()
+            _jobs[job.jobId] = job
+        _executor.submit(copy_current_request_context(job.__run))
+        return job
+
+    @classmethod
+    def get(cls, job_id):
+        '''
+        :return: The job, None if it is unknown. A finished or failed job is dropped when it is returned, so that its
+        status (with the session metadata) is read once.
+        '''
+        with _jobs_lock:
+            _drop_expired_jobs()
+            job = _jobs.get(job_id, None)
+            if job is not None and job.status != IngestionStatus.RUNNING:
+                del _jobs[job_id]
+            return job
+
+    def __init__(self, file_path, extension):
+        '''
+        The ingestion of an uploaded log: parsing, preprocessing, the upload statistics (attributes and relations)
+        and pickling the managers. The session metadata is available as result once the job is finished.
+        Jobs live in the memory of the backend process until their final status has been read (see IngestionJob.get),
+        or until FINISHED_JOB_TTL seconds after they have finished.
+        '''
+        self.jobId = uuid.uuid4().hex
+        self.sessionKey = session.get('session_key', None)
+        self.filePath = file_path
+        self.extension = extension
+        self.stage = IngestionStage.QUEUED
+        self.status = IngestionStatus.RUNNING
+        self.result = None
+        self.err = None
+        self.finishTime = None
+
+    def get_status(self):
+        if self.stage in INGESTION_STAGES:
+            progress = INGESTION_STAGES.index(self.stage) / len(INGESTION_STAGES)
+        else:
+            progress = 1.0 if self.stage == IngestionStage.DONE else 0.0
+        return {
+            'job_id': self.jobId,
+            'session_key': self.sessionKey,
+            'status': self.status.value,
+            'stage': self.stage.value,
+            'progress': progress,
+            'result': self.result,
+            'err': self.err
+        }
+
+    def __run(self):
+        try:
+            self.__set_stage(IngestionStage.PARSE)
+            elmo = EventLogManager()
+            elmo.load_file(self.filePath, self.extension)
+            self.__set_stage(IngestionStage.PREPROCESS)
+            pamela = PatternMiningManager(elmo.ocel)
+            pamela.initialize(report_stage=lambda stage: self.__set_stage(IngestionStage(stage)))
+            self.__set_stage(IngestionStage.SAVE)
+            pamela.save()
+            self.result = pamela.get_session_metadata()
+            self.__set_stage(IngestionStage.DONE)
+            self.finishTime = time.time()
+            self.status = IngestionStatus.FINISHED
+        except Exception as e:
+            traceback.print_exc()
+            self.err = "Ingestion failed at stage '{0}': {1}".format(self.stage.value, repr(e))
+            self.finishTime = time.time()
+            self.status = IngestionStatus.FAILED
+
+    def __set_stage(self, stage: IngestionStage):
+        print("Ingestion job {0} (session {1}): {2}".format(self.jobId, self.sessionKey, stage.value))
+        self.stage = stage
+
+
+def _drop_expired_jobs():
+    # called with _jobs_lock held
+    now = time.time()
+    expired = [job_id for job_id, job in _jobs.items()
+               if job.finishTime is not None and now - job.finishTime > FINISHED_JOB_TTL]
+    for job_id in expired:
+        del _jobs[job_id]
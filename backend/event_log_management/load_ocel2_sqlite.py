@@ -1,10 +1,19 @@
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from pathlib import Path
 from typing import Optional, Dict, Any
 
 from pm4py.objects.ocel import constants
 from pm4py.objects.ocel.obj import OCEL
 from pm4py.util import exec_utils, pandas_utils
+import numpy as np
 import pandas as pd
+from pandas.api.extensions import take
+from pandas.api.types import union_categoricals
 #from pm4py.objects.ocel.util import ocel_consistency
 from pm4py.objects.ocel.util import filtering_utils
 #from pm4py.objects.ocel.validation import ocel20_rel_validation
@@ -25,11 +34,44 @@ class Parameters(Enum):
     VALIDATION = "validation"
     EXCEPT_IF_INVALID = "except_if_invalid"
 
-def load_ocel(file_path, filters=None, acts=None, seed_type= None, seed_objects=None, red_flag_acts=None):
+
+# number of rows fetched from SQLite at once
+READ_CHUNK_SIZE = 250000
+
+# identifiers, types and qualifiers are read into categorical columns
+EVENT_SCHEMA = {"ocel_id": "category", "ocel_type": "category"}
+OBJECT_SCHEMA = {"ocel_id": "category", "ocel_type": "category"}
+E2O_SCHEMA = {"ocel_event_id": "category", "ocel_object_id": "category", "ocel_qualifier": "category"}
+O2O_SCHEMA = {"ocel_source_id": "category", "ocel_target_id": "category", "ocel_qualifier": "category"}
+TYPE_TABLE_SCHEMA = {"ocel_id": "category", "ocel_changed_field": "category"}
+SQLITE_FLOAT_TYPES = {"REAL", "FLOAT", "DOUBLE"}
+
+# upper bound for the number of threads reading the event_<type> and object_<type> tables
+MAX_READ_WORKERS = 8
+
+def load_ocel(file_path, filters=None, acts=None, seed_type= None, seed_objects=None, red_flag_acts=None,
+              push_down_filters=False, max_read_workers=None):
+    '''
+    Loads an OCEL 2.0 SQLite file into a pm4py OCEL.
+
+    :param file_path: Path to the SQLite file
+    :param filters: Object types to keep
+    :param acts: Event types (activities) to keep
+    :param seed_type: Object type of the seed objects
+    :param seed_objects: Seed objects, the log is restricted to the objects reachable from them via O2O relations
+    :param red_flag_acts: Event types whose objects are excluded
+    :param push_down_filters: If True, the filters are evaluated inside SQLite (WHERE clauses and semi-joins), so that
+    only the selected part of the log is read into memory. Otherwise, all tables are read and filtered with pandas.
+    :param max_read_workers: Number of threads reading the event_<type> and object_<type> tables in parallel, each
+    with its own read-only connection. Defaults to the number of CPUs, bounded by MAX_READ_WORKERS.
+    '''
     parameters = {}
 
-    import sqlite3
-    conn = sqlite3.connect(file_path)
+    # the selection of the push-down mode lives in a shared in-memory database, so that it is visible to the
+    # connections of all reader threads
+    selection_uri = "file:ox_selection_" + uuid.uuid4().hex + "?mode=memory&cache=shared" \
+        if push_down_filters else None
+    conn = _connect_read_only(file_path, selection_uri)
 
     
     validation = exec_utils.get_param_value(Parameters.VALIDATION, parameters, True)
@@ -46,77 +88,24 @@ def load_ocel(file_path, filters=None, acts=None, seed_type= None, seed_objects=
     changed_field = exec_utils.get_param_value(Parameters.CHANGED_FIELD, parameters, constants.DEFAULT_CHNGD_FIELD)
     cumcount_field = exec_utils.get_param_value(Parameters.CUMCOUNT, parameters, "@@cumcount")
 
-    import pandas as pd
-    EVENTS = pd.read_sql("SELECT * FROM event", conn)
-    OBJECTS = pd.read_sql("SELECT * FROM object", conn)
-    
-    O2O = pd.read_sql("SELECT * FROM object_object", conn)
-    if "ocel_id" in O2O.columns:
-        O2O = O2O.drop(columns=["ocel_id"])
-    O2O = O2O.rename(columns={"ocel_source_id": object_id, "ocel_target_id": object_id+"_2", "ocel_qualifier": qualifier_field})
-    
-    E2O = pd.read_sql("SELECT * FROM event_object", conn)
-    E2O = E2O.rename(columns={"ocel_event_id": event_id, "ocel_object_id": object_id, "ocel_qualifier": qualifier_field})
-    
     EVENT_CORR_TYPE = pd.read_sql("SELECT * FROM event_map_type", conn)
     OBJECT_CORR_TYPE = pd.read_sql("SELECT * FROM object_map_type", conn)
     EVENT_CORR_TYPE = EVENT_CORR_TYPE.to_dict("records")
     OBJECT_CORR_TYPE = OBJECT_CORR_TYPE.to_dict("records")
     events_type_map = {x["ocel_type"]: x["ocel_type_map"] for x in EVENT_CORR_TYPE}
     objects_type_map = {x["ocel_type"]: x["ocel_type_map"] for x in OBJECT_CORR_TYPE}    
-    
-    if filters is not None:
-        OBJECTS = OBJECTS[OBJECTS["ocel_type"].isin(filters)]
-
-    if red_flag_acts is not None:
-        flagged_events = EVENTS[EVENTS["ocel_type"].isin(red_flag_acts)]
-        flagged_event_objects = pd.merge(flagged_events, E2O, left_on="ocel_id", right_on=event_id)
-        flagged_objects=list(flagged_event_objects[object_id].unique())
-        OBJECTS = OBJECTS[~(OBJECTS["ocel_id"].isin(flagged_objects))]
 
-    if seed_type is not None and seed_objects is not None:
-        OBJECTS_ = OBJECTS[OBJECTS["ocel_id"].isin(seed_objects)]
-        OBJECTS_ = OBJECTS_[OBJECTS_["ocel_type"] == seed_type]
-        included_types = [seed_type]
-        hasnew = True
-        O2O_ = O2O[:]
-        O2O_.rename(columns={object_id: "_O1", object_id+"_2": "_O2"}, inplace=True)
-        OBJECTS__ = OBJECTS_[:]
-        while hasnew:
-            old_ids = set(OBJECTS_["ocel_id"])
-            OBJECTS_1 = pd.merge(OBJECTS__, O2O_[["_O1", "_O2"]], left_on="ocel_id", right_on="_O1")
-            OBJECTS_2 = pd.merge(OBJECTS__, O2O_[["_O1", "_O2"]], left_on="ocel_id", right_on="_O2")
-            cond1a = ~(OBJECTS_1["_O2"].isin(old_ids))
-            cond2a = ~(OBJECTS_2["_O1"].isin(old_ids))
-            OBJECTS_1 = OBJECTS_1[cond1a][["_O2"]]
-            OBJECTS_2 = OBJECTS_2[cond2a][["_O1"]]
-            OBJECTS_1 = pd.merge(OBJECTS, OBJECTS_1, left_on="ocel_id", right_on="_O2")
-            OBJECTS_2 = pd.merge(OBJECTS, OBJECTS_2, left_on="ocel_id", right_on="_O1")
-            cond1b = ~(OBJECTS_1["ocel_type"].isin(included_types))
-            cond2b = ~(OBJECTS_2["ocel_type"].isin(included_types))
-            OBJECTS_1 = OBJECTS_1[cond1b]
-            OBJECTS_2 = OBJECTS_2[cond2b]       
-            OBJECTS_1.drop(columns=["_O2"], inplace=True)
-            OBJECTS_2.drop(columns=["_O1"], inplace=True)
-            OBJECTS__ = pd.concat([OBJECTS_1, OBJECTS_2])
-            OBJECTS_ =  pd.concat([OBJECTS_, OBJECTS__])
-            new_ids = list(OBJECTS__["ocel_id"])
-            included_types = list(set(included_types + list(OBJECTS__["ocel_type"].unique())))
-            hasnew = len(new_ids) > 0
-        OBJECTS = OBJECTS_[:]
-        del OBJECTS_
-        del OBJECTS__
-        del O2O_
-
-    OBJECTS = OBJECTS.drop_duplicates()
+    if push_down_filters:
+        EVENTS, OBJECTS, O2O, E2O = _select_filtered_log(conn, filters, seed_type, seed_objects, red_flag_acts,
+                                                         event_id, object_id, qualifier_field)
+        event_types_filter = " WHERE ocel_id IN (SELECT ocel_id FROM ox.events)"
+        object_types_filter = " WHERE ocel_id IN (SELECT ocel_id FROM ox.objects)"
+    else:
+        EVENTS, OBJECTS, O2O, E2O = _filter_log(conn, filters, seed_type, seed_objects, red_flag_acts,
+                                                event_id, object_id, qualifier_field)
+        event_types_filter = ""
+        object_types_filter = ""
 
-    E2O = pd.merge(E2O, OBJECTS[["ocel_id"]], left_on=object_id, right_on="ocel_id")
-    E2O = E2O.drop(columns=["ocel_id"])
-    E2O = E2O.drop_duplicates()
-    EVENTS = pd.merge(EVENTS, E2O[[event_id]], left_on="ocel_id", right_on=event_id)
-    EVENTS = EVENTS.drop(columns=[event_id])
-    EVENTS = EVENTS.drop_duplicates()
-    
     etypes = sorted((EVENTS["ocel_type"].unique()))
     if acts is not None: 
         etypes = [act for act in etypes if act in acts]
@@ -129,37 +118,37 @@ def load_ocel(file_path, filters=None, acts=None, seed_type= None, seed_objects=
     if len(O2O) == 0:
         O2O = None
 
-    EVENTS = EVENTS.to_dict("records")
-    OBJECTS = OBJECTS.to_dict("records")
-    events_id_type = {x["ocel_id"]: x["ocel_type"] for x in EVENTS}
-    objects_id_type = {x["ocel_id"]: x["ocel_type"] for x in OBJECTS}
+    events_id_type = _id_map(EVENTS, "ocel_id", "ocel_type")
+    objects_id_type = _id_map(OBJECTS, "ocel_id", "ocel_type")
+    del EVENTS
+    del OBJECTS
 
-    event_types_coll = []
-    object_types_coll = []
-    
-    for act in etypes:
-        act_red = events_type_map[act]
-        df = pd.read_sql("SELECT * FROM event_"+act_red, conn)
-        df = df.rename(columns={"ocel_id": event_id, "ocel_time": event_timestamp})
-        event_types_coll.append(df)
-    
-    for ot in otypes:
-        ot_red = objects_type_map[ot]
-        df = pd.read_sql("SELECT * FROM object_"+ot_red, conn)
-        df = df.rename(columns={"ocel_id": object_id, "ocel_time": event_timestamp})
-        object_types_coll.append(df)
+    event_tables = ["event_" + events_type_map[act] for act in etypes]
+    object_tables = ["object_" + objects_type_map[ot] for ot in otypes]
+    type_tables = _read_type_tables(file_path, selection_uri,
+                                    [(table, event_types_filter) for table in event_tables] +
+                                    [(table, object_types_filter) for table in object_tables],
+                                    max_read_workers)
+    event_types_coll = [
+        df.rename(columns={"ocel_id": event_id, "ocel_time": event_timestamp})
+        for df in type_tables[:len(event_tables)]
+    ]
+    object_types_coll = [
+        df.rename(columns={"ocel_id": object_id, "ocel_time": event_timestamp})
+        for df in type_tables[len(event_tables):]
+    ]
+    del type_tables
     
-    event_types_coll = pandas_utils.concat(event_types_coll)
-    event_types_coll[event_activity] = event_types_coll[event_id].map(events_id_type)
+    event_types_coll = _concat_categorical_frames(event_types_coll)
+    event_types_coll[event_activity] = _map_categorical(event_types_coll[event_id], events_id_type)
     event_types_coll = dataframe_utils.convert_timestamp_columns_in_df(event_types_coll, timest_format=pm4_constants.DEFAULT_TIMESTAMP_PARSE_FORMAT, timest_columns=[event_timestamp])
     
-    object_types_coll = pandas_utils.concat(object_types_coll)
-    object_types_coll[object_type] = object_types_coll[object_id].map(objects_id_type)
+    object_types_coll = _concat_categorical_frames(object_types_coll)
+    object_types_coll[object_type] = _map_categorical(object_types_coll[object_id], objects_id_type)
     object_types_coll = object_types_coll.rename(columns={"ocel_changed_field": changed_field})
     
-    events_timestamp = event_types_coll[[event_id, event_timestamp]].to_dict('records')
-    events_timestamp = {x[event_id]: x[event_timestamp] for x in events_timestamp}
-    object_types_coll[cumcount_field] = object_types_coll.groupby(object_id).cumcount()
+    events_timestamp = _id_map(event_types_coll, event_id, event_timestamp)
+    object_types_coll[cumcount_field] = object_types_coll.groupby(object_id, observed=True).cumcount()
     
     if changed_field in object_types_coll:
         objects = object_types_coll[object_types_coll[changed_field].isna()]
@@ -178,9 +167,9 @@ def load_ocel(file_path, filters=None, acts=None, seed_type= None, seed_objects=
         del objects[event_timestamp]
     del objects[cumcount_field]
 
-    E2O[event_activity] = E2O[event_id].map(events_id_type)
-    E2O[event_timestamp] = E2O[event_id].map(events_timestamp)
-    E2O[object_type] = E2O[object_id].map(objects_id_type)
+    E2O[event_activity] = _map_categorical(E2O[event_id], events_id_type)
+    E2O[event_timestamp] = _map_categorical(E2O[event_id], events_timestamp)
+    E2O[object_type] = _map_categorical(E2O[object_id], objects_id_type)
     
     conn.close()
     
@@ -201,7 +190,296 @@ def load_ocel(file_path, filters=None, acts=None, seed_type= None, seed_objects=
         object_changes = object_changes.sort_values([event_timestamp, internal_index])
         del object_changes[internal_index]
 
+    # the pattern mining groups by these columns and expects plain labels (no unobserved categories)
+    event_types_coll = _decode_categories(event_types_coll)
+    objects = _decode_categories(objects)
+    E2O = _decode_categories(E2O)
+    if object_changes is not None:
+        object_changes = _decode_categories(object_changes)
+    if O2O is not None:
+        O2O = _decode_categories(O2O)
+
     ocel = OCEL(events=event_types_coll, objects=objects, relations=E2O, object_changes=object_changes, o2o=O2O, parameters=parameters)
     #ocel = ocel_consistency.apply(ocel, parameters=parameters)
     ocel = filtering_utils.propagate_relations_filtering(ocel, parameters=parameters)
     return ocel
+
+
+
+def _connect_read_only(file_path, selection_uri=None):
+    conn = sqlite3.connect(Path(file_path).absolute().as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+    if selection_uri is not None:
+        conn.execute("ATTACH DATABASE ? AS ox", (selection_uri,))
+    return conn
+
+
+def _read_type_tables(file_path, selection_uri, tables, max_workers=None):
+    '''
+    Reads event_<type> and object_<type> tables on a bounded thread pool. Every worker thread opens its own read-only
+    connection. The frames are returned in the order of the given (table, filter) pairs, independent of the order in
+    which the reads finish.
+    '''
+    if len(tables) == 0:
+        return []
+    if max_workers is None:
+        max_workers = min(MAX_READ_WORKERS, os.cpu_count() or 1)
+    max_workers = max(1, min(max_workers, len(tables)))
+    worker_state = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+
+    def read(table_and_filter):
+        table, table_filter = table_and_filter
+        if not hasattr(worker_state, "conn"):
+            worker_state.conn = _connect_read_only(file_path, selection_uri)
+            with connections_lock:
+                connections.append(worker_state.conn)
+        conn = worker_state.conn
+        return _read_sql_chunked(conn, "SELECT * FROM \"" + table + "\"" + table_filter,
+                                 _type_table_schema(conn, table))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(read, tables))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def _read_sql_chunked(conn, query, dtype, params=(), chunksize=READ_CHUNK_SIZE):
+    '''
+    Streams the result of a query in chunks of chunksize rows. Each chunk is converted to the given dtype schema
+    right away, so that repeated identifiers are only held once per chunk (as categories) and never as one Python
+    string per row for the whole table.
+    '''
+    cursor = conn.execute(query, params)
+    columns = [description[0] for description in cursor.description]
+    dtype = {col: col_dtype for col, col_dtype in dtype.items() if col in columns}
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if len(rows) == 0:
+            break
+        chunks.append(pd.DataFrame.from_records(rows, columns=columns).astype(dtype))
+    cursor.close()
+    if len(chunks) == 0:
+        return pd.DataFrame(columns=columns).astype(dtype)
+    if len(chunks) == 1:
+        return chunks[0]
+    frame = _concat_categorical_frames(chunks, ignore_index=True)
+    # columns without an explicit dtype may have been inferred differently per chunk
+    inferred_columns = [col for col in columns if col not in dtype]
+    frame[inferred_columns] = frame[inferred_columns].infer_objects()
+    return frame
+
+
+def _type_table_schema(conn, table):
+    '''
+    Explicit dtypes of an event_<type> or object_<type> table: identifiers and changed fields are categorical,
+    columns declared as floating point numbers are read as float64. Timestamps are parsed later on.
+    '''
+    schema = dict(TYPE_TABLE_SCHEMA)
+    for column_info in conn.execute("PRAGMA table_info(\"" + table + "\")").fetchall():
+        name, declared_type = column_info[1], column_info[2]
+        if declared_type.upper() in SQLITE_FLOAT_TYPES:
+            schema[name] = "float64"
+    return schema
+
+
+def _concat_categorical_frames(frames, ignore_index=False):
+    '''
+    Concatenates frames without losing categorical columns (pandas falls back to object dtype whenever the
+    categories of the parts differ).
+    '''
+    categorical_columns = {col for frame in frames for col in frame.columns
+                           if isinstance(frame[col].dtype, pd.CategoricalDtype)}
+    dtypes = {
+        col: pd.CategoricalDtype(union_categoricals(
+            [frame[col] for frame in frames if col in frame.columns], ignore_order=True).categories)
+        for col in categorical_columns
+    }
+    frames = [frame.astype({col: col_dtype for col, col_dtype in dtypes.items() if col in frame.columns})
+              for frame in frames]
+    return pandas_utils.concat(frames, ignore_index=ignore_index)
+
+
+def _id_map(frame, id_column, value_column):
+    '''
+    A series mapping identifiers to values, keeping the last value of duplicate identifiers.
+    '''
+    id_map = pd.Series(frame[value_column].array, index=frame[id_column].array)
+    return id_map[~id_map.index.duplicated(keep="last")]
+
+
+def _map_categorical(values, id_map):
+    '''
+    Maps a (categorical) identifier column through an id map. For categorical columns the map is evaluated once
+    per category and broadcast via the category codes.
+    '''
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.map(id_map)
+    mapped_categories = id_map.reindex(values.cat.categories).array
+    return pd.Series(take(mapped_categories, values.cat.codes.to_numpy(), allow_fill=True), index=values.index)
+
+
+def _decode_categories(frame):
+    categorical_columns = [col for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)]
+    return frame.astype({col: object for col in categorical_columns})
+
+
+def _read_o2o(conn, query, object_id, qualifier_field, params=()):
+    O2O = _read_sql_chunked(conn, query, O2O_SCHEMA, params)
+    if "ocel_id" in O2O.columns:
+        O2O = O2O.drop(columns=["ocel_id"])
+    O2O = O2O.rename(columns={"ocel_source_id": object_id, "ocel_target_id": object_id+"_2", "ocel_qualifier": qualifier_field})
+    return O2O
+
+
+def _read_e2o(conn, query, event_id, object_id, qualifier_field, params=()):
+    E2O = _read_sql_chunked(conn, query, E2O_SCHEMA, params)
+    E2O = E2O.rename(columns={"ocel_event_id": event_id, "ocel_object_id": object_id, "ocel_qualifier": qualifier_field})
+    return E2O
+
+
+def _filter_log(conn, filters, seed_type, seed_objects, red_flag_acts, event_id, object_id, qualifier_field):
+    EVENTS = _read_sql_chunked(conn, "SELECT * FROM event", EVENT_SCHEMA)
+    OBJECTS = _read_sql_chunked(conn, "SELECT * FROM object", OBJECT_SCHEMA)
+    O2O = _read_o2o(conn, "SELECT * FROM object_object", object_id, qualifier_field)
+    E2O = _read_e2o(conn, "SELECT * FROM event_object", event_id, object_id, qualifier_field)
+
+    if filters is not None:
+        OBJECTS = OBJECTS[OBJECTS["ocel_type"].isin(filters)]
+
+    if red_flag_acts is not None:
+        flagged_events = EVENTS[EVENTS["ocel_type"].isin(red_flag_acts)]
+        flagged_event_objects = pd.merge(flagged_events, E2O, left_on="ocel_id", right_on=event_id)
+        flagged_objects=list(flagged_event_objects[object_id].unique())
+        OBJECTS = OBJECTS[~(OBJECTS["ocel_id"].isin(flagged_objects))]
+
+    if seed_type is not None and seed_objects is not None:
+        OBJECTS = _expand_seed_objects(OBJECTS, O2O, seed_type, seed_objects, object_id)
+
+    OBJECTS = OBJECTS.drop_duplicates()
+
+    E2O = pd.merge(E2O, OBJECTS[["ocel_id"]], left_on=object_id, right_on="ocel_id")
+    E2O = E2O.drop(columns=["ocel_id"])
+    E2O = E2O.drop_duplicates()
+    EVENTS = pd.merge(EVENTS, E2O[[event_id]], left_on="ocel_id", right_on=event_id)
+    EVENTS = EVENTS.drop(columns=[event_id])
+    EVENTS = EVENTS.drop_duplicates()
+    return EVENTS, OBJECTS, O2O, E2O
+
+
+def _select_filtered_log(conn, filters, seed_type, seed_objects, red_flag_acts, event_id, object_id, qualifier_field):
+    '''
+    Evaluates the load filters inside SQLite. The selected objects and events are kept in the tables ox.objects and
+    ox.events of the attached selection database, so that the per-type tables can be restricted by semi-joins.
+    '''
+    conn.execute("CREATE TABLE ox.objects (ocel_id TEXT PRIMARY KEY, ocel_type TEXT)")
+    conn.execute("CREATE TABLE ox.events (ocel_id TEXT PRIMARY KEY, ocel_type TEXT)")
+    conditions = []
+    params = []
+    if filters is not None:
+        conditions.append("o.ocel_type IN (" + _placeholders(filters) + ")")
+        params += list(filters)
+    if red_flag_acts is not None:
+        conditions.append("o.ocel_id NOT IN (SELECT eo.ocel_object_id FROM event_object eo "
+                          "JOIN event e ON e.ocel_id = eo.ocel_event_id "
+                          "WHERE e.ocel_type IN (" + _placeholders(red_flag_acts) + "))")
+        params += list(red_flag_acts)
+    where = " WHERE " + " AND ".join(conditions) if len(conditions) > 0 else ""
+    conn.execute("INSERT OR IGNORE INTO ox.objects SELECT o.ocel_id, o.ocel_type FROM object o" + where, params)
+
+    OBJECTS = _read_sql_chunked(conn, "SELECT * FROM ox.objects", OBJECT_SCHEMA)
+    O2O = _read_o2o(conn, "SELECT oo.* FROM object_object oo "
+                          "WHERE oo.ocel_source_id IN (SELECT ocel_id FROM ox.objects) "
+                          "AND oo.ocel_target_id IN (SELECT ocel_id FROM ox.objects)",
+                    object_id, qualifier_field)
+
+    if seed_type is not None and seed_objects is not None:
+        OBJECTS = _expand_seed_objects(OBJECTS, O2O, seed_type, seed_objects, object_id)
+        OBJECTS = OBJECTS.drop_duplicates()
+        conn.execute("DELETE FROM ox.objects")
+        conn.executemany("INSERT OR IGNORE INTO ox.objects VALUES (?, ?)",
+                         OBJECTS[["ocel_id", "ocel_type"]].itertuples(index=False, name=None))
+
+    # like _filter_log, all events of the selected objects are kept here: objects that are only related to events of
+    # other activities are still kept by the relation propagation. The activities only restrict which event_<type>
+    # tables are read.
+    conn.execute("INSERT OR IGNORE INTO ox.events SELECT DISTINCT e.ocel_id, e.ocel_type FROM event e "
+                 "JOIN event_object eo ON eo.ocel_event_id = e.ocel_id "
+                 "JOIN ox.objects o ON o.ocel_id = eo.ocel_object_id")
+
+    conn.commit()
+
+    EVENTS = _read_sql_chunked(conn, "SELECT * FROM ox.events", EVENT_SCHEMA)
+    E2O = _read_e2o(conn, "SELECT DISTINCT eo.* FROM event_object eo "
+                          "JOIN ox.events e ON e.ocel_id = eo.ocel_event_id "
+                          "JOIN ox.objects o ON o.ocel_id = eo.ocel_object_id",
+                    event_id, object_id, qualifier_field)
+    return EVENTS, OBJECTS, O2O, E2O
+
+
+def _placeholders(values):
+    return ",".join("?" for _ in values)
+
+
+def _expand_seed_objects(OBJECTS, O2O, seed_type, seed_objects, object_id):
+    '''
+    Restricts the objects to those reachable from the seed objects via (undirected) O2O relations. The traversal is a
+    breadth-first search in rounds: an object is reached in a round if it is adjacent to an object reached in the
+    previous round and its type has not been included in an earlier round. Hence, every object type is entered in
+    exactly one round.
+
+    The O2O relations are encoded once into an integer adjacency structure (CSR), and every object is expanded at most
+    once, so the cost grows with the reached subgraph rather than with rounds times O2O size.
+    '''
+    object_index = pd.Index(OBJECTS["ocel_id"].unique())
+    types_per_object = OBJECTS.drop_duplicates(subset="ocel_id").set_index("ocel_id")["ocel_type"]
+    object_type_codes, object_types = pd.factorize(types_per_object.reindex(object_index))
+    offsets, adjacency = _o2o_adjacency(object_index, O2O, object_id)
+
+    seeds = object_index.get_indexer(pd.Index(seed_objects).unique())
+    seeds = seeds[seeds >= 0]
+    frontier = seeds[object_type_codes[seeds] == object_types.get_loc(seed_type)] \
+        if seed_type in object_types else seeds[:0]
+    reached = np.zeros(len(object_index), dtype=bool)
+    reached[frontier] = True
+    included_types = np.zeros(len(object_types), dtype=bool)
+    included_types[object_type_codes[frontier]] = True
+    while len(frontier) > 0:
+        neighbors = np.unique(_gather_neighbors(offsets, adjacency, frontier))
+        neighbors = neighbors[~reached[neighbors]]
+        neighbors = neighbors[~included_types[object_type_codes[neighbors]]]
+        reached[neighbors] = True
+        included_types[object_type_codes[neighbors]] = True
+        frontier = neighbors
+    return OBJECTS[OBJECTS["ocel_id"].isin(object_index[reached])]
+
+
+def _o2o_adjacency(object_index, O2O, object_id):
+    '''
+    Undirected adjacency of the objects in object_index in CSR layout: the neighbors of object code i are
+    adjacency[offsets[i]:offsets[i+1]]. Relations with an endpoint outside of object_index are dropped.
+    '''
+    sources = object_index.get_indexer(O2O[object_id])
+    targets = object_index.get_indexer(O2O[object_id + "_2"])
+    known = (sources >= 0) & (targets >= 0)
+    sources, targets = sources[known], targets[known]
+    rows = np.concatenate([sources, targets])
+    columns = np.concatenate([targets, sources])
+    order = np.argsort(rows, kind="stable")
+    offsets = np.zeros(len(object_index) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(object_index)), out=offsets[1:])
+    return offsets, columns[order]
+
+
+def _gather_neighbors(offsets, adjacency, nodes):
+    starts = offsets[nodes]
+    lengths = offsets[nodes + 1] - starts
+    total = lengths.sum()
+    if total == 0:
+        return adjacency[:0]
+    # position k of the output belongs to node j and reads adjacency[starts[j] + (k - first output position of j)]
+    shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return adjacency[shifts + np.arange(total)]
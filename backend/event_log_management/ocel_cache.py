@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+from pm4py import OCEL
+
+from utils.columnar_utils import save_frame, load_frame, get_size
+from utils.session_utils import RUNTIME_RESOURCE_FOLDER
+
+OCEL_CACHE_FOLDER = os.path.join(RUNTIME_RESOURCE_FOLDER, "ocel_cache")
+# the least recently used logs are evicted once the cache folder exceeds this size
+MAX_OCEL_CACHE_BYTES = 4 * 1024 ** 3
+HASH_BLOCK_SIZE = 1024 ** 2
+OCEL_FRAMES = ["events", "objects", "relations", "o2o", "e2e", "object_changes"]
+ENTRY_FILE = "ocel.json"
+
+
+class OcelCache:
+
+    @classmethod
+    def get_key(cls, file_path):
+        '''
+        The cache key of a log file: the SHA-256 hash of its content.
+        '''
+        content_hash = hashlib.sha256()
+        with open(file_path, "rb") as rf:
+            for block in iter(lambda: rf.read(HASH_BLOCK_SIZE), b""):
+                content_hash.update(block)
+        return content_hash.hexdigest()
+
+    def __init__(self, folder=OCEL_CACHE_FOLDER, max_bytes=MAX_OCEL_CACHE_BYTES):
+        '''
+        A content-addressed cache of parsed logs. Every entry is a folder named by the hash of the log file and holds
+        one columnar frame folder per OCEL frame (see utils.columnar_utils). Loading an entry memory-maps the numeric
+        columns and the codes of the identifier and attribute columns instead of parsing the log again.
+
+        :param folder: The folder of the cache, shared by all sessions
+        :param max_bytes: The size bound of the folder, enforced by evicting the least recently used entries
+        '''
+        self.folder = folder
+        self.maxBytes = max_bytes
+        os.makedirs(self.folder, exist_ok=True)
+
+    def get(self, key):
+        '''
+        :return: The cached OCEL, or None if the log is not in the cache
+        '''
+        entry_path = os.path.join(self.folder, key)
+        entry_file = os.path.join(entry_path, ENTRY_FILE)
+        try:
+            with open(entry_file) as rf:
+                entry = json.load(rf)
+            frames = {
+                frame_name: load_frame(os.path.join(entry_path, frame_name))
+                for frame_name in entry["frames"]
+            }
+            # the modification time of the entry file is the recency used for evictions
+            os.utime(entry_file)
+        except (FileNotFoundError, ValueError, KeyError):
+            # the entry is missing, evicted meanwhile or incomplete
+            return None
+        return OCEL(parameters=entry["parameters"], globals=entry["globals"], **frames)
+
+    def put(self, key, ocel: OCEL):
+        entry_path = os.path.join(self.folder, key)
+        if os.path.exists(entry_path):
+            return
+        # entries are written to a temporary folder first, so that readers never see a partially written entry
+        tmp_path = os.path.join(self.folder, "tmp_" + key + "_" + uuid.uuid4().hex)
+        os.makedirs(tmp_path)
+        frame_names = []
+        for frame_name in OCEL_FRAMES:
+            frame = getattr(ocel, frame_name, None)
+            if frame is not None:
+                save_frame(frame, os.path.join(tmp_path, frame_name))
+                frame_names.append(frame_name)
+        with open(os.path.join(tmp_path, ENTRY_FILE), "w") as wf:
+            json.dump({
+                "frames": frame_names,
+                "parameters": ocel.parameters,
+                "globals": ocel.globals
+            }, wf, default=str)
+        try:
+            os.rename(tmp_path, entry_path)
+        except OSError:
+            # another upload of the same log has been cached concurrently
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.__evict(keep=key)
+
+    def __evict(self, keep):
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.folder):
+            if not entry.is_dir() or entry.name.startswith("tmp_"):
+                continue
+            entry_file = os.path.join(entry.path, ENTRY_FILE)
+            if not os.path.exists(entry_file):
+                continue
+            size = sum(get_size(frame.path) for frame in os.scandir(entry.path) if frame.is_dir())
+            entries.append((os.path.getmtime(entry_file), entry.name, size))
+            total_size += size
+        entries.sort()
+        for last_access, name, size in entries:
+            if total_size <= self.maxBytes:
+                break
+            if name == keep:
+                continue
+            print("Evicting log {0} from the OCEL cache".format(name))
+            # sessions that have mapped the files keep their data until they are unmapped
+            shutil.rmtree(os.path.join(self.folder, name), ignore_errors=True)
+            total_size -= size
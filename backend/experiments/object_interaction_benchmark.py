@@ -0,0 +1,82 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pm4py import OCEL
+
+from pattern_mining.ocel_dictionary import OcelDictionary
+from pattern_mining.tables.object_evolution_store import ObjectEvolutionStore
+from pattern_mining.tables.object_evolutions_table import ObjectEvolutionsTable
+from pattern_mining.tables.object_interaction_table import ObjectInteractionTable
+
+
+def make_high_fanout_log(n_containers, items_per_container, items_per_event):
+    '''
+    A synthetic container logistics log: every 'load' event touches one container and a batch of items, and every
+    item is related to its container by an O2O relation.
+    '''
+    rng = np.random.default_rng(0)
+    containers = ["c" + str(c) for c in range(n_containers)]
+    items = ["i" + str(c) + "_" + str(i) for c in range(n_containers) for i in range(items_per_container)]
+    objects = pd.DataFrame({
+        "ocel:oid": containers + items,
+        "ocel:type": ["container"] * len(containers) + ["item"] * len(items),
+        "weight": rng.integers(1, 100, len(containers) + len(items)).astype(float)
+    })
+    o2o = pd.DataFrame({
+        "ocel:oid": [item.split("_")[0].replace("i", "c") for item in items],
+        "ocel:oid_2": items,
+        "ocel:qualifier": "contains"
+    })
+    events, relations = [], []
+    t0 = pd.Timestamp("2024-01-01")
+    for c, container in enumerate(containers):
+        container_items = items[c * items_per_container:(c + 1) * items_per_container]
+        for b in range(0, items_per_container, items_per_event):
+            eid = "e" + str(len(events))
+            timestamp = t0 + pd.Timedelta(minutes=len(events))
+            events.append({"ocel:eid": eid, "ocel:activity": "load", "ocel:timestamp": timestamp})
+            relations.append({"ocel:eid": eid, "ocel:oid": container, "ocel:qualifier": "container",
+                              "ocel:activity": "load", "ocel:timestamp": timestamp, "ocel:type": "container"})
+            for item in container_items[b:b + items_per_event]:
+                relations.append({"ocel:eid": eid, "ocel:oid": item, "ocel:qualifier": "item",
+                                  "ocel:activity": "load", "ocel:timestamp": timestamp, "ocel:type": "item"})
+    object_changes = pd.DataFrame(columns=["ocel:oid", "ocel:type", "ocel:timestamp", "ocel:field", "weight"])
+    object_changes["ocel:timestamp"] = pd.to_datetime(object_changes["ocel:timestamp"])
+    return OCEL(events=pd.DataFrame(events), objects=objects, relations=pd.DataFrame(relations), o2o=o2o,
+                object_changes=object_changes)
+
+
+def make_by_self_join(ocel, event_type):
+    # the former construction: all pairs of objects of an event, then the O2O relations among them
+    e2o = ocel.relations[ocel.relations["ocel:activity"] == event_type][["ocel:eid", "ocel:oid"]]
+    interaction_table = pd.merge(e2o, e2o, on='ocel:eid', how='inner', suffixes=("_x", "_y")) \
+        .merge(ocel.o2o, left_on=['ocel:oid_x', 'ocel:oid_y'], right_on=["ocel:oid", "ocel:oid_2"], how='inner') \
+        .drop(["ocel:oid", "ocel:oid_2"], axis=1)
+    return interaction_table[interaction_table['ocel:oid_x'] < interaction_table['ocel:oid_y']]
+
+
+def run(n_containers=200, items_per_container=500, items_per_event=250):
+    ocel = make_high_fanout_log(n_containers, items_per_container, items_per_event)
+    dictionary = OcelDictionary.from_ocel(ocel)
+    encoded_ocel = dictionary.encode_ocel(ocel)
+    event_type = dictionary.encode(OcelDictionary.ACTIVITY, "load")
+    object_types = list(dictionary.get_codes(OcelDictionary.OBJECT_TYPE).values())
+    store = ObjectEvolutionStore()
+    store.create(encoded_ocel)
+    object_evolutions_table = ObjectEvolutionsTable(event_type, object_types)
+    object_evolutions_table.create(encoded_ocel, store)
+    ts1 = time.time()
+    pairs = make_by_self_join(encoded_ocel, event_type)
+    ts2 = time.time()
+    object_interaction_table = ObjectInteractionTable(event_type, object_types)
+    object_interaction_table.create(encoded_ocel, object_evolutions_table)
+    ts3 = time.time()
+    print("E2O relations: {0}, Object interactions: {1}, Self-join: {2:.2f}s, O2O-driven (incl. evolution lookup): "
+          "{3:.2f}s".format(len(encoded_ocel.relations), len(object_interaction_table.table), ts2 - ts1, ts3 - ts2))
+    assert len(pairs) == len(object_interaction_table.table)
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
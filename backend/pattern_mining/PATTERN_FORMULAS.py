@@ -17,12 +17,15 @@ class FreePatternFormula(PatternFormula):
         super().__init__()
         self.freePattern = free_pattern
 
-    def apply(self, table_manager):
+    def apply_to(self, table_manager, subformula_evaluation_tables):
         return self.freePattern.apply(table_manager)
 
     def get_free_variables(self):
         return self.freePattern.get_free_variables()
 
+    def get_required_tables(self):
+        return self.freePattern.get_required_tables()
+
     def get_object_type(self):
         return None
 
@@ -67,6 +70,9 @@ class Negation(PatternFormula):
     def get_free_variables(self):
         return self.patternFormula.get_free_variables()
 
+    def get_required_tables(self):
+        return self.patternFormula.get_required_tables()
+
     def get_object_types(self):
         return self.patternFormula.get_object_types()
 
@@ -76,11 +82,11 @@ class Negation(PatternFormula):
     def substitute(self, object_argument: ObjectArgument, object_variable_argument: ObjectVariableArgument):
         self.patternFormula.substitute(object_argument, object_variable_argument)
 
-    def apply(self, table_manager):
-        subformula_evaluation_table = self.patternFormula.apply(table_manager)
-        evaluation_table = subformula_evaluation_table[:]
-        evaluation_table["ox:evaluation"] = ~evaluation_table["ox:evaluation"].astype(bool)
-        return evaluation_table
+    def get_subformulas(self):
+        return [self.patternFormula]
+
+    def apply_to(self, table_manager, subformula_evaluation_tables):
+        return _negate(subformula_evaluation_tables[0])
 
     def is_well_formed(self, bound_variables=None):
         if bound_variables is None:
@@ -103,9 +109,11 @@ class Disjunction(PatternFormula):
         self.patternFormula1 = pattern_formula1
         self.patternFormula2 = pattern_formula2
 
-    def apply(self, table_manager):
-        evaluation_table1 = self.patternFormula1.apply(table_manager)
-        evaluation_table2 = self.patternFormula2.apply(table_manager)
+    def get_subformulas(self):
+        return [self.patternFormula1, self.patternFormula2]
+
+    def apply_to(self, table_manager, subformula_evaluation_tables):
+        evaluation_table1, evaluation_table2 = subformula_evaluation_tables
         free_variables1 = self.patternFormula1.get_free_variables()
         free_variables2 = self.patternFormula2.get_free_variables()
         joint_variables = free_variables1.intersection(free_variables2)
@@ -124,6 +132,9 @@ class Disjunction(PatternFormula):
     def get_free_variables(self):
         return self.patternFormula1.get_free_variables().union(self.patternFormula2.get_free_variables())
 
+    def get_required_tables(self):
+        return self.patternFormula1.get_required_tables().union(self.patternFormula2.get_required_tables())
+
     def get_object_types(self):
         return self.patternFormula1.get_object_types().union(self.patternFormula2.get_object_types())
 
@@ -158,9 +169,11 @@ class Conjunction(PatternFormula):
         self.patternFormula1 = pattern_formula1
         self.patternFormula2 = pattern_formula2
 
-    def apply(self, table_manager):
-        evaluation_table1 = self.patternFormula1.apply(table_manager)
-        evaluation_table2 = self.patternFormula2.apply(table_manager)
+    def get_subformulas(self):
+        return [self.patternFormula1, self.patternFormula2]
+
+    def apply_to(self, table_manager, subformula_evaluation_tables):
+        evaluation_table1, evaluation_table2 = subformula_evaluation_tables
         free_variables1 = self.patternFormula1.get_free_variables()
         free_variables2 = self.patternFormula2.get_free_variables()
         free_variables1_ids = {x.id for x in free_variables1}
@@ -181,6 +194,9 @@ class Conjunction(PatternFormula):
     def get_free_variables(self):
         return self.patternFormula1.get_free_variables().union(self.patternFormula2.get_free_variables())
 
+    def get_required_tables(self):
+        return self.patternFormula1.get_required_tables().union(self.patternFormula2.get_required_tables())
+
     def get_object_types(self):
         return self.patternFormula1.get_object_types().union(self.patternFormula2.get_object_types())
 
@@ -215,14 +231,11 @@ class ExistentialPattern(PatternFormula):
         self.quantifiedVariable = quantified_variable
         self.patternFormula = pattern_formula
 
-    def apply(self, table_manager: TableManager):
-        variable_id = self.quantifiedVariable.id
-        subformula_evaluation_table = self.patternFormula.apply(table_manager)
-        event_id_and_free_variables = [x for x in subformula_evaluation_table.columns
-                                       if x not in [variable_id, "ox:evaluation"]]
-        subformula_evaluation_table.drop(variable_id, axis=1, inplace=True)
-        evaluation_table = subformula_evaluation_table.groupby(event_id_and_free_variables).agg('any').reset_index()
-        return evaluation_table
+    def get_subformulas(self):
+        return [self.patternFormula]
+
+    def apply_to(self, table_manager: TableManager, subformula_evaluation_tables):
+        return _exists(subformula_evaluation_tables[0], self.quantifiedVariable.id)
 
     def get_object_type(self):
         return self.quantifiedVariable.objectType
@@ -230,6 +243,9 @@ class ExistentialPattern(PatternFormula):
     def get_free_variables(self):
         return set(x for x in self.patternFormula.get_free_variables() if not equals(x, self.quantifiedVariable))
 
+    def get_required_tables(self):
+        return self.patternFormula.get_required_tables()
+
     def get_object_types(self):
         return self.patternFormula.get_object_types()
 
@@ -274,6 +290,9 @@ class UniversalPattern(PatternFormula):
     def get_free_variables(self):
         return set(x for x in self.patternFormula.get_free_variables() if not equals(x, self.quantifiedVariable))
 
+    def get_required_tables(self):
+        return self.patternFormula.get_required_tables()
+
     def get_object_types(self):
         return self.patternFormula.get_object_types()
 
@@ -287,9 +306,12 @@ class UniversalPattern(PatternFormula):
     def copy(self):
         return UniversalPattern(self.quantifiedVariable, self.patternFormula.copy())
 
-    def apply(self, table_manager: TableManager):
-        return Negation(ExistentialPattern(self.quantifiedVariable, Negation(self.patternFormula.copy()))) \
-            .apply(table_manager)
+    def get_subformulas(self):
+        return [self.patternFormula]
+
+    def apply_to(self, table_manager: TableManager, subformula_evaluation_tables):
+        # not(ex(v, not(formula)))
+        return _negate(_exists(_negate(subformula_evaluation_tables[0]), self.quantifiedVariable.id))
 
     def is_well_formed(self, bound_variables=None):
         if bound_variables is None:
@@ -307,6 +329,18 @@ class UniversalPattern(PatternFormula):
         return "\\forall " + self.quantifiedVariable.id + ":" + self.patternFormula.to_TeX()
 
 
+def _negate(evaluation_table):
+    negated_evaluation_table = evaluation_table[:]
+    negated_evaluation_table["ox:evaluation"] = ~evaluation_table["ox:evaluation"].astype(bool)
+    return negated_evaluation_table
+
+
+def _exists(evaluation_table, variable_id):
+    event_id_and_free_variables = [x for x in evaluation_table.columns if x not in [variable_id, "ox:evaluation"]]
+    evaluation_table = evaluation_table.drop(columns=variable_id)
+    return evaluation_table.groupby(event_id_and_free_variables).agg('any').reset_index()
+
+
 def get_oa_val_eq_formula(object_variable: ObjectVariableArgument, object_attribute, value):
     arguments = [object_variable]
     return ExistentialPattern(
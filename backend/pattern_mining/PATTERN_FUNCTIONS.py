@@ -1,3 +1,6 @@
+import operator
+
+import numpy as np
 import pandas as pd
 
 from pattern_mining.domains import Argument, ObjectArgument, ObjectVariableArgument
@@ -6,10 +9,13 @@ from pattern_mining.pattern_function import PatternFunction
 from pattern_mining.GROUND_PATTERNS import EAVAL_EQ, EAVAL_LEQ, E2O_R, O2O_R, O2O_COMPLETE, OAVAL_EQ, OAVAL_LEQ, \
     OAVAL_GEQ, EAVAL_GEQ, OT_CARD
 from pattern_mining.table_manager import TableManager
+from pattern_mining.tables.adjacency_index import get_pair_keys
+from pattern_mining.tables.event_interaction_table import compare_values
 
 
 class Eaval_eq(PatternFunction):
     object_arity = 0
+    required_tables = [TableManager.EVENT_TABLE]
 
     def __init__(self, event_attribute, value):
         super().__init__(self.object_arity)
@@ -21,7 +27,7 @@ class Eaval_eq(PatternFunction):
         return EAVAL_EQ(self.eventAttribute, self.value)
 
     def create_function_evaluation_table(self, table_manager: TableManager, arguments):
-        evaluated = table_manager.get_event_table()
+        evaluated = table_manager.get_event_table(["ocel:eid", self.eventAttribute])
         evaluated["ox:evaluation"] = evaluated[self.eventAttribute] == self.value
         return evaluated[["ocel:eid", "ox:evaluation"]]
 
@@ -41,6 +47,7 @@ class Eaval_eq(PatternFunction):
 
 class Eaval_leq(PatternFunction):
     object_arity = 0
+    required_tables = [TableManager.EVENT_TABLE]
 
     def __init__(self, event_attribute, value):
         super().__init__(self.object_arity)
@@ -52,7 +59,7 @@ class Eaval_leq(PatternFunction):
         return EAVAL_LEQ(self.eventAttribute, self.value)
 
     def create_function_evaluation_table(self, table_manager: TableManager, arguments):
-        evaluated = table_manager.get_event_table()
+        evaluated = table_manager.get_event_table(["ocel:eid", self.eventAttribute])
         evaluated["ox:evaluation"] = evaluated[self.eventAttribute] <= self.value
         return evaluated[["ocel:eid", "ox:evaluation"]]
 
@@ -72,6 +79,7 @@ class Eaval_leq(PatternFunction):
 
 class Eaval_geq(PatternFunction):
     object_arity = 0
+    required_tables = [TableManager.EVENT_TABLE]
 
     def __init__(self, event_attribute, value):
         super().__init__(self.object_arity)
@@ -83,7 +91,7 @@ class Eaval_geq(PatternFunction):
         return EAVAL_GEQ(self.eventAttribute, self.value)
 
     def create_function_evaluation_table(self, table_manager: TableManager, arguments):
-        evaluated = table_manager.get_event_table()
+        evaluated = table_manager.get_event_table(["ocel:eid", self.eventAttribute])
         evaluated["ox:evaluation"] = evaluated[self.eventAttribute] >= self.value
         return evaluated[["ocel:eid", "ox:evaluation"]]
 
@@ -104,6 +112,7 @@ class Eaval_geq(PatternFunction):
 
 class Oaval_eq(PatternFunction):
     object_arity = 1
+    required_tables = [TableManager.EVENT_INTERACTION]
 
     def __init__(self, object_attribute, value):
         super().__init__(self.object_arity)
@@ -119,13 +128,10 @@ class Oaval_eq(PatternFunction):
         variable_id = arg.id
         object_type = arg.objectType
         object_attribute = self.objectAttribute
-        object_evolutions = table_manager.get_object_evolutions_table()
-        object_evolutions = object_evolutions[["object_evolution_index", object_attribute]]
-        evaluated = table_manager.get_event_interaction_table()
-        evaluated = evaluated[evaluated["ocel:type"] == object_type]
-        evaluated = evaluated.merge(object_evolutions, on="object_evolution_index")
+        evaluated = table_manager.get_event_interaction_table(["ocel:eid", "ocel:oid", "ocel:type", object_attribute])
+        evaluated = evaluated[evaluated["ocel:type"] == table_manager.get_object_type_code(object_type)]
         evaluated.rename(columns={"ocel:oid": variable_id}, inplace=True)
-        evaluated["ox:evaluation"] = evaluated[object_attribute] == self.value
+        evaluated["ox:evaluation"] = compare_values(evaluated[object_attribute], operator.eq, self.value)
         return evaluated[["ocel:eid", variable_id, "ox:evaluation"]]
 
     def to_string(self):
@@ -144,6 +150,7 @@ class Oaval_eq(PatternFunction):
 
 class Oaval_leq(PatternFunction):
     object_arity = 1
+    required_tables = [TableManager.EVENT_INTERACTION]
 
     def __init__(self, object_attribute, value):
         super().__init__(self.object_arity)
@@ -159,13 +166,10 @@ class Oaval_leq(PatternFunction):
         variable_id = arg.id
         object_type = arg.objectType
         object_attribute = self.objectAttribute
-        object_evolutions = table_manager.get_object_evolutions_table()
-        object_evolutions = object_evolutions[["object_evolution_index", object_attribute]]
-        evaluated = table_manager.get_event_interaction_table()
-        evaluated = evaluated[evaluated["ocel:type"] == object_type]
-        evaluated = evaluated.merge(object_evolutions, on="object_evolution_index")
+        evaluated = table_manager.get_event_interaction_table(["ocel:eid", "ocel:oid", "ocel:type", object_attribute])
+        evaluated = evaluated[evaluated["ocel:type"] == table_manager.get_object_type_code(object_type)]
         evaluated.rename(columns={"ocel:oid": variable_id}, inplace=True)
-        evaluated["ox:evaluation"] = evaluated[self.objectAttribute] <= self.value
+        evaluated["ox:evaluation"] = compare_values(evaluated[object_attribute], operator.le, self.value)
         return evaluated[["ocel:eid", variable_id, "ox:evaluation"]]
 
     def to_string(self):
@@ -184,6 +188,7 @@ class Oaval_leq(PatternFunction):
 
 class Oaval_geq(PatternFunction):
     object_arity = 1
+    required_tables = [TableManager.EVENT_INTERACTION]
 
     def __init__(self, object_attribute, value):
         super().__init__(self.object_arity)
@@ -199,13 +204,10 @@ class Oaval_geq(PatternFunction):
         variable_id = arg.id
         object_type = arg.objectType
         object_attribute = self.objectAttribute
-        object_evolutions = table_manager.get_object_evolutions_table()
-        object_evolutions = object_evolutions[["object_evolution_index", object_attribute]]
-        evaluated = table_manager.get_event_interaction_table()
-        evaluated = evaluated[evaluated["ocel:type"] == object_type]
-        evaluated = evaluated.merge(object_evolutions, on="object_evolution_index")
+        evaluated = table_manager.get_event_interaction_table(["ocel:eid", "ocel:oid", "ocel:type", object_attribute])
+        evaluated = evaluated[evaluated["ocel:type"] == table_manager.get_object_type_code(object_type)]
         evaluated.rename(columns={"ocel:oid": variable_id}, inplace=True)
-        evaluated["ox:evaluation"] = evaluated[self.objectAttribute] >= self.value
+        evaluated["ox:evaluation"] = compare_values(evaluated[object_attribute], operator.ge, self.value)
         return evaluated[["ocel:eid", variable_id, "ox:evaluation"]]
 
     def to_string(self):
@@ -224,6 +226,7 @@ class Oaval_geq(PatternFunction):
 
 class Ot_card(PatternFunction):
     object_arity = 0
+    required_tables = [TableManager.EVENT_OBJECTS_INDEX]
 
     def __init__(self, object_type, card):
         super().__init__(self.object_arity)
@@ -235,12 +238,16 @@ class Ot_card(PatternFunction):
         return OT_CARD(self.objectType, self.card)
 
     def create_function_evaluation_table(self, table_manager: TableManager, arguments):
-        interaction_table = table_manager.get_event_interaction_table()
-        evaluated = interaction_table[interaction_table["ocel:type"] == self.objectType]\
-            .groupby("ocel:eid").size()\
-            .reset_index(name="card")
-        evaluated["ox:evaluation"] = evaluated["card"] == self.card
-        return evaluated[["ocel:eid", "ox:evaluation"]]
+        cardinalities = table_manager.get_object_type_cardinalities()
+        if self.objectType not in cardinalities.columns:
+            return pd.DataFrame({"ocel:eid": np.array([], dtype=np.int32), "ox:evaluation": np.array([], dtype=bool)})
+        cards = cardinalities[self.objectType].to_numpy()
+        # events without objects of the type are not evaluated
+        has_objects = cards > 0
+        return pd.DataFrame({
+            "ocel:eid": cardinalities.index[has_objects],
+            "ox:evaluation": cards[has_objects] == self.card
+        })
 
     def to_string(self):
         return "ot_card_{" + self.objectType + "," + str(self.card) + "}"
@@ -255,6 +262,7 @@ class Ot_card(PatternFunction):
 
 class E2o_r(PatternFunction):
     object_arity = 1
+    required_tables = [TableManager.EVENT_OBJECTS_INDEX]
 
     def __init__(self, qual):
         super().__init__(self.object_arity)
@@ -268,11 +276,11 @@ class E2o_r(PatternFunction):
         arg: ObjectVariableArgument = arguments[0]
         variable_id = arg.id
         object_type = arg.objectType
-        interaction_table = table_manager.get_event_interaction_table()
-        interaction_table["is_r"] = (interaction_table["ocel:qualifier"] == self.qual)
-        interaction_table["is_type"] = (interaction_table["ocel:type"] == object_type)
-        interaction_table["is_r_of_type"] = (interaction_table["is_r"] & interaction_table["is_type"])
-        evaluated = interaction_table.groupby(["ocel:eid","ocel:oid"])['is_r_of_type'].max().reset_index(name="ox:evaluation")
+        event_objects_index = table_manager.get_event_objects_index()
+        is_r = event_objects_index.get_column("ocel:qualifier") == table_manager.get_qualifier_code(self.qual)
+        is_type = event_objects_index.get_column("ocel:type") == table_manager.get_object_type_code(object_type)
+        is_r_of_type = is_r & is_type
+        evaluated = event_objects_index.any_per_pair(is_r_of_type)
         evaluated.rename(columns={"ocel:oid": variable_id}, inplace=True)
         return evaluated[["ocel:eid", variable_id, "ox:evaluation"]]
 
@@ -288,6 +296,7 @@ class E2o_r(PatternFunction):
 
 class O2o_r(PatternFunction):
     object_arity = 2
+    required_tables = [TableManager.EVENT_OBJECTS, TableManager.OBJECT_RELATIONS_INDEX]
 
     def __init__(self, qual):
         super().__init__(self.object_arity)
@@ -315,11 +324,9 @@ class O2o_r(PatternFunction):
         evaluated.rename(columns={"ocel:oid_1": variable_id1, "ocel:oid_2": variable_id2}, inplace=True)
         evaluated.drop_duplicates(inplace=True)
 
-        o2o = table_manager.get_o2o(source_object_type)
-        evaluated = evaluated.merge(o2o, left_on=[variable_id1, variable_id2], right_on=["ocel:oid", "ocel:oid_2"], how="left")
-        evaluated["r_flag"] = evaluated["ocel:qualifier"] == self.qual
-        evaluated = evaluated.groupby(["ocel:eid", variable_id1, variable_id2])['r_flag'].sum().reset_index(name="r_flags")
-        evaluated["ox:evaluation"] = evaluated["r_flags"] > 0
+        object_relations_index = table_manager.get_object_relations_index()
+        evaluated["ox:evaluation"] = object_relations_index.contains(
+            evaluated[variable_id1], evaluated[variable_id2], table_manager.get_qualifier_code(self.qual))
         return evaluated[["ocel:eid", variable_id1, variable_id2, "ox:evaluation"]]
 
     def to_string(self):
@@ -335,6 +342,7 @@ class O2o_r(PatternFunction):
 
 class O2o_complete(PatternFunction):
     object_arity = 1
+    required_tables = [TableManager.EVENT_OBJECTS, TableManager.OBJECT_RELATIONS_INDEX]
 
     def __init__(self, qual, object_type):
         super().__init__(self.object_arity)
@@ -348,35 +356,27 @@ class O2o_complete(PatternFunction):
         variable_id = arg.id
         source_object_type = arg.objectType
         target_object_type = self.objectType
-        source_type_event_objects = table_manager.get_event_objects(source_object_type)
+        evaluated = table_manager.get_event_objects(source_object_type)
         target_type_event_objects = table_manager.get_event_objects(target_object_type)
-        evaluated = source_type_event_objects[:]
+        object_relations_index = table_manager.get_object_relations_index()
+        is_r_to_type = \
+            (object_relations_index.get_column("ocel:qualifier") == table_manager.get_qualifier_code(self.qual)) & \
+            (object_relations_index.get_column("ocel:type_2") == table_manager.get_object_type_code(target_object_type))
+        # the objects of the target type that each object is related to ...
+        relations_at_object = np.zeros(len(evaluated), dtype=np.int64)
+        positions = object_relations_index.get_positions(evaluated["ocel:oid"])
+        has_relations = positions >= 0
+        relations_at_object[has_relations] = object_relations_index.count(is_r_to_type)[positions[has_relations]]
+        # ... and those of them that are also related to the event
+        rows, edge_rows = object_relations_index.expand(evaluated["ocel:oid"])
+        rows, edge_rows = rows[is_r_to_type[edge_rows]], edge_rows[is_r_to_type[edge_rows]]
+        event_keys = get_pair_keys(evaluated["ocel:eid"].to_numpy()[rows],
+                                    object_relations_index.get_column("ocel:oid_2")[edge_rows])
+        target_keys = get_pair_keys(target_type_event_objects["ocel:eid"], target_type_event_objects["ocel:oid"])
+        is_at_event = np.isin(event_keys, target_keys)
+        relations_at_event = np.bincount(rows[is_at_event], minlength=len(evaluated))
         evaluated.rename(columns={"ocel:oid": variable_id}, inplace=True)
-        o2o_table = table_manager.get_o2o(source_object_type)
-        source_type_event_objects["ocel:qualifier"] = self.qual
-        target_type_event_objects["ocel:qualifier"] = self.qual
-        source_type_event_objects["target_object_type"] = target_object_type
-        object_interactions = table_manager.get_object_interaction_table()
-        relations_at_object = source_type_event_objects.merge(o2o_table,
-                                                              left_on=["ocel:oid", "ocel:qualifier",
-                                                                       "target_object_type"],
-                                                              right_on=["ocel:oid", "ocel:qualifier", "ocel:type_2"]
-                                                              ).groupby(["ocel:eid", "ocel:oid"]).size().reset_index()
-        relations_at_object.rename(columns={0: "relations_at_object"}, inplace=True)
-        evaluated = evaluated.merge(relations_at_object,
-                                    left_on=["ocel:eid", variable_id],
-                                    right_on=["ocel:eid", "ocel:oid"])[["ocel:eid", variable_id, "relations_at_object"]]
-        relations_at_event = source_type_event_objects.merge(object_interactions,
-                                                             left_on=["ocel:oid", "ocel:qualifier",
-                                                                      "target_object_type"],
-                                                             right_on=["ocel:oid_x", "ocel:qualifier", "ocel:type_y"]
-                                                             ).groupby(["ocel:eid_x", "ocel:oid"]).size().reset_index()
-        relations_at_event.rename(columns={0: "relations_at_event"}, inplace=True)
-        evaluated = evaluated.merge(relations_at_event,
-                                    left_on=["ocel:eid", variable_id],
-                                    right_on=["ocel:eid_x", "ocel:oid"])[
-            ["ocel:eid", variable_id, "relations_at_object", "relations_at_event"]]
-        evaluated["ox:evaluation"] = evaluated["relations_at_object"] <= evaluated["relations_at_event"]
+        evaluated["ox:evaluation"] = relations_at_object <= relations_at_event
         return evaluated[["ocel:eid", variable_id, "ox:evaluation"]]
 
     def to_string(self):
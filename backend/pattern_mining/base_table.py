@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+# the number of set bits of each byte
+_POPCOUNTS = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+class BaseTable:
+
+    def __init__(self, index: pd.Index):
+        '''
+        A BaseTable stores for each pattern of a search which events of an event type satisfy it, as a bit vector over
+        the event index packed into bytes (eight events per byte, see np.packbits). Supports are counted and patterns
+        are combined (AND, OR, NOT) on the packed vectors; a boolean DataFrame is only made for the libraries that
+        expect one (mlxtend) and for exports, see BaseTable.to_frame.
+
+        :param index: The event index (event id codes), the order of the bits
+        '''
+        self.index = index
+        self.bitVectors = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, pattern_id):
+        return pattern_id in self.bitVectors
+
+    @property
+    def columns(self):
+        return list(self.bitVectors.keys())
+
+    def set(self, pattern_id, evaluation: pd.Series):
+        '''
+        :param pattern_id: The pattern
+        :param evaluation: Per event, whether it satisfies the pattern. Events of the index that are missing do not.
+        '''
+        if not evaluation.index.equals(self.index):
+            evaluation = evaluation.reindex(self.index)
+        values = evaluation.fillna(False).to_numpy(dtype=bool)
+        self.bitVectors[pattern_id] = np.packbits(values)
+
+    def set_bits(self, pattern_id, bits: np.ndarray):
+        self.bitVectors[pattern_id] = bits
+
+    def get_bits(self, pattern_id) -> np.ndarray:
+        return self.bitVectors[pattern_id]
+
+    def get(self, pattern_id) -> pd.Series:
+        return pd.Series(self.__unpack(self.bitVectors[pattern_id]), index=self.index, name=pattern_id)
+
+    def drop(self, pattern_ids):
+        for pattern_id in pattern_ids:
+            del self.bitVectors[pattern_id]
+
+    def logical_and(self, pattern_ids) -> np.ndarray:
+        '''
+        :return: The bit vector of the events that satisfy all of the patterns
+        '''
+        if len(pattern_ids) == 0:
+            return self.__get_all_bits()
+        return np.bitwise_and.reduce([self.bitVectors[pattern_id] for pattern_id in pattern_ids])
+
+    def logical_or(self, pattern_ids) -> np.ndarray:
+        '''
+        :return: The bit vector of the events that satisfy any of the patterns
+        '''
+        if len(pattern_ids) == 0:
+            return np.zeros_like(self.__get_all_bits())
+        return np.bitwise_or.reduce([self.bitVectors[pattern_id] for pattern_id in pattern_ids])
+
+    def logical_not(self, pattern_id) -> np.ndarray:
+        '''
+        :return: The bit vector of the events that do not satisfy the pattern
+        '''
+        # the padding bits of the last byte stay unset
+        return np.bitwise_and(np.invert(self.bitVectors[pattern_id]), self.__get_all_bits())
+
+    def count(self, pattern_ids) -> int:
+        '''
+        :return: The number of events that satisfy all of the patterns
+        '''
+        return count_bits(self.logical_and(pattern_ids))
+
+    def get_support(self, pattern_id) -> float:
+        return count_bits(self.bitVectors[pattern_id]) / len(self.index)
+
+    def to_frame(self, pattern_ids=None) -> DataFrame:
+        '''
+        :param pattern_ids: The patterns to include, all if None
+        :return: A boolean DataFrame indexed by the event index with one column per pattern
+        '''
+        if pattern_ids is None:
+            pattern_ids = self.columns
+        return pd.DataFrame({
+            pattern_id: self.__unpack(self.bitVectors[pattern_id]) for pattern_id in pattern_ids
+        }, index=self.index, columns=list(pattern_ids))
+
+    def __unpack(self, bits):
+        return np.unpackbits(bits, count=len(self.index)).astype(bool)
+
+    def __get_all_bits(self):
+        return np.packbits(np.ones(len(self.index), dtype=bool))
+
+
+def count_bits(bits: np.ndarray) -> int:
+    return int(_POPCOUNTS[bits].sum(dtype=np.int64))
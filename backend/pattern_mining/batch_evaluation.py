@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from pattern_mining.PATTERN_FORMULAS import FreePatternFormula, ExistentialPattern, UniversalPattern
+from pattern_mining.PATTERN_FUNCTIONS import Eaval_eq, Oaval_eq
+from pattern_mining.pattern_formula import PatternFormula
+from pattern_mining.table_manager import TableManager
+
+
+def get_batch_key(formula: PatternFormula):
+    '''
+    Patterns that compare the same categorical attribute with different labels are evaluated together, see
+    evaluate_batch: eaval_eq patterns per event attribute, and quantified oaval_eq patterns (ex or all, as in the
+    default search plans) per object type and object attribute.
+
+    :return: The key of the batch of the formula, None if it is not evaluated in batches
+    '''
+    if isinstance(formula, FreePatternFormula) and isinstance(formula.freePattern.patternFunction, Eaval_eq):
+        return Eaval_eq.__name__, formula.freePattern.patternFunction.eventAttribute
+    if isinstance(formula, (ExistentialPattern, UniversalPattern)) \
+            and isinstance(formula.patternFormula, FreePatternFormula) \
+            and isinstance(formula.patternFormula.freePattern.patternFunction, Oaval_eq):
+        arguments = formula.patternFormula.freePattern.arguments
+        if len(arguments) == 1 and arguments[0].id == formula.quantifiedVariable.id:
+            return Oaval_eq.__name__, formula.quantifiedVariable.objectType, \
+                formula.patternFormula.freePattern.patternFunction.objectAttribute
+    return None
+
+
+def evaluate_batch(table_manager: TableManager, formulas) -> dict:
+    '''
+    Evaluates formulas of the same batch (see get_batch_key) in one pass over the attribute: the values are factorized
+    once, and the distinct (label, event) pairs with their numbers of rows are counted once. The evaluation of each
+    label is then read from the pairs of that label. The evaluations are the same as with PatternFormula.evaluate.
+
+    :param table_manager: The tables of the event type
+    :param formulas: The formulas of the batch
+    :return: Per formula id, the evaluation per event of the event index
+    '''
+    batch_key = get_batch_key(formulas[0])
+    event_ids = table_manager.get_event_index().index
+    if batch_key[0] == Eaval_eq.__name__:
+        attribute = batch_key[1]
+        rows = table_manager.get_event_table(["ocel:eid", attribute])
+    else:
+        object_type, attribute = batch_key[1:]
+        rows = table_manager.get_event_interaction_table(["ocel:eid", "ocel:type", attribute])
+        rows = rows[rows["ocel:type"].to_numpy() == table_manager.get_object_type_code(object_type)]
+    event_positions = event_ids.get_indexer(rows["ocel:eid"].to_numpy())
+    rows = rows[event_positions >= 0]
+    event_positions = event_positions[event_positions >= 0]
+    codes, labels = _factorize(rows[attribute])
+    number_of_events = len(event_ids)
+    # the distinct (label, event) pairs, sorted by label
+    has_label = codes >= 0
+    pair_keys, pair_counts = np.unique(codes[has_label].astype(np.int64) * number_of_events +
+                                       event_positions[has_label], return_counts=True)
+    pair_events = pair_keys % number_of_events
+    label_starts = np.searchsorted(pair_keys // number_of_events, np.arange(len(labels) + 1))
+    rows_per_event = np.bincount(event_positions, minlength=number_of_events)
+    evaluations = {}
+    for formula in formulas:
+        value = _get_function(formula).value
+        matching_labels = np.flatnonzero(np.asarray(labels == value, dtype=bool)) if len(labels) > 0 else []
+        label_pairs = np.concatenate([np.arange(label_starts[label], label_starts[label + 1])
+                                      for label in matching_labels] + [np.array([], dtype=np.int64)])
+        if isinstance(formula, UniversalPattern):
+            # all rows of the object type (at least one) have the label
+            matching_rows = np.bincount(pair_events[label_pairs], weights=pair_counts[label_pairs],
+                                        minlength=number_of_events)
+            evaluation = (rows_per_event > 0) & (matching_rows == rows_per_event)
+        else:
+            evaluation = np.zeros(number_of_events, dtype=bool)
+            evaluation[pair_events[label_pairs]] = True
+        evaluations[formula.to_string()] = evaluation
+    return evaluations
+
+
+def _get_function(formula: PatternFormula):
+    if isinstance(formula, FreePatternFormula):
+        return formula.freePattern.patternFunction
+    return formula.patternFormula.freePattern.patternFunction
+
+
+def _factorize(values: pd.Series):
+    '''
+    :return: The code of the label of each value (-1 for missing values) and the labels
+    '''
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, labels = pd.factorize(values)
+    return codes, pd.Index(labels)
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MEMORY_BUDGET = 128 * 2 ** 20
+
+
+class EvaluationCache:
+
+    def __init__(self, path, memory_budget=DEFAULT_MEMORY_BUDGET):
+        '''
+        An EvaluationCache keeps the evaluations of patterns across the searches of a session, as packed bit vectors
+        over the event index (see BaseTable). An evaluation is identified by the event type, the id of the pattern
+        (PatternFormula.to_string) and the version of the tables of the event type (TableManager.version), so that
+        evaluations of tables that have been appended to are not used anymore.
+        The least recently used evaluations are moved to disk when the evaluations in memory exceed the memory budget,
+        and evaluations on disk are loaded again when they are requested.
+
+        :param path: The directory of the evaluations on disk
+        :param memory_budget: The maximal number of bytes of the evaluations in memory
+        '''
+        self.path = path
+        self.memoryBudget = memory_budget
+        self.generation = 0
+        self.entries = OrderedDict()
+        self.memoryUsage = 0
+        self.files = {}
+
+    def get(self, event_type, pattern_id, version):
+        '''
+        :return: The bit vector of the evaluation, None if it is not cached
+        '''
+        key = (event_type, pattern_id, version)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if key in self.files:
+            bits = np.load(os.path.join(self.path, self.files[key]))
+            self.__add_entry(key, bits)
+            return bits
+        return None
+
+    def put(self, event_type, pattern_id, version, bits: np.ndarray):
+        key = (event_type, pattern_id, version)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return
+        self.__add_entry(key, bits)
+
+    def discard_stale(self, event_type, version):
+        '''
+        Removes the evaluations of an event type that have been made on other versions of its tables.
+        '''
+        stale_keys = [key for key in list(self.entries) + list(self.files)
+                      if key[0] == event_type and key[2] != version]
+        for key in stale_keys:
+            self.__remove(key)
+
+    def clear(self):
+        '''
+        Removes all evaluations, for example when the tables are built again.
+        '''
+        self.entries = OrderedDict()
+        self.memoryUsage = 0
+        self.files = {}
+        # files of earlier generations are not reused, even if a concurrent request has not removed them yet
+        self.generation += 1
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def save(self):
+        '''
+        Writes the evaluations in memory that are not on disk yet. Only the evaluations on disk are kept when the cache
+        is pickled.
+        '''
+        for key, bits in self.entries.items():
+            if key not in self.files:
+                self.__write(key, bits)
+
+    def __add_entry(self, key, bits):
+        self.entries[key] = bits
+        self.memoryUsage += bits.nbytes
+        while self.memoryUsage > self.memoryBudget and len(self.entries) > 1:
+            spilled_key, spilled_bits = self.entries.popitem(last=False)
+            if spilled_key not in self.files:
+                self.__write(spilled_key, spilled_bits)
+            self.memoryUsage -= spilled_bits.nbytes
+
+    def __write(self, key, bits):
+        os.makedirs(self.path, exist_ok=True)
+        file_name = hashlib.sha1(repr((self.generation,) + key).encode("utf-8")).hexdigest() + ".npy"
+        tmp_path = os.path.join(self.path, file_name + ".tmp")
+        with open(tmp_path, "wb") as wf:
+            np.save(wf, bits)
+        os.replace(tmp_path, os.path.join(self.path, file_name))
+        self.files[key] = file_name
+
+    def __remove(self, key):
+        if key in self.entries:
+            self.memoryUsage -= self.entries.pop(key).nbytes
+        if key in self.files:
+            file_path = os.path.join(self.path, self.files.pop(key))
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["entries"] = OrderedDict()
+        state["memoryUsage"] = 0
+        return state
@@ -0,0 +1,109 @@
+from pandas import DataFrame
+
+from pattern_mining.batch_evaluation import get_batch_key, evaluate_batch
+from pattern_mining.pattern_formula import PatternFormula
+from pattern_mining.table_manager import TableManager
+
+
+class EvaluationPlan:
+
+    def __init__(self, table_manager: TableManager):
+        '''
+        An EvaluationPlan evaluates pattern formulas of an event type as one DAG of their subformulas, identified by
+        PatternFormula.to_string: a subformula that occurs in several formulas (or several times in one formula) is
+        applied once. Its evaluation table is kept until all added formulas that contain it are evaluated, see
+        EvaluationPlan.add, or as long as it is retained, see EvaluationPlan.retain.
+        Added patterns that compare a categorical attribute with labels are evaluated together per attribute instead,
+        see evaluate_batch.
+
+        :param table_manager: The tables of the event type
+        '''
+        self.tableManager = table_manager
+        # per subformula, the number of pending evaluations that read its evaluation table
+        self.references = {}
+        self.evaluationTables = {}
+        self.retainedIds = set()
+        # per batch key, the added formulas of the batch that have not been evaluated yet
+        self.batches = {}
+        self.batchEvaluations = {}
+        self.applications = 0
+
+    def add(self, formulas):
+        '''
+        Announces formulas that are going to be evaluated, so that the evaluation tables of their common subformulas
+        are kept until all of them are evaluated.
+        '''
+        for formula in formulas:
+            batch_key = get_batch_key(formula)
+            if batch_key is None:
+                self.__add_reference(formula)
+            else:
+                self.batches.setdefault(batch_key, {})[formula.to_string()] = formula
+
+    def retain(self, formulas):
+        '''
+        Keeps the evaluation tables of the formulas (once they are applied) until they are released, for formulas that
+        are not known yet when the plan is made, for example merged patterns.
+        '''
+        self.retainedIds.update(formula.to_string() for formula in formulas)
+
+    def release(self, formulas):
+        for formula in formulas:
+            formula_id = formula.to_string()
+            self.retainedIds.discard(formula_id)
+            if self.references.get(formula_id, 0) == 0:
+                self.evaluationTables.pop(formula_id, None)
+
+    def evaluate(self, formula: PatternFormula) -> DataFrame:
+        '''
+        :return: The event index with the column ox:evaluation, see PatternFormula.evaluate
+        '''
+        formula_id = formula.to_string()
+        batch_key = get_batch_key(formula)
+        if batch_key is not None:
+            return self.__evaluate_batched(formula, batch_key)
+        if self.references.get(formula_id, 0) == 0:
+            self.__add_reference(formula)
+        evaluation_table = self.__get_evaluation_table(formula)
+        evaluation = formula.evaluate(self.tableManager, evaluation_table)
+        self.__release_reference(formula_id)
+        return evaluation
+
+    def __evaluate_batched(self, formula: PatternFormula, batch_key) -> DataFrame:
+        formula_id = formula.to_string()
+        if formula_id not in self.batchEvaluations:
+            batch = self.batches.pop(batch_key, {})
+            batch[formula_id] = formula
+            self.batchEvaluations.update(evaluate_batch(self.tableManager, list(batch.values())))
+            self.applications += 1
+        event_index = self.tableManager.get_event_index()
+        event_index["ox:evaluation"] = self.batchEvaluations.pop(formula_id)
+        return event_index
+
+    def __add_reference(self, formula: PatternFormula):
+        formula_id = formula.to_string()
+        self.references[formula_id] = self.references.get(formula_id, 0) + 1
+        # the subformulas are read once, when the formula is applied
+        if self.references[formula_id] == 1 and formula_id not in self.evaluationTables:
+            for subformula in formula.get_subformulas():
+                self.__add_reference(subformula)
+
+    def __release_reference(self, formula_id):
+        self.references[formula_id] -= 1
+        if self.references[formula_id] == 0:
+            del self.references[formula_id]
+            if formula_id not in self.retainedIds:
+                self.evaluationTables.pop(formula_id, None)
+
+    def __get_evaluation_table(self, formula: PatternFormula) -> DataFrame:
+        formula_id = formula.to_string()
+        if formula_id in self.evaluationTables:
+            return self.evaluationTables[formula_id]
+        subformulas = formula.get_subformulas()
+        subformula_evaluation_tables = [self.__get_evaluation_table(subformula) for subformula in subformulas]
+        evaluation_table = formula.apply_to(self.tableManager, subformula_evaluation_tables)
+        self.applications += 1
+        self.evaluationTables[formula_id] = evaluation_table
+        for subformula in subformulas:
+            self.__release_reference(subformula.to_string())
+        return evaluation_table
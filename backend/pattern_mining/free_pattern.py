@@ -43,6 +43,9 @@ class FreePattern:
     def get_object_types(self):
         return set(map(lambda arg: arg.objectType, self.arguments))
 
+    def get_required_tables(self):
+        return set(self.patternFunction.required_tables)
+
     def get_typed_arguments(self, object_type):
         args = filter(lambda arg: arg.objectType == object_type, self.arguments)
         return set(map(lambda arg: arg.id, args))
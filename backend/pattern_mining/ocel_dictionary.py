@@ -0,0 +1,106 @@
+import copy
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+from pm4py import OCEL
+
+
+class OcelDictionary:
+    EVENT_ID = "ocel:eid"
+    OBJECT_ID = "ocel:oid"
+    ACTIVITY = "ocel:activity"
+    OBJECT_TYPE = "ocel:type"
+    QUALIFIER = "ocel:qualifier"
+
+    # kind of label stored in the identifier columns of the OCEL frames
+    COLUMN_KINDS = {
+        "ocel:eid": EVENT_ID,
+        "ocel:oid": OBJECT_ID,
+        "ocel:oid_2": OBJECT_ID,
+        "ocel:activity": ACTIVITY,
+        "ocel:type": OBJECT_TYPE,
+        "ocel:qualifier": QUALIFIER
+    }
+
+    @classmethod
+    def from_ocel(cls, ocel: OCEL):
+        labels = {kind: [] for kind in set(cls.COLUMN_KINDS.values())}
+        for frame in [ocel.events, ocel.objects, ocel.relations, ocel.o2o, ocel.object_changes]:
+            for column, kind in cls.COLUMN_KINDS.items():
+                if column in frame.columns:
+                    labels[kind].append(frame[column].dropna().unique())
+        return cls({
+            kind: np.concatenate(kind_labels) if len(kind_labels) > 0 else np.array([], dtype=object)
+            for kind, kind_labels in labels.items()
+        })
+
+    def __init__(self, labels):
+        '''
+        A shared dictionary that assigns dense integer codes to the identifiers of an OCEL: event ids, object ids,
+        activities, object types and (E2O as well as O2O) qualifiers. Codes are assigned in the sorted order of the
+        labels, so comparing or sorting codes gives the same result as doing so on the labels.
+        Missing or unknown labels are encoded as -1. Labels added later (see OcelDictionary.extend) are appended, so
+        the order of codes only follows the order of labels within the labels of one extension.
+
+        :param labels: Per kind, the labels to be encoded
+        '''
+        self.labels = {
+            kind: pd.Index(kind_labels, dtype=object).unique().sort_values()
+            for kind, kind_labels in labels.items()
+        }
+
+    def extend(self, ocel: OCEL):
+        '''
+        Adds the labels of a log that are not in the dictionary yet. The codes of the known labels do not change, so
+        tables that have been encoded before remain valid.
+
+        :param ocel: The log, for example new events to be appended to the log of the dictionary
+        :return: Per kind, the number of added labels
+        '''
+        added = OcelDictionary.from_ocel(ocel)
+        added_counts = {}
+        for kind, kind_labels in added.labels.items():
+            new_labels = kind_labels[~kind_labels.isin(self.labels[kind])]
+            self.labels[kind] = self.labels[kind].append(new_labels)
+            added_counts[kind] = len(new_labels)
+        return added_counts
+
+    def encode(self, kind, label) -> int:
+        try:
+            return int(self.labels[kind].get_loc(label))
+        except KeyError:
+            return -1
+
+    def encode_values(self, kind, values) -> np.ndarray:
+        return self.labels[kind].get_indexer(values).astype(np.int32)
+
+    def decode(self, kind, codes) -> np.ndarray:
+        return take(self.labels[kind].to_numpy(), np.asarray(codes, dtype=np.intp), allow_fill=True)
+
+    def get_codes(self, kind):
+        '''
+        :return: A dict mapping each label of the kind to its code. Intended for the small kinds (activities, object
+        types and qualifiers).
+        '''
+        return {label: code for code, label in enumerate(self.labels[kind])}
+
+    def encode_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        '''
+        A shallow copy of the frame in which the identifier columns are replaced by int32 codes. Attribute columns
+        are shared with the original frame.
+        '''
+        encoded = frame.copy(deep=False)
+        for column, kind in self.COLUMN_KINDS.items():
+            if column in encoded.columns:
+                encoded[column] = self.encode_values(kind, encoded[column])
+        return encoded
+
+    def encode_ocel(self, ocel: OCEL) -> OCEL:
+        encoded = copy.copy(ocel)
+        encoded.events = self.encode_frame(ocel.events)
+        encoded.objects = self.encode_frame(ocel.objects)
+        encoded.relations = self.encode_frame(ocel.relations)
+        encoded.o2o = self.encode_frame(ocel.o2o)
+        encoded.object_changes = self.encode_frame(ocel.object_changes)
+        return encoded
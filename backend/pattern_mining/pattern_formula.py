@@ -9,18 +9,41 @@ class PatternFormula:
     def __init__(self):
         pass
 
-    def evaluate(self, table_manager):
+    def evaluate(self, table_manager, evaluation_table=None):
+        '''
+        :param table_manager: The tables of the event type
+        :param evaluation_table: The evaluation table of the formula (see PatternFormula.apply) if it has been made
+        already, for example by an EvaluationPlan
+        :return: The event index with the column ox:evaluation
+        '''
         event_index = table_manager.get_event_index()
-        event_index["ox:evaluation"] = False
-        # apply might not return an outcome for every index (if the object domain is empty)
-        evaluation = self.apply(table_manager)
-        evaluation = evaluation.set_index('ocel:eid')['ox:evaluation']
-        if len(evaluation) > 1:
-            evaluation = evaluation.squeeze()
-        event_index.update(evaluation)
+        if evaluation_table is None:
+            evaluation_table = self.apply(table_manager)
+        # apply might not return an outcome for every index (if the object domain is empty), those events do not
+        # satisfy the pattern
+        evaluation = evaluation_table.set_index('ocel:eid')['ox:evaluation']
+        evaluation = evaluation.reindex(event_index.index)
+        event_index["ox:evaluation"] = evaluation.fillna(False).to_numpy(dtype=bool)
         return event_index
 
     def apply(self, table_manager: TableManager) -> DataFrame:
+        subformula_evaluation_tables = [subformula.apply(table_manager) for subformula in self.get_subformulas()]
+        return self.apply_to(table_manager, subformula_evaluation_tables)
+
+    def get_subformulas(self):
+        '''
+        :return: The direct subformulas, whose evaluation tables PatternFormula.apply_to combines
+        '''
+        return []
+
+    def apply_to(self, table_manager: TableManager, subformula_evaluation_tables) -> DataFrame:
+        '''
+        Combines the evaluation tables of the direct subformulas to the evaluation table of the formula. The tables of
+        the subformulas may be shared with other formulas, so they are not modified.
+
+        :param table_manager: The tables of the event type
+        :param subformula_evaluation_tables: The evaluation tables, in the order of PatternFormula.get_subformulas
+        '''
         raise NotImplementedError()
 
     def get_object_type(self):
@@ -32,6 +55,9 @@ class PatternFormula:
     def get_free_variables(self):
         raise NotImplementedError()
 
+    def get_required_tables(self):
+        raise NotImplementedError()
+
     def get_typed_arguments(self, object_type):
         raise NotImplementedError()
 
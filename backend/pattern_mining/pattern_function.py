@@ -3,6 +3,8 @@ from pattern_mining.table_manager import TableManager
 
 
 class PatternFunction:
+    # the kinds of tables of the TableManager that create_function_evaluation_table reads
+    required_tables = []
 
     def __init__(self, object_arity):
         self.arity = object_arity
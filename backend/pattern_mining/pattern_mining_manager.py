@@ -18,24 +18,48 @@ import zipfile
 
 import pandas as pd
 
+from event_log_management.columnar_ocel import ColumnarOcel
+from event_log_management.ocel_cache import OCEL_FRAMES
+from pattern_mining.base_table import BaseTable, count_bits
+from pattern_mining.evaluation_cache import EvaluationCache, DEFAULT_MEMORY_BUDGET
 from pattern_mining.evaluation_mode import EvaluationMode
+from pattern_mining.evaluation_plan import EvaluationPlan
 from pattern_mining.model import Model
+from pattern_mining.ocel_dictionary import OcelDictionary
+from pattern_mining.schema_profile import SchemaProfile
 from utils.misc_utils import is_categorical_data_type, list_equals
 
 pd.options.mode.chained_assignment = None
 warnings.simplefilter("ignore", FutureWarning)
 
+from pattern_mining.PATTERN_FUNCTIONS import Eaval_eq, Oaval_eq, Ot_card
 from pattern_mining.PATTERN_FORMULAS import get_ot_card_formula, get_e2o_exists_formula, get_o2o_exists_exists_formula, \
     get_o2o_exists_forall_formula, get_o2o_complete_formula, get_oaval_eq_exists_pattern, get_oaval_eq_forall_pattern, ExistentialPattern, \
     get_existential_patterns_merge, get_e2o_forall_formula, get_o2o_forall_exists_formula, get_eaval_eq_pattern, \
     UniversalPattern, get_universal_patterns_merge, get_anti_pattern
 from pattern_mining.domains import ObjectVariableArgument
 from pattern_mining.pattern_formula import PatternFormula
+from pattern_mining.table_loading import build_table_managers
 from pattern_mining.table_manager import TableManager
+from pattern_mining.tables.object_evolution_store import ObjectEvolutionStore
 from utils.session_utils import get_session_path
 
 evaluation_mode = True
 
+# attributes whose size depends on the log or on the search results, pickled to separate files so that loading the
+# manager in a route does not read them unless the route uses them
+DEFERRED_ATTRIBUTES = ["dictionary", "schema_profile", "base_tables", "anti_patterns", "models", "pattern_supports",
+                       "maximal_pattern_supports", "evaluation_records"]
+
+# the kinds of tables that the patterns of the default search plans read
+DEFAULT_SEARCH_PLAN_TABLES = sorted(
+    {TableManager.EVENT_INDEX}.union(*[f.required_tables for f in [Eaval_eq, Oaval_eq, Ot_card]]))
+
+
+def _get_unknown_rows(frame: DataFrame, known_frame: DataFrame, key_columns) -> DataFrame:
+    unknown = frame.merge(known_frame[key_columns].drop_duplicates(), on=key_columns, how="left", indicator=True)
+    return frame[(unknown["_merge"] == "left_only").to_numpy()]
+
 
 class PatternMiningManager:
 
@@ -54,7 +78,9 @@ class PatternMiningManager:
                  max_bootstrap_pattern_merge_recursion=100000,
                  pattern_merge_subsumption_ratio=0.995,
                  min_atomic_pattern_frequency=0.0,
-                 min_support=0.005
+                 min_support=0.005,
+                 table_workers=None,
+                 evaluation_cache_memory=DEFAULT_MEMORY_BUDGET
                  ):
         """
          This class will conduct the pattern mining.
@@ -88,15 +114,25 @@ class PatternMiningManager:
                 When splitting a partitioner based on object attributes, this is the threshold for information gain through a single split step.
            min_support (float)
                 The minimal support of a pattern to be returned by the pattern mining procedure.
+           table_workers (int)
+                The number of processes that build the auxiliary tables of the event types in parallel. If None, the
+                number of CPUs is used.
+           evaluation_cache_memory (int)
+                The number of bytes of pattern evaluations that are kept in memory between the searches of the session,
+                see EvaluationCache. Less recently used evaluations are kept on disk.
          """
         # self.session_key = session_key
         self.evaluationMode = None
         self.event_types_filter = None
         self.evaluation_records = None
         self.table_managers = None
+        self.table_loading_errors = {}
+        self.encoded_ocel = None
+        self.object_evolution_store = None
         self.sessionKey = session.get('session_key', None)
         self.ocel = ocel
-        self.__preprocess_ocel()
+        self.__preprocess_ocel(self.ocel)
+        self.dictionary = OcelDictionary.from_ocel(self.ocel)
         self.complementaryMode = complementary_mode
         self.mergeMode = merge_mode
         self.minAtomicPatternFrequency = min_atomic_pattern_frequency
@@ -111,6 +147,9 @@ class PatternMiningManager:
         self.maxBootstrapPatternMergeRecursion = max_bootstrap_pattern_merge_recursion
         self.patternMergeSubsumptionRatio = pattern_merge_subsumption_ratio
         self.minSupport = min_support
+        self.tableWorkers = table_workers
+        self.evaluation_cache = EvaluationCache(
+            os.path.join(get_session_path(), PatternMiningManager.get_name() + "_evaluations"), evaluation_cache_memory)
 
     @classmethod
     def get_name(cls):
@@ -120,26 +159,57 @@ class PatternMiningManager:
 
     @classmethod
     def load(cls):
+        '''
+        Loads the manager of the session. The log, the tables and the deferred attributes (see
+        DEFERRED_ATTRIBUTES) are only read from disk when they are first accessed.
+        '''
         name = PatternMiningManager.get_name()
         session_path = get_session_path()
         path = os.path.join(session_path, name + ".pkl")
         with open(path, "rb") as rf:
             loaded_object = pickle.load(rf)
+            loaded_object.deferredAttributesPath = session_path
             try:
                 loaded_object.table_managers = {}
+                loaded_object.encoded_ocel = None
+                loaded_object.object_evolution_store = ObjectEvolutionStore.load()
                 for event_type in loaded_object.event_types_filter:
-                    table_manager = TableManager.load(event_type)
+                    # the tables of an event type may be missing if building them failed
+                    if event_type in loaded_object.table_loading_errors:
+                        continue
+                    table_manager = TableManager.load(event_type, loaded_object.object_evolution_store,
+                                                      loaded_object.get_encoded_ocel)
                     loaded_object.table_managers[event_type] = table_manager
             except FileNotFoundError:
                 pass
             return loaded_object
 
-    def __preprocess_ocel(self):
-        self.ocel.events.replace('', np.nan, inplace=True)
-        self.ocel.object_changes.replace('', np.nan, inplace=True)
-        self.ocel.objects.replace('', np.nan, inplace=True)
-        events = self.ocel.events
-        object_changes = self.ocel.object_changes
+    def __getattr__(self, attribute):
+        # only called for attributes that are not set: deferred attributes of a loaded manager are unpickled on demand
+        deferred_attributes_path = self.__dict__.get("deferredAttributesPath", None)
+        if attribute not in DEFERRED_ATTRIBUTES or deferred_attributes_path is None:
+            raise AttributeError(attribute)
+        path = self.__get_deferred_attribute_path(deferred_attributes_path, attribute)
+        if not os.path.exists(path):
+            raise AttributeError(attribute)
+        with open(path, "rb") as rf:
+            value = pickle.load(rf)
+        setattr(self, attribute, value)
+        return value
+
+    def __get_deferred_attribute_path(self, session_path, attribute):
+        return os.path.join(session_path, PatternMiningManager.get_name() + "_" + attribute + ".pkl")
+
+    @property
+    def objects(self) -> DataFrame:
+        return self.ocel.objects
+
+    def __preprocess_ocel(self, ocel: OCEL):
+        ocel.events.replace('', np.nan, inplace=True)
+        ocel.object_changes.replace('', np.nan, inplace=True)
+        ocel.objects.replace('', np.nan, inplace=True)
+        events = ocel.events
+        object_changes = ocel.object_changes
         # TODO: handle timezones properly and safely
         try:
             events["ocel:timestamp"] = pd.to_datetime(events["ocel:timestamp"].dt.tz_localize(None))
@@ -174,18 +244,59 @@ class PatternMiningManager:
             table_manager: TableManager
             for table_manager in self.table_managers.values():
                 table_manager.save()
-        path = get_session_path()
-        path = os.path.join(path, name + ".pkl")
+        if self.object_evolution_store is not None:
+            self.object_evolution_store.save()
+        self.evaluation_cache.save()
+        session_path = get_session_path()
+        path = os.path.join(session_path, name + ".pkl")
         self_copy = copy.copy(self)
         self_copy.table_managers = None
-        with open(path, "wb") as wf:
-            pickle.dump(self_copy, wf)
-
-    def initialize(self):
-        self.__preprocess_event_log()
+        self_copy.encoded_ocel = None
+        self_copy.object_evolution_store = None
+        # the log is stored once per session, a loaded manager already refers to the stored frames (of which only
+        # appended frames are written again)
+        if not isinstance(self.ocel, ColumnarOcel) or len(self.ocel.modifiedFrames) > 0:
+            self_copy.ocel = ColumnarOcel.save(self.ocel, os.path.join(session_path, name + "_ocel"))
+            if isinstance(self.ocel, ColumnarOcel):
+                self.ocel.modifiedFrames = set()
+        # deferred attributes that have not been accessed are still stored
+        for attribute in DEFERRED_ATTRIBUTES:
+            if attribute in self_copy.__dict__:
+                self.__dump(self_copy.__dict__.pop(attribute),
+                            self.__get_deferred_attribute_path(session_path, attribute))
+        self_copy.deferredAttributesPath = None
+        self.__dump(self_copy, path)
+
+    def __dump(self, value, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as wf:
+            pickle.dump(value, wf)
+        os.replace(tmp_path, path)
+
+    def initialize(self, report_stage=None):
+        '''
+        Computes the statistics of the log that are shown at the upload and creates the default search plans.
+
+        :param report_stage: Optional callable that is informed (with the name of the stage) when the computation of
+        the relation statistics starts
+        '''
+        self.__preprocess_event_log(report_stage)
         self.__create_variable_prefixes()
         self.__initialize_search_plans()
 
+    def get_session_metadata(self):
+        return {
+            'session_key': self.sessionKey,
+            'object_types': self.object_types,
+            'event_types': self.event_types,
+            'event_type_attributes': self.event_type_attributes,
+            'object_type_attributes': self.object_type_attributes,
+            "event_type_object_types": self.event_types_object_types,
+            'event_type_object_relations': self.event_type_object_relations,
+            'event_type_object_to_object_relations': self.event_type_object_to_object_relations,
+            'variable_prefixes': self.variable_prefixes
+        }
+
     def get_search_plans(self):
         search_plans = {
             event_type: list(id_to_pattern.keys())
@@ -196,15 +307,17 @@ class PatternMiningManager:
                 search_plans[event_type] += list(id_to_pattern.keys())
         return search_plans
 
-    def __preprocess_event_log(self):
+    def __preprocess_event_log(self, report_stage=None):
         self.event_types = sorted(list(set(self.ocel.events["ocel:activity"].values)))
         self.event_types_filter = self.event_types
         self.object_types = sorted(list(set(self.ocel.objects["ocel:type"].values)))
-        self.objects = self.ocel.objects
         self.__preprocess_attributes()
+        if report_stage is not None:
+            report_stage("relation stats")
         self.__preprocess_relations()
 
     def __preprocess_attributes(self):
+        self.schema_profile = SchemaProfile(self.ocel)
         self.__load_event_type_attribute_info()
         self.__load_object_type_attribute_info()
         self.__determine_attribute_data_types()
@@ -223,86 +336,40 @@ class PatternMiningManager:
     def __load_event_type_object_type_info(self):
         e2o = self.ocel.relations
         self.event_types_object_types = e2o.groupby('ocel:activity')['ocel:type'].agg(lambda x: list(set(x))).to_dict()
-        self.event_type_object_types_variability = e2o.groupby('ocel:activity') \
-            .apply(lambda event_type_group: event_type_group.groupby('ocel:type')
-                   .apply(lambda group: group.groupby("ocel:eid")['ocel:oid'].nunique().gt(1).any())
-                   .to_dict()) \
-            .to_dict()
+        # an object type is variable at an event type if some event of that type has more than one object of it
+        event_object_counts = e2o.groupby(['ocel:activity', 'ocel:eid', 'ocel:type'])['ocel:oid'].nunique()
+        variability = event_object_counts.gt(1).groupby(level=['ocel:activity', 'ocel:type']).any()
+        self.event_type_object_types_variability = {}
+        for (event_type, object_type), is_variable in variability.items():
+            self.event_type_object_types_variability.setdefault(event_type, {})[object_type] = is_variable
 
     def __load_event_type_attribute_info(self):
-        events = self.ocel.events
-        event_columns = events.columns
-        event_attributes = [c for c in event_columns if not c.startswith('ocel:')]
-        event_type_groups = events.groupby('ocel:activity')
-        self.event_type_attributes = {}
-        for event_type, group in event_type_groups:
-            self.event_type_attributes[event_type] = []
-            for attribute in event_attributes:
-                if group[attribute].notna().any():
-                    self.event_type_attributes[event_type].append(attribute)
+        self.event_type_attributes = {
+            event_type: list(attributes)
+            for event_type, attributes in self.schema_profile.eventTypeAttributes.items()
+        }
 
     def __load_object_type_attribute_info(self):
-        objects = self.ocel.objects
-        object_changes = self.ocel.object_changes
-        object_columns = objects.columns
-        object_changes_columns = object_changes.columns
-        object_attributes = [c for c in object_columns if not c.startswith('ocel:')]
-        object_change_attributes = [c for c in object_changes_columns if not c.startswith('ocel:')]
-        object_type_groups = objects.groupby('ocel:type')
-        object_type_change_groups = object_changes.groupby('ocel:type')
-        self.object_type_attributes = {}
-        for object_type, group in object_type_groups:
-            # TODO
-            if object_type == "@@cumcount":
-                continue
-            self.object_type_attributes[object_type] = []
-            for attribute in object_attributes:
-                if group[attribute].notna().any():
-                    self.object_type_attributes[object_type].append(attribute)
-        for object_type, group in object_type_change_groups:
-            # TODO
-            if object_type == "@@cumcount":
-                continue
-            for attribute in object_change_attributes:
-                if group[attribute].notna().any():
-                    self.object_type_attributes[object_type] = list(set(
-                        self.object_type_attributes[object_type] + [attribute]
-                    ))
+        self.object_type_attributes = {
+            object_type: list(attributes)
+            for object_type, attributes in self.schema_profile.objectTypeAttributes.items()
+        }
 
     def __determine_attribute_data_types(self):
         self.event_attribute_data_types = {}
         self.object_attribute_data_types = {}
         for event_type, event_attributes in self.event_type_attributes.items():
-            self.event_attribute_data_types[event_type] = {}
-            for event_attribute in event_attributes:
-                data_type = self.__determine_event_attribute_data_type(event_attribute)
-                self.event_attribute_data_types[event_type][event_attribute] = data_type
+            self.event_attribute_data_types[event_type] = {
+                event_attribute: self.schema_profile.eventAttributeDataTypes[event_attribute]
+                for event_attribute in event_attributes
+            }
         for object_type, object_attributes in self.object_type_attributes.items():
-            self.object_attribute_data_types[object_type] = {}
-            for object_attribute in object_attributes:
+            self.object_attribute_data_types[object_type] = {
+                object_attribute: self.schema_profile.objectAttributeDataTypes[object_attribute]
+                for object_attribute in object_attributes
                 # TODO
-                if object_attribute == "@@cumcount":
-                    continue
-                data_type = self.__determine_object_attribute_data_type(object_attribute)
-                self.object_attribute_data_types[object_type][object_attribute] = data_type
-
-    def __determine_event_attribute_data_type(self, attribute):
-        return self.ocel.events.dtypes.to_dict()[attribute]
-
-    def __determine_object_attribute_data_type(self, attribute):
-        objects = self.ocel.objects
-        object_changes = self.ocel.object_changes
-        dtype1 = objects.dtypes.to_dict()[attribute]
-        if attribute not in object_changes.dtypes:
-            return dtype1
-        dtype2 = object_changes.dtypes.to_dict()[attribute]
-        if objects[attribute].isna().all():
-            return dtype2
-        if object_changes[attribute].isna().all():
-            return dtype1
-        if not dtype1 == dtype2:
-            raise AttributeError()
-        return dtype1
+                if object_attribute != "@@cumcount"
+            }
 
     def __load_event_type_object_relations_info(self):
         self.event_type_object_relations = {}
@@ -319,16 +386,25 @@ class PatternMiningManager:
     def __load_event_type_object_to_object_relations_info(self):
         self.event_type_object_to_object_relations = {}
         self.event_type_object_to_object_multi_relations = {}
-        e2o = self.ocel.relations.copy().drop_duplicates()
-        o2o = self.ocel.o2o.copy().drop_duplicates()
-        o2o.rename(columns={"ocel:qualifier": "o2o_qualifier"}, inplace=True)
+        e2o = self.ocel.relations[["ocel:eid", "ocel:activity", "ocel:oid", "ocel:type"]].drop_duplicates()
+        o2o = self.ocel.o2o[["ocel:oid", "ocel:oid_2", "ocel:qualifier"]].drop_duplicates()
+        o2o = o2o.rename(columns={"ocel:qualifier": "o2o_qualifier"})
+        # one join for all event types: pairs of objects of the same event that are related by an O2O relation
+        e2o2o = pd.merge(e2o, o2o, on='ocel:oid')
+        e2o2o2e = pd.merge(e2o2o, e2o[["ocel:eid", "ocel:oid", "ocel:type"]], left_on=["ocel:eid", "ocel:oid_2"],
+                           right_on=["ocel:eid", "ocel:oid"])
+        e2o2o2e = e2o2o2e[["ocel:activity", "ocel:type_x", "ocel:type_y", "o2o_qualifier", "ocel:eid", "ocel:oid_x",
+                           "ocel:oid_y"]]
+        e2o2o2e = e2o2o2e.drop_duplicates()
+        # per (activity, type x, type y, qualifier): the maximal number of related objects of type y that an object
+        # of type x has at one event
+        max_related_objects = e2o2o2e \
+            .groupby(["ocel:activity", "ocel:type_x", "ocel:type_y", "o2o_qualifier", "ocel:eid", "ocel:oid_x"],
+                     dropna=False) \
+            .size() \
+            .groupby(level=["ocel:activity", "ocel:type_x", "ocel:type_y", "o2o_qualifier"], dropna=False) \
+            .max()
         for event_type in self.event_types:
-            event_type_e2o = e2o[e2o["ocel:activity"] == event_type]
-            e2o2o = pd.merge(event_type_e2o, o2o, on='ocel:oid')
-            e2o2o2e = pd.merge(e2o2o, event_type_e2o, left_on=["ocel:eid", "ocel:oid_2"],
-                               right_on=["ocel:eid", "ocel:oid"])
-            e2o2o2e = e2o2o2e[["ocel:eid", "ocel:oid_x", "ocel:type_x", "o2o_qualifier", "ocel:oid_y", "ocel:type_y"]]
-            e2o2o2e.drop_duplicates(inplace=True)
             self.event_type_object_to_object_relations[event_type] = {
                 object_type_x: {
                     object_type_y: []
@@ -336,12 +412,6 @@ class PatternMiningManager:
                 }
                 for object_type_x in self.object_types
             }
-            subgroups_existential = e2o2o2e.groupby(['ocel:type_x', 'ocel:type_y'])
-            for key, subgroup in subgroups_existential:
-                qualifiers = list(set(subgroup['o2o_qualifier']))
-                object_type_x, object_type_y = key
-                self.event_type_object_to_object_relations[event_type][object_type_x][object_type_y] = qualifiers
-                self.number_of_object_to_object_relation_types[event_type] += len(qualifiers)
             # multi-relations between type x and type y: objects of type x can habe multiple relations to objects of type y
             self.event_type_object_to_object_multi_relations[event_type] = {
                 object_type_x: {
@@ -350,17 +420,13 @@ class PatternMiningManager:
                 }
                 for object_type_x in self.object_types
             }
-            for object_type_x in self.event_types_object_types[event_type]:
-                for object_type_y in self.event_types_object_types[event_type]:
-                    type_x_filter = e2o2o2e[e2o2o2e["ocel:type_x"] == object_type_x]
-                    type_filter = type_x_filter[type_x_filter["ocel:type_y"] == object_type_y]
-                    qualifiers = set(type_filter["o2o_qualifier"].values)
-                    for qualifier in qualifiers:
-                        qualifier_filter = type_filter[type_filter["o2o_qualifier"] == qualifier]
-                        subgroups = qualifier_filter.groupby(["ocel:eid", "ocel:oid_x"])
-                        if (subgroups.size() > 1).any():
-                            self.event_type_object_to_object_multi_relations[event_type][object_type_x][
-                                object_type_y].append(qualifier)
+        for key, max_count in max_related_objects.items():
+            event_type, object_type_x, object_type_y, qualifier = key
+            self.event_type_object_to_object_relations[event_type][object_type_x][object_type_y].append(qualifier)
+            self.number_of_object_to_object_relation_types[event_type] += 1
+            if max_count > 1 and not pd.isna(qualifier):
+                self.event_type_object_to_object_multi_relations[event_type][object_type_x][
+                    object_type_y].append(qualifier)
 
     def load_default_search_plans(self, event_types):
         self.__initialize_search_plans()
@@ -400,8 +466,7 @@ class PatternMiningManager:
     def __make_event_attributes_default_patterns(self, event_type):
         for attribute, dtype in self.event_attribute_data_types[event_type].items():
             if is_categorical_data_type(dtype):
-                # TODO: unify, maybe build TableManager already in __init__
-                labels = set(self.ocel.events[attribute].dropna().values)
+                labels = self.schema_profile.get_event_attribute_labels(attribute)
                 if len(labels) > self.categoricalVariablesMaxLabelsEVENT:
                     continue
                 for label in labels:
@@ -417,14 +482,9 @@ class PatternMiningManager:
             object_variable_argument = ObjectVariableArgument(object_type, object_variable_id)
             for attribute, dtype in self.object_attribute_data_types[object_type].items():
                 if is_categorical_data_type(dtype):
-                    e2o_exploded = table_manager.get_event_interaction_table()
-                    e2o_exploded = e2o_exploded[e2o_exploded["ocel:type"] == object_type]
-                    object_evolutions = table_manager.get_object_evolutions_table()
-                    object_evolutions = object_evolutions[[attribute, "object_evolution_index"]]
-                    e2o_exploded = e2o_exploded.merge(
-                        object_evolutions,
-                        on="object_evolution_index"
-                    )
+                    e2o_exploded = table_manager.get_event_interaction_table(["ocel:type", attribute])
+                    e2o_exploded = e2o_exploded[
+                        e2o_exploded["ocel:type"] == table_manager.get_object_type_code(object_type)]
                     labels = e2o_exploded[attribute].unique()
                     if len(labels) > self.categoricalVariablesMaxLabelsOBJECT:
                         continue
@@ -505,9 +565,7 @@ class PatternMiningManager:
             self.__make_object_type_cardinality_patterns(event_type)
 
     def __make_object_type_cardinality_patterns(self, event_type):
-        relations = self.ocel.relations
-        event_type_relations = relations[relations["ocel:activity"] == event_type]
-        et_ot_cardinalities = event_type_relations.groupby(['ocel:eid', 'ocel:type'])['ocel:oid'].nunique()
+        et_ot_cardinalities = self.__get_object_type_cardinalities(event_type)
         ot_cardinalities = et_ot_cardinalities.groupby('ocel:type').value_counts(normalize=True). \
             unstack(fill_value=0)
         np.seterr(divide='ignore')
@@ -525,6 +583,20 @@ class PatternMiningManager:
                 card_pattern = get_ot_card_formula(object_type, card)
                 self.__add_basic_pattern(event_type, card_pattern)
 
+    def __get_object_type_cardinalities(self, event_type) -> pd.Series:
+        '''
+        :return: Per event of the event type and object type, the number of distinct related objects of the type, for
+        the events that are related to objects of the type. If the tables of the event type are loaded, these are the
+        counts that the cardinality patterns are evaluated on (see TableManager.get_object_type_cardinalities).
+        '''
+        table_manager = self.table_managers.get(event_type, None) if self.table_managers is not None else None
+        if table_manager is None:
+            relations = self.ocel.relations
+            event_type_relations = relations[relations["ocel:activity"] == event_type]
+            return event_type_relations.groupby(['ocel:eid', 'ocel:type'])['ocel:oid'].nunique()
+        cardinalities = table_manager.get_object_type_cardinalities().rename_axis(columns="ocel:type").stack()
+        return cardinalities[cardinalities > 0]
+
     def __create_variable_prefixes(self):
         used_prefixes = set()
         self.variable_prefixes = {}
@@ -557,20 +629,109 @@ class PatternMiningManager:
             self.custom_patterns[event_type] = {}
 
     def load_tables(self, event_types):
-        self.table_managers = {}
-        for i in range(len(event_types)):
-            event_type = event_types[i]
-            event_object_types = self.event_types_object_types[event_type]
-            print("Starting to load auxiliary tables for event type '" + event_type + "', " + str(i + 1) + "/" + str(
-                len(event_types)) + ".")
-            import time
-            start = time.time()
-            table_manager = TableManager(self.ocel, event_type, event_object_types)
-            self.table_managers[event_type] = table_manager
-            end = time.time()
-            runtime = end - start
-            print("Finished loading auxiliary tables for event type '" + event_type + "', " + str(i + 1) + "/" + str(
-                len(event_types)) + ", time: " + str(runtime))
+        self.encoded_ocel = None
+        encoded_ocel = self.get_encoded_ocel()
+        self.object_evolution_store = ObjectEvolutionStore()
+        self.object_evolution_store.create(encoded_ocel)
+        self.evaluation_cache.clear()
+        # the tables of the default search plans are built right away, the others on first access
+        self.table_managers, self.table_loading_errors = build_table_managers(
+            encoded_ocel, event_types, self.event_types_object_types, self.object_type_attributes, self.dictionary,
+            self.object_evolution_store, table_kinds=DEFAULT_SEARCH_PLAN_TABLES, max_workers=self.tableWorkers)
+
+    def append_log(self, ocel: OCEL):
+        '''
+        Appends new data to the log of the session, for example a later export of the log: events, objects, E2O and O2O
+        relations and object changes that are already known are ignored. The tables of the loaded event types are
+        updated in place (see TableManager.append), and the search results of event types whose events are affected are
+        discarded. The statistics of the upload and the search plans are not recomputed, so the appended events have to
+        be of known event types and relate to known object types. Known events cannot be related to further objects.
+
+        :param ocel: The log with the new data
+        :return: Per event type, the number of new events and the number of known events that are affected
+        '''
+        self.__preprocess_ocel(ocel)
+        appended_ocel = self.__get_appended_part(ocel)
+        self.__check_appended_part(ocel, appended_ocel)
+        self.dictionary.extend(appended_ocel)
+        for frame_name in OCEL_FRAMES:
+            frame = getattr(self.ocel, frame_name)
+            appended_frame = getattr(appended_ocel, frame_name)
+            # the appended rows continue the row positions of the log, as if the log had been uploaded at once
+            appended_frame.index = pd.RangeIndex(len(frame), len(frame) + len(appended_frame))
+            setattr(self.ocel, frame_name, pd.concat([frame, appended_frame]))
+        encoded_appended_ocel = self.dictionary.encode_ocel(appended_ocel)
+        if self.encoded_ocel is not None:
+            for frame_name in OCEL_FRAMES:
+                setattr(self.encoded_ocel, frame_name, pd.concat(
+                    [getattr(self.encoded_ocel, frame_name), getattr(encoded_appended_ocel, frame_name)]))
+        appended_counts = {}
+        if self.object_evolution_store is None:
+            return appended_counts
+        first_appended_evolution = len(self.object_evolution_store.table)
+        first_changes = self.object_evolution_store.append(encoded_appended_ocel)
+        events = encoded_appended_ocel.events
+        for event_type, table_manager in self.table_managers.items():
+            table_manager.attach(self.get_encoded_ocel, self.object_evolution_store)
+            changed_eids = table_manager.append(encoded_appended_ocel, self.dictionary, first_changes,
+                                                first_appended_evolution)
+            new_events = (events["ocel:activity"] == table_manager.eventTypeCode).sum()
+            appended_counts[event_type] = (int(new_events), len(changed_eids))
+            print("Appended " + str(new_events) + " events to the tables of event type '" + event_type + "', " + str(
+                len(changed_eids)) + " known events affected.")
+            if new_events > 0 or len(changed_eids) > 0:
+                self.__discard_search_results(event_type)
+            self.evaluation_cache.discard_stale(event_type, table_manager.version)
+        return appended_counts
+
+    def __get_appended_part(self, ocel: OCEL) -> OCEL:
+        known_events = self.ocel.events["ocel:eid"]
+        events = ocel.events[~ocel.events["ocel:eid"].isin(known_events)]
+        appended_ocel = OCEL(
+            events=events,
+            objects=ocel.objects[~ocel.objects["ocel:oid"].isin(self.ocel.objects["ocel:oid"])],
+            relations=ocel.relations[ocel.relations["ocel:eid"].isin(events["ocel:eid"])],
+            o2o=_get_unknown_rows(ocel.o2o, self.ocel.o2o, ["ocel:oid", "ocel:qualifier", "ocel:oid_2"]),
+            e2e=_get_unknown_rows(ocel.e2e, self.ocel.e2e, list(ocel.e2e.columns)),
+            object_changes=_get_unknown_rows(ocel.object_changes, self.ocel.object_changes,
+                                             ["ocel:oid", "ocel:timestamp", "ocel:field"])
+        )
+        return appended_ocel
+
+    def __check_appended_part(self, ocel: OCEL, appended_ocel: OCEL):
+        unknown_event_types = set(appended_ocel.events["ocel:activity"]).difference(self.event_types)
+        if len(unknown_event_types) > 0:
+            raise ValueError("The appended events are of unknown event types: " + str(sorted(unknown_event_types)))
+        # the tables of known events are not updated with new E2O relations, so they are not ignored silently either
+        known_event_relations = ocel.relations[ocel.relations["ocel:eid"].isin(self.ocel.events["ocel:eid"])]
+        new_relations = _get_unknown_rows(known_event_relations, self.ocel.relations,
+                                          ["ocel:eid", "ocel:oid", "ocel:qualifier"])
+        if len(new_relations) > 0:
+            raise ValueError("The appended log relates known events to further objects: " + str(
+                sorted(set(new_relations["ocel:eid"]))))
+        event_type_object_types = appended_ocel.relations[["ocel:activity", "ocel:type"]].drop_duplicates()
+        unknown_pairs = [
+            (event_type, object_type) for event_type, object_type in event_type_object_types.itertuples(index=False)
+            if object_type not in self.event_types_object_types.get(event_type, [])
+        ]
+        if len(unknown_pairs) > 0:
+            raise ValueError("The appended events relate to object types that are not related to their event types "
+                             "in the log: " + str(unknown_pairs))
+
+    def __discard_search_results(self, event_type):
+        for attribute in ["base_tables", "anti_patterns", "models", "pattern_supports", "maximal_pattern_supports"]:
+            search_results = getattr(self, attribute, None)
+            if search_results is not None:
+                search_results.pop(event_type, None)
+
+    def get_encoded_ocel(self):
+        '''
+        The log with identifiers encoded by the dictionary, from which the table managers build their tables. It is
+        encoded once per loaded manager, and only if a table is to be built.
+        '''
+        if self.encoded_ocel is None:
+            self.encoded_ocel = self.dictionary.encode_ocel(self.ocel)
+        return self.encoded_ocel
 
     def __configure_search(self, selected_pattern_ids):
         for event_type, event_type_patterns in selected_pattern_ids["patterns"].items():
@@ -628,12 +789,19 @@ class PatternMiningManager:
             print("Starting to search patterns for event type '" + event_type + "', " + str(i + 1) + "/" + str(
                 len(event_types)) + ".")
             table_manager = self.table_managers[event_type]
-            base_table = self.__make_bootstrap_table(event_type, table_manager)
+            # one plan per event type, so that the subformulas of all searched and merged patterns are applied once
+            evaluation_plan = EvaluationPlan(table_manager)
             if self.mergeMode:
-                base_table = self.__merge_interaction_patterns(event_type, base_table, table_manager)
+                evaluation_plan.retain([pattern.patternFormula for pattern in self.__get_mergeable_patterns(event_type)])
+            base_table = self.__make_bootstrap_table(event_type, table_manager, evaluation_plan)
+            if self.mergeMode:
+                base_table = self.__merge_interaction_patterns(event_type, base_table, table_manager, evaluation_plan)
+            print("Subformulas applied for event type '" + event_type + "': " + str(evaluation_plan.applications) + ".")
             if self.complementaryMode:
                 base_table = self.__add_anti_patterns(event_type, base_table)
             self.base_tables[event_type] = base_table
+            print("Tables built for event type '" + event_type + "' (seconds): " + str(
+                table_manager.get_build_report()))
 
     def __search_models(self, event_types, minimal_support):
         resp = {
@@ -675,13 +843,13 @@ class PatternMiningManager:
             self.__make_rules(event_type, target_pattern_description, max_rule_ante_length, min_rule_ante_support)
 
     def __make_rules(self, event_type, target_pattern_description, max_rule_ante_length, min_rule_ante_support):
-        base_table = self.base_tables[event_type]
+        base_table: BaseTable = self.base_tables[event_type]
         if min_rule_ante_support == 0:
             min_rule_ante_support = 1/len(base_table)
         n = len(base_table)
-        target_pattern_prevalence = (base_table[target_pattern_description] == True).sum() / n
+        target_pattern_prevalence = base_table.get_support(target_pattern_description)
         from mlxtend.frequent_patterns import apriori, association_rules
-        base_table_target_pattern = base_table[:]
+        base_table_target_pattern = base_table.to_frame()
         print(list(base_table_target_pattern.columns))
         frequent_itemsets_target_pattern = apriori(
             base_table_target_pattern, min_support=target_pattern_prevalence*min_rule_ante_support, use_colnames=True, max_len=max_rule_ante_length+1
@@ -694,7 +862,7 @@ class PatternMiningManager:
         session_key_str = session.get("session_key", "???")
         friendly_event_type_string = event_type.strip().replace(":", "")
         base_table_path = os.path.join(path, "base_table_" + friendly_event_type_string + "_" + session_key_str + ".xlsx")
-        base_table_target_pattern.to_excel(base_table_path)
+        self.__decode_event_index(base_table_target_pattern).to_excel(base_table_path)
         if rules_target_pattern is not None:
             rules_target_pattern["length"] = rules_target_pattern["antecedents"].apply(lambda a: len(a))
             rules_target_pattern = rules_target_pattern[rules_target_pattern["antecedent support"] > min_rule_ante_support]
@@ -705,7 +873,8 @@ class PatternMiningManager:
             rules_target_pattern.to_excel(rule_path)
             self.zipped_rules_names[event_type] = rule_path
 
-    def __make_bootstrap_table(self, event_type: str, table_manager: TableManager) -> DataFrame:
+    def __make_bootstrap_table(self, event_type: str, table_manager: TableManager,
+                               evaluation_plan: EvaluationPlan) -> BaseTable:
         basic_patterns = self.searched_basic_patterns[event_type]
         interaction_patterns = self.searched_interaction_patterns[event_type]
         custom_patterns = self.custom_patterns[event_type]
@@ -717,34 +886,66 @@ class PatternMiningManager:
                 searched_patterns[pattern_id] = pattern
         for pattern_id, pattern in custom_patterns.items():
             searched_patterns[pattern_id] = pattern
-        evaluated_pattern_series = []
-        evaluated_pattern_keys = []
+        cached_evaluations = {}
+        for pattern_id in searched_patterns:
+            bits = self.evaluation_cache.get(event_type, pattern_id, table_manager.version)
+            if bits is not None:
+                cached_evaluations[pattern_id] = bits
+        # only the tables of the patterns that have not been evaluated before are needed
+        required_tables = {TableManager.EVENT_INDEX}
+        for pattern_id, pattern in searched_patterns.items():
+            if pattern_id not in cached_evaluations:
+                required_tables.update(pattern.get_required_tables())
+        table_manager.materialize(required_tables)
+        evaluation_plan.add([pattern for pattern_id, pattern in searched_patterns.items()
+                             if pattern_id not in cached_evaluations])
+        base_table = BaseTable(table_manager.get_event_index().index)
         for pattern_id, pattern in searched_patterns.items():
             print(pattern_id)
-            evaluation = pattern.evaluate(table_manager)["ox:evaluation"]
-            evaluated_pattern_series.append(evaluation)
-            evaluated_pattern_keys.append(pattern_id)
-        base_table = pd.concat(
-            objs = evaluated_pattern_series,
-            keys = evaluated_pattern_keys,
-            axis = 1
-        )
+            if pattern_id in cached_evaluations:
+                base_table.set_bits(pattern_id, cached_evaluations[pattern_id])
+                continue
+            evaluation = evaluation_plan.evaluate(pattern)["ox:evaluation"]
+            base_table.set(pattern_id, evaluation)
+            self.evaluation_cache.put(event_type, pattern_id, table_manager.version, base_table.get_bits(pattern_id))
+        print("Patterns of event type '" + event_type + "' read from the evaluation cache: " + str(
+            len(cached_evaluations)) + "/" + str(len(searched_patterns)) + ".")
         path = get_session_path()
         base_table_path = os.path.join(path, "base_table_" + event_type.replace(":","") + ".xlsx")
-        base_table.to_excel(base_table_path)
+        self.__decode_event_index(base_table.to_frame()).to_excel(base_table_path)
         return base_table
 
-    def __merge_interaction_patterns(self, event_type, base_table: DataFrame, table_manager: TableManager):
+    def __decode_event_index(self, table: DataFrame) -> DataFrame:
+        '''
+        Base tables are indexed by event id codes, this restores the event ids for exporting.
+        '''
+        event_ids = self.dictionary.decode(OcelDictionary.EVENT_ID, table.index)
+        return table.set_axis(pd.Index(event_ids, name=table.index.name), axis=0)
+
+    def __merge_interaction_patterns(self, event_type, base_table: BaseTable, table_manager: TableManager,
+                                     evaluation_plan: EvaluationPlan):
         total_count = 0
         interaction_patterns = self.searched_interaction_patterns[event_type]
         for object_type, patterns in interaction_patterns.items():
             if self.event_type_object_types_variability[event_type][object_type]:
                 count, base_table = self.__merge_variable_types_existential_patterns(
-                    patterns.values(), base_table, table_manager, event_type, object_type)
+                    patterns.values(), base_table, table_manager, evaluation_plan, event_type, object_type)
                 total_count += count
         return base_table
 
-    def __add_anti_patterns(self, event_type, base_table):
+    def __get_mergeable_patterns(self, event_type):
+        '''
+        :return: The existential patterns of the object types that vary in number at the event type, which are merged
+        by __merge_variable_types_existential_patterns
+        '''
+        return [
+            pattern
+            for object_type, patterns in self.searched_interaction_patterns[event_type].items()
+            if self.event_type_object_types_variability[event_type][object_type]
+            for pattern in patterns.values() if isinstance(pattern, ExistentialPattern)
+        ]
+
+    def __add_anti_patterns(self, event_type, base_table: BaseTable):
         pattern_ids_and_pattern = list(self.searched_basic_patterns[event_type].items())
         pattern_ids_and_pattern += [(pattern_id, pattern)
                                     for object_type, interaction_patterns in
@@ -752,8 +953,7 @@ class PatternMiningManager:
                                     for pattern_id, pattern in interaction_patterns.items()]
         self.anti_patterns[event_type] = {}
         for pattern_id, pattern in pattern_ids_and_pattern:
-            # KISS
-            anti_pattern_eval = ~base_table[pattern_id].astype(bool)
+            anti_pattern_eval = base_table.logical_not(pattern_id)
             anti_pattern = get_anti_pattern(pattern)
             anti_pattern_id = anti_pattern.to_string()
             object_type = pattern.get_object_type()
@@ -763,13 +963,13 @@ class PatternMiningManager:
             else:
                 self.__add_interaction_pattern(event_type, object_type, anti_pattern)
                 self.anti_patterns[event_type][pattern_id] = anti_pattern
-            base_table[anti_pattern_id] = anti_pattern_eval
+            base_table.set_bits(anti_pattern_id, anti_pattern_eval)
         return base_table
 
     def __make_models(self, event_type, minimal_support):
         self.maximal_pattern_supports[event_type] = {}
-        base_table = self.base_tables[event_type]
-        working_table = base_table[:]
+        base_table: BaseTable = self.base_tables[event_type]
+        working_table = base_table.to_frame()
         self.__make_fpgrowth_models(event_type, working_table, minimal_support)
 
     def __make_fpgrowth_models(self, event_type, base_table, minimal_support):
@@ -864,7 +1064,8 @@ class PatternMiningManager:
             self.searched_interaction_patterns[event_type][variable_type][merged_pattern_id] = merged_pattern
         return merged_descriptor
 
-    def __merge_variable_types_existential_patterns(self, patterns, base_table, table_manager, event_type, object_type):
+    def __merge_variable_types_existential_patterns(self, patterns, base_table, table_manager,
+                                                    evaluation_plan: EvaluationPlan, event_type, object_type):
         existential_patterns = list(filter(lambda pat: isinstance(pat, ExistentialPattern), patterns))
         bootstrap_patterns = list(map(lambda pat: ({pat[0]}, pat[1]), enumerate(existential_patterns)))
         total_events = len(base_table)
@@ -873,7 +1074,7 @@ class PatternMiningManager:
             for pat in bootstrap_patterns
         }
         evaluation_scores = {
-            str(pat[0]): base_table[index_to_pattern_id[str(pat[0])]].sum() / total_events
+            str(pat[0]): base_table.get_support(index_to_pattern_id[str(pat[0])])
             for pat in bootstrap_patterns
         }
         # for create indices also store the pattern to save it in the PatternMiningManager
@@ -889,6 +1090,8 @@ class PatternMiningManager:
             rounds = rounds + 1
             update = False
             candidate_tuples = product(bootstrap_patterns, indexed_merged_patterns)
+            # the conjunctions of the previous round are the right operands of the candidates of this round
+            previous_merged_formulas = [merged_pattern.patternFormula for index, merged_pattern in indexed_merged_patterns]
             indexed_merged_patterns = []
             for indexed_bootstrap_pattern, indexed_merged_pattern in candidate_tuples:
                 bootstrap_index, bootstrap_pattern = indexed_bootstrap_pattern
@@ -908,16 +1111,17 @@ class PatternMiningManager:
                 new_merged_pattern: ExistentialPattern = get_existential_patterns_merge(
                     [bootstrap_pattern, old_merged_pattern])
                 new_merged_pattern_id = new_merged_pattern.to_string()
-                new_merged_evaluation = new_merged_pattern.evaluate(table_manager)
-                new_merged_score = float(new_merged_evaluation["ox:evaluation"].sum()) / total_events
+                evaluation_plan.retain([new_merged_pattern.patternFormula])
+                new_merged_evaluation = self.__evaluate_cached(event_type, new_merged_pattern, base_table, table_manager,
+                                                               evaluation_plan)
+                new_merged_score = float(count_bits(new_merged_evaluation)) / total_events
                 evaluation_scores[str(new_index)] = new_merged_score
                 if new_merged_score >= self.minSupport:
                     update = True
                     count += 1
                     creates[str(new_index)] = new_merged_pattern
                     index_to_pattern_id[str(new_index)] = new_merged_pattern_id
-                    new_merged_evaluation.rename(columns={"ox:evaluation": new_merged_pattern_id}, inplace=True)
-                    new_columns.append(new_merged_evaluation)
+                    new_columns.append((new_merged_pattern_id, new_merged_evaluation))
                     indexed_merged_patterns.append((new_index, new_merged_pattern))
                     creates, deletes = self.__update_creates_deletes(
                         event_type, object_type, evaluation_scores, bootstrap_index, bootstrap_pattern_id,
@@ -930,15 +1134,35 @@ class PatternMiningManager:
                             + "of patterns as set by max_bootstrap_patterns was reached.")
                         update = False
                         break
+                else:
+                    evaluation_plan.release([new_merged_pattern.patternFormula])
                 checked_indices = checked_indices + [new_index]
-        if len(new_columns) > 0:
-            new_columns_frame = pd.concat(new_columns, axis=1)
-            base_table = pd.concat([base_table, new_columns_frame], axis=1)
-        base_table.drop(columns=[index_to_pattern_id[str(delete_index)] for delete_index in deletes], inplace=True)
+            if rounds > 1:
+                evaluation_plan.release(previous_merged_formulas)
+        evaluation_plan.release([merged_pattern.patternFormula for index, merged_pattern in indexed_merged_patterns
+                                 if len(index) > 1])
+        for new_merged_pattern_id, new_merged_evaluation in new_columns:
+            base_table.set_bits(new_merged_pattern_id, new_merged_evaluation)
+        base_table.drop([index_to_pattern_id[str(delete_index)] for delete_index in deletes])
         for create_pattern in creates.values():
             self.__add_interaction_pattern(event_type, object_type, create_pattern)
         return count, base_table
 
+    def __evaluate_cached(self, event_type, pattern: PatternFormula, base_table: BaseTable,
+                          table_manager: TableManager, evaluation_plan: EvaluationPlan) -> np.ndarray:
+        '''
+        :return: The bit vector of the events (of the base table) that satisfy the pattern, read from the evaluation
+        cache if the pattern has been evaluated on the tables before
+        '''
+        pattern_id = pattern.to_string()
+        bits = self.evaluation_cache.get(event_type, pattern_id, table_manager.version)
+        if bits is None:
+            evaluation = BaseTable(base_table.index)
+            evaluation.set(pattern_id, evaluation_plan.evaluate(pattern)["ox:evaluation"])
+            bits = evaluation.get_bits(pattern_id)
+            self.evaluation_cache.put(event_type, pattern_id, table_manager.version, bits)
+        return bits
+
     def __update_creates_deletes(self, event_type, object_type, evaluation_scores, bootstrap_index,
                                  bootstrap_pattern_id, old_merged_index, old_merged_pattern_id, new_merged_score,
                                  creates, deletes):
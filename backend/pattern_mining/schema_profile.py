@@ -0,0 +1,89 @@
+import pandas as pd
+from pm4py import OCEL
+
+from utils.misc_utils import is_categorical_data_type
+
+
+class SchemaProfile:
+
+    def __init__(self, ocel: OCEL):
+        '''
+        A profile of the attributes of the event types and object types of a log, computed with one grouped pass over
+        the events and one over the objects (including their changes):
+        per type, which attributes are present, their null counts and distinct counts, and the label sets of the
+        categorical attributes. Data types are determined once per attribute for the whole log.
+
+        :param ocel: The object-centric event log
+        '''
+        events = ocel.events
+        event_attributes = [c for c in events.columns if not c.startswith('ocel:')]
+        self.eventAttributeDataTypes = events.dtypes.to_dict()
+        self.eventTypeAttributes, self.eventTypeNullCounts, self.eventTypeDistinctCounts, \
+            self.eventTypeAttributeLabels = self.__profile_types(
+                [events], 'ocel:activity', event_attributes, self.eventAttributeDataTypes)
+        object_frames = [frame for frame in [ocel.objects, ocel.object_changes] if 'ocel:type' in frame.columns]
+        object_attributes = []
+        for frame in object_frames:
+            object_attributes += [c for c in frame.columns if not c.startswith('ocel:') and c not in object_attributes]
+        self.objectAttributeDataTypes = {
+            attribute: self.__determine_object_attribute_data_type(ocel, attribute)
+            for attribute in object_attributes
+        }
+        self.objectTypeAttributes, self.objectTypeNullCounts, self.objectTypeDistinctCounts, \
+            self.objectTypeAttributeLabels = self.__profile_types(
+                object_frames, 'ocel:type', object_attributes, self.objectAttributeDataTypes)
+
+    def get_event_attribute_labels(self, attribute):
+        '''
+        :return: The labels that a (categorical) event attribute takes in the whole log
+        '''
+        labels = set()
+        for attribute_labels in self.eventTypeAttributeLabels.values():
+            labels.update(attribute_labels.get(attribute, []))
+        return labels
+
+    def __profile_types(self, frames, type_column, attributes, data_types):
+        stacked = pd.concat([frame[[type_column] + [a for a in attributes if a in frame.columns]]
+                             for frame in frames], ignore_index=True) \
+            .reindex(columns=[type_column] + attributes)
+        types = stacked[type_column]
+        type_sizes = types.value_counts(sort=False)
+        non_null_counts = stacked[attributes].notna().groupby(types).sum().reindex(type_sizes.index, fill_value=0)
+        null_counts = non_null_counts.rsub(type_sizes, axis=0)
+        distinct_counts = stacked.groupby(type_column)[attributes].nunique().reindex(type_sizes.index, fill_value=0)
+        # without attribute columns, itertuples yields no rows, but every type still gets an entry
+        presence_rows = dict(zip(non_null_counts.index, non_null_counts.gt(0).itertuples(index=False, name=None)))
+        type_attributes = {
+            object_or_event_type: [attribute for attribute, present in
+                                   zip(attributes, presence_rows.get(object_or_event_type, ())) if present]
+            for object_or_event_type in type_sizes.index
+        }
+        categorical_attributes = [a for a in attributes if is_categorical_data_type(data_types[a])]
+        type_attribute_labels = {object_or_event_type: {} for object_or_event_type in type_sizes.index}
+        if len(categorical_attributes) > 0:
+            labels = stacked.melt(id_vars=[type_column], value_vars=categorical_attributes,
+                                  var_name="ox:attribute", value_name="ox:label") \
+                .dropna(subset=["ox:label"]) \
+                .drop_duplicates() \
+                .groupby([type_column, "ox:attribute"])["ox:label"] \
+                .agg(set)
+            for (object_or_event_type, attribute), attribute_labels in labels.items():
+                type_attribute_labels[object_or_event_type][attribute] = attribute_labels
+        return type_attributes, null_counts, distinct_counts, type_attribute_labels
+
+    def __determine_object_attribute_data_type(self, ocel, attribute):
+        objects = ocel.objects
+        object_changes = ocel.object_changes
+        if attribute not in objects.columns:
+            return object_changes.dtypes[attribute]
+        dtype1 = objects.dtypes[attribute]
+        if attribute not in object_changes.columns:
+            return dtype1
+        dtype2 = object_changes.dtypes[attribute]
+        if objects[attribute].isna().all():
+            return dtype2
+        if object_changes[attribute].isna().all():
+            return dtype1
+        if not dtype1 == dtype2:
+            raise AttributeError()
+        return dtype1
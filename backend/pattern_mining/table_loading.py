@@ -0,0 +1,100 @@
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pattern_mining.ocel_dictionary import OcelDictionary
+from pattern_mining.table_manager import TableManager
+from pattern_mining.tables.object_evolution_store import ObjectEvolutionStore
+
+# the inputs of the table construction that are shared by all event types: (ocel, event_types_object_types,
+# object_type_attributes, dictionary, object_evolution_store, table_kinds). With the fork start method, the workers
+# inherit them from the backend process without copying (copy-on-write pages, the workers only read them), otherwise
+# they are sent once per worker.
+_shared_inputs = None
+
+
+def _set_shared_inputs(shared_inputs):
+    global _shared_inputs
+    _shared_inputs = shared_inputs
+
+
+def _build_table_manager(event_type):
+    ocel, event_types_object_types, object_type_attributes, dictionary, object_evolution_store, table_kinds = \
+        _shared_inputs
+    start = time.time()
+    table_manager = TableManager(ocel, event_type, event_types_object_types[event_type], object_type_attributes,
+                                 dictionary, object_evolution_store, table_kinds)
+    return table_manager, time.time() - start
+
+
+def build_table_managers(ocel, event_types, event_types_object_types, object_type_attributes,
+                         dictionary: OcelDictionary, object_evolution_store: ObjectEvolutionStore, table_kinds=None,
+                         max_workers=None):
+    '''
+    Builds the TableManagers of several event types on a pool of processes, one task per event type.
+    A failing event type does not affect the others: its error is reported and the remaining table managers are
+    returned.
+
+    :param ocel: The object-centric event log, with identifiers encoded by the dictionary
+    :param event_types: The event types
+    :param event_types_object_types: The object types per event type
+    :param object_type_attributes: The attributes per object type
+    :param dictionary: The dictionary of the log
+    :param object_evolution_store: The object evolutions of the log, re-attached to the returned table managers
+    :param table_kinds: The kinds of tables to build in advance, the others are built on first access
+    :param max_workers: The number of processes, the number of CPUs if None. With one worker (or one event type),
+    the table managers are built in the backend process.
+    :return: The table managers per event type and the errors per failed event type
+    '''
+    table_managers = {}
+    errors = {}
+    shared_inputs = (ocel, event_types_object_types, object_type_attributes, dictionary, object_evolution_store,
+                     table_kinds)
+    if max_workers is None:
+        max_workers = multiprocessing.cpu_count()
+    max_workers = min(max_workers, len(event_types))
+    if max_workers <= 1:
+        _set_shared_inputs(shared_inputs)
+        try:
+            for event_type in event_types:
+                try:
+                    table_manager, runtime = _build_table_manager(event_type)
+                    table_managers[event_type] = table_manager
+                    _report_loaded(event_type, len(table_managers), len(event_types), runtime)
+                except Exception as e:
+                    traceback.print_exc()
+                    errors[event_type] = repr(e)
+        finally:
+            _set_shared_inputs(None)
+        return table_managers, errors
+    if "fork" in multiprocessing.get_all_start_methods():
+        _set_shared_inputs(shared_inputs)
+        pool_arguments = {"mp_context": multiprocessing.get_context("fork")}
+    else:
+        pool_arguments = {"initializer": _set_shared_inputs, "initargs": (shared_inputs,)}
+    print("Starting to load auxiliary tables for " + str(len(event_types)) + " event types on " + str(
+        max_workers) + " processes.")
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, **pool_arguments) as executor:
+            futures = {executor.submit(_build_table_manager, event_type): event_type for event_type in event_types}
+            for future in as_completed(futures):
+                event_type = futures[future]
+                try:
+                    table_manager, runtime = future.result()
+                except Exception as e:
+                    print("Failed loading auxiliary tables for event type '" + event_type + "': " + repr(e))
+                    errors[event_type] = repr(e)
+                    continue
+                # the log and the store are not sent back with the table manager
+                table_manager.attach(lambda: ocel, object_evolution_store)
+                table_managers[event_type] = table_manager
+                _report_loaded(event_type, len(table_managers), len(event_types), runtime)
+    finally:
+        _set_shared_inputs(None)
+    return table_managers, errors
+
+
+def _report_loaded(event_type, i, n, runtime):
+    print("Finished loading auxiliary tables for event type '" + event_type + "', " + str(i) + "/" + str(
+        n) + ", time: " + str(runtime))
@@ -1,17 +1,28 @@
+import copy
 import os
 import pickle
+import threading
+import time
 
+import numpy as np
+import pandas as pd
 from flask import session
 
+from pattern_mining.ocel_dictionary import OcelDictionary
+from pattern_mining.tables.adjacency_index import EventObjectsIndex, ObjectRelationsIndex
 from pattern_mining.tables.event_index import EventIndex
 from pattern_mining.tables.event_interaction_table import EventInteractionTable
 from pattern_mining.tables.event_objects import EventObjects
 from pattern_mining.tables.event_table import EventTable
 from pattern_mining.tables.o2o_table import O2OTable
+from pattern_mining.tables.object_evolution_store import ObjectEvolutionStore
 from pattern_mining.tables.object_evolutions_table import ObjectEvolutionsTable
 from pattern_mining.tables.object_interaction_table import ObjectInteractionTable
+from pattern_mining.tables.table import Table
 from utils.session_utils import get_session_path
 
+TABLE_MANAGER_FILE = "table_manager.pkl"
+
 
 #TODO: get_evaluation_base_table(object_types) that returns a dataframe with columns: event_id and all possible combinations
 # of values for the object types at the respective event
@@ -24,78 +35,369 @@ class TableManager:
         return name
 
     def save(self):
+        '''
+        Stores the table manager in a directory of the session: each built table in its own subdirectory (see
+        Table.save) and the remaining attributes pickled. Tables that have been loaded from that directory are unchanged
+        and not written again.
+        '''
         name = TableManager.get_name(self.eventType)
-        path = get_session_path()
-        path = os.path.join(path, name + ".pkl")
-        with open(path, "wb") as wf:
-            pickle.dump(self, wf)
+        path = os.path.join(get_session_path(), name)
+        os.makedirs(path, exist_ok=True)
+        with self.lock:
+            if self.tablesPath != path:
+                self.storedTables = {}
+            for key, table in self.tables.items():
+                if key in self.storedTables:
+                    continue
+                table_folder = self.__get_table_folder(key)
+                table.save(os.path.join(path, table_folder))
+                self.storedTables[key] = table_folder
+            self.tablesPath = path
+            attributes = copy.copy(self)
+        attributes.tables = {}
+        tmp_path = os.path.join(path, TABLE_MANAGER_FILE + ".tmp")
+        with open(tmp_path, "wb") as wf:
+            pickle.dump(attributes, wf)
+        os.replace(tmp_path, os.path.join(path, TABLE_MANAGER_FILE))
 
     @classmethod
-    def load(cls, event_type):
+    def load(cls, event_type, object_evolution_store: ObjectEvolutionStore, ocel_provider):
+        '''
+        Opens the table manager of an event type. Its tables are loaded (memory-mapped) when they are first accessed.
+        '''
         name = TableManager.get_name(event_type)
-        session_path = get_session_path()
-        path = os.path.join(session_path, name + ".pkl")
-        with open(path, "rb") as rf:
-            return pickle.load(rf)
+        path = os.path.join(get_session_path(), name)
+        with open(os.path.join(path, TABLE_MANAGER_FILE), "rb") as rf:
+            table_manager = pickle.load(rf)
+        table_manager.tablesPath = path
+        table_manager.attach(ocel_provider, object_evolution_store)
+        return table_manager
+
+    # the kinds of tables, EVENT_OBJECTS and O2O tables exist per object type
+    EVENT_INDEX = "event_index"
+    EVENT_OBJECTS = "event_objects"
+    O2O = "o2o"
+    EVENT_TABLE = "event_table"
+    OBJECT_EVOLUTIONS = "object_evolutions"
+    EVENT_INTERACTION = "event_interaction"
+    OBJECT_INTERACTION = "object_interaction"
+    EVENT_OBJECTS_INDEX = "event_objects_index"
+    OBJECT_RELATIONS_INDEX = "object_relations_index"
+    PER_OBJECT_TYPE_TABLES = [EVENT_OBJECTS, O2O]
+    # the kinds of tables that are updated when data is appended to the log, in the order of their dependencies, and
+    # those that are built again
+    APPENDED_TABLES = [EVENT_INDEX, EVENT_OBJECTS, EVENT_TABLE, OBJECT_EVOLUTIONS, EVENT_INTERACTION, OBJECT_INTERACTION,
+                       EVENT_OBJECTS_INDEX]
+    DROPPED_TABLES = [O2O, OBJECT_RELATIONS_INDEX]
 
-    def __init__(self, ocel, event_type, object_types):
+    def __init__(self, ocel, event_type, object_types, object_type_attributes, dictionary: OcelDictionary,
+                 object_evolution_store: ObjectEvolutionStore, table_kinds=None):
         '''
         A class that maintains analytical tables that can be used for an effective evaluation of pattern formulas.
         One object maintains these tables for one particular event type.
+        The tables store event ids, object ids, object types and qualifiers as the int32 codes of the dictionary.
+        Tables are built on first access (or in advance, see TableManager.materialize), so that tables that no pattern
+        of the search plan reads are never built. Building is thread-safe.
 
-        :param ocel: The object-centric event log
+        :param ocel: The object-centric event log, with identifiers encoded by the dictionary (OcelDictionary.encode_ocel)
         :param event_type: The particular event type
         :param object_types: A pre-selection of object types that are associated with that event type
+        :param object_type_attributes: The attributes per object type (see SchemaProfile.objectTypeAttributes)
+        :param dictionary: The dictionary of the log
+        :param object_evolution_store: The object evolutions of the log, shared by the table managers of all event types
+        :param table_kinds: The kinds of tables to build right away
         '''
         self.eventType = event_type
         self.objectTypes = object_types
-        event_index = EventIndex(self.eventType)
-        event_index.create(ocel)
-        event_objects_tables = {}
-        for object_type in self.objectTypes:
-            event_objects_of_type = EventObjects(self.eventType, object_type)
-            event_objects_of_type.create(ocel)
-            event_objects_tables[object_type] = event_objects_of_type
-        o2o_tables = {}
-        for object_type in self.objectTypes:
-            o2o_of_source_type = O2OTable(self.eventType, object_type)
-            o2o_of_source_type.create(ocel)
-            o2o_tables[object_type] = o2o_of_source_type
-        event_table = EventTable(self.eventType)
-        event_table.create(ocel)
-        object_evolutions_table = ObjectEvolutionsTable(self.eventType, self.objectTypes)
-        object_evolutions_table.create(ocel)
-        event_interaction_table = EventInteractionTable(self.eventType, self.objectTypes)
-        event_interaction_table.create(ocel, object_evolutions_table)
-        object_interaction_table = ObjectInteractionTable(self.eventType, self.objectTypes)
-        object_interaction_table.create(ocel, object_evolutions_table)
-        self.eventIndex = event_index
-        self.eventObjectsTables = event_objects_tables
-        self.o2oTables = o2o_tables
-        self.eventTable = event_table
-        self.objectEvolutionsTable = object_evolutions_table
-        self.eventInteractionTable = event_interaction_table
-        self.objectInteractionTable = object_interaction_table
+        # the attributes of the object types, in the order of the object types
+        self.objectAttributes = list(dict.fromkeys(
+            attribute for object_type in object_types for attribute in object_type_attributes.get(object_type, [])))
+        self.objectTypeCodes = dictionary.get_codes(OcelDictionary.OBJECT_TYPE)
+        self.qualifierCodes = dictionary.get_codes(OcelDictionary.QUALIFIER)
+        self.eventTypeCode = dictionary.encode(OcelDictionary.ACTIVITY, event_type)
+        self.tables = {}
+        self.buildTimes = {}
+        self.storedTables = {}
+        self.tablesPath = None
+        self.version = 0
+        self.objectTypeCardinalities = None
+        self.lock = threading.RLock()
+        self.ocel = None
+        self.ocelProvider = None
+        self.objectEvolutionStore = None
+        self.attach(lambda: ocel, object_evolution_store)
+        if table_kinds is not None:
+            self.materialize(table_kinds)
+
+    def attach(self, ocel_provider, object_evolution_store: ObjectEvolutionStore):
+        '''
+        Provides the sources of the tables that are not built yet, after unpickling.
+
+        :param ocel_provider: Returns the encoded object-centric event log, only called if a table is to be built
+        :param object_evolution_store: The object evolutions of the log
+        '''
+        with self.lock:
+            self.ocel = None
+            self.ocelProvider = ocel_provider
+            self.objectEvolutionStore = object_evolution_store
+            object_evolutions_table = self.tables.get((self.OBJECT_EVOLUTIONS, None), None)
+            if object_evolutions_table is not None:
+                object_evolutions_table.set_store(object_evolution_store)
+
+    def materialize(self, table_kinds):
+        '''
+        Builds the tables of the given kinds (for all object types, if per object type) unless they are built already.
+
+        :param table_kinds: The kinds of tables, for example collected from the pattern functions of a search plan
+        '''
+        for kind in table_kinds:
+            if kind in self.PER_OBJECT_TYPE_TABLES:
+                for object_type in self.objectTypes:
+                    self.__get_table(kind, object_type)
+            else:
+                self.__get_table(kind)
+
+    def append(self, appended_ocel, dictionary: OcelDictionary, first_changes, first_appended_evolution):
+        '''
+        Updates the tables that are built (or stored) with data appended to the log (see
+        PatternMiningManager.append_log), in time proportional to the appended data rather than to the log. Tables that
+        are not built yet are built from the grown log on first access. The O2O tables and the ObjectRelationsIndex are
+        dropped and built again on first access if there are new events of the event type or new O2O relations, since
+        those may concern any known object. The version of the tables only changes if some of them have changed.
+
+        :param appended_ocel: The appended part of the log (encoded), with new events, relations, objects and object
+        changes only. The log from the provider (see TableManager.attach) already includes it.
+        :param dictionary: The dictionary of the log, extended by the labels of the appended part
+        :param first_changes: Per known object that changed, the time of its first new change
+        (see ObjectEvolutionStore.append)
+        :param first_appended_evolution: The first row of the ObjectEvolutionStore that has been appended
+        :return: The codes of the known events of the event type whose rows in the tables have changed
+        '''
+        with self.lock:
+            self.qualifierCodes = dictionary.get_codes(OcelDictionary.QUALIFIER)
+            keys = set(self.tables.keys()).union(self.storedTables.keys())
+            changed_eids = []
+            first_appended_interaction = None
+            for kind in self.APPENDED_TABLES:
+                kind_keys = [key for key in keys if key[0] == kind]
+                for key in kind_keys:
+                    table = self.__get_table(*key)
+                    if kind == self.OBJECT_EVOLUTIONS:
+                        table.append(appended_ocel, first_appended_evolution)
+                    elif kind == self.EVENT_INTERACTION:
+                        first_appended_interaction = len(table.table)
+                        changed_eids.append(table.append(appended_ocel, self.objectEvolutionsTable, first_changes))
+                    elif kind == self.OBJECT_INTERACTION:
+                        if self.ocel is None:
+                            self.ocel = self.ocelProvider()
+                        changed_eids.append(table.append(self.ocel, appended_ocel, self.objectEvolutionsTable,
+                                                         first_changes))
+                    elif kind == self.EVENT_OBJECTS_INDEX:
+                        if first_appended_interaction is None:
+                            table.create(self.eventInteractionTable)
+                        else:
+                            table.append(self.eventInteractionTable, first_appended_interaction)
+                    else:
+                        table.append(appended_ocel)
+                    self.storedTables.pop(key, None)
+            changed_eids = np.unique(np.concatenate(changed_eids)) if len(changed_eids) > 0 \
+                else np.array([], dtype=np.int32)
+            has_new_events = bool((appended_ocel.events["ocel:activity"] == self.eventTypeCode).any())
+            dropped_keys = [key for key in keys if key[0] in self.DROPPED_TABLES] \
+                if has_new_events or len(appended_ocel.o2o) > 0 else []
+            for key in dropped_keys:
+                self.tables.pop(key, None)
+                self.storedTables.pop(key, None)
+                self.buildTimes.pop(key, None)
+            # evaluations of other versions are discarded (see EvaluationCache.discard_stale), so the version only
+            # changes with the tables
+            if has_new_events or len(changed_eids) > 0 or len(dropped_keys) > 0:
+                self.version += 1
+                self.objectTypeCardinalities = None
+        return changed_eids
+
+    def get_build_report(self):
+        '''
+        :return: The tables that are built so far and the seconds it took to build them
+        '''
+        with self.lock:
+            return {
+                kind if object_type is None else kind + "[" + object_type + "]": runtime
+                for (kind, object_type), runtime in self.buildTimes.items()
+            }
+
+    def __get_table(self, kind, object_type=None):
+        key = (kind, object_type)
+        table = self.tables.get(key, None)
+        if table is not None:
+            return table
+        with self.lock:
+            if key not in self.tables:
+                if key in self.storedTables:
+                    self.tables[key] = self.__load_table(key)
+                else:
+                    self.tables[key] = self.__build_table(kind, object_type)
+            return self.tables[key]
+
+    def __load_table(self, key):
+        table = Table.load(os.path.join(self.tablesPath, self.storedTables[key]))
+        if key == (self.OBJECT_EVOLUTIONS, None):
+            table.set_store(self.objectEvolutionStore)
+        return table
+
+    def __get_table_folder(self, key):
+        kind, object_type = key
+        if object_type is None:
+            return kind
+        return kind + "_" + str(self.get_object_type_code(object_type))
+
+    def __build_table(self, kind, object_type):
+        # dependencies are resolved first, so that they do not count towards the build time
+        object_evolutions_table = None
+        if kind in [self.EVENT_INTERACTION, self.OBJECT_INTERACTION]:
+            object_evolutions_table = self.__get_table(self.OBJECT_EVOLUTIONS)
+        event_interaction_table = None
+        if kind == self.EVENT_OBJECTS_INDEX:
+            event_interaction_table = self.__get_table(self.EVENT_INTERACTION)
+        if self.ocel is None:
+            self.ocel = self.ocelProvider()
+        ocel = self.ocel
+        object_type_codes = [self.get_object_type_code(object_type) for object_type in self.objectTypes]
+        start = time.time()
+        if kind == self.EVENT_INDEX:
+            table = EventIndex(self.eventTypeCode)
+            table.create(ocel)
+        elif kind == self.EVENT_OBJECTS:
+            table = EventObjects(self.eventTypeCode, self.get_object_type_code(object_type))
+            table.create(ocel)
+        elif kind == self.O2O:
+            table = O2OTable(self.eventTypeCode, self.get_object_type_code(object_type))
+            table.create(ocel)
+        elif kind == self.EVENT_TABLE:
+            table = EventTable(self.eventTypeCode)
+            table.create(ocel)
+        elif kind == self.OBJECT_EVOLUTIONS:
+            table = ObjectEvolutionsTable(self.eventTypeCode, object_type_codes)
+            table.create(ocel, self.objectEvolutionStore)
+        elif kind == self.EVENT_INTERACTION:
+            table = EventInteractionTable(self.eventTypeCode, object_type_codes, self.objectAttributes)
+            table.create(ocel, object_evolutions_table)
+        elif kind == self.OBJECT_INTERACTION:
+            table = ObjectInteractionTable(self.eventTypeCode, object_type_codes)
+            table.create(ocel, object_evolutions_table)
+        elif kind == self.EVENT_OBJECTS_INDEX:
+            table = EventObjectsIndex(self.eventTypeCode, object_type_codes)
+            table.create(event_interaction_table)
+        elif kind == self.OBJECT_RELATIONS_INDEX:
+            table = ObjectRelationsIndex(self.eventTypeCode)
+            table.create(ocel)
+        else:
+            raise ValueError("Unknown table kind: " + str(kind))
+        self.buildTimes[(kind, object_type)] = time.time() - start
+        return table
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["lock"] = None
+        state["ocel"] = None
+        state["ocelProvider"] = None
+        state["objectEvolutionStore"] = None
+        state["objectTypeCardinalities"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    @property
+    def eventIndex(self) -> EventIndex:
+        return self.__get_table(self.EVENT_INDEX)
+
+    @property
+    def eventObjectsTables(self):
+        return {object_type: self.__get_table(self.EVENT_OBJECTS, object_type) for object_type in self.objectTypes}
+
+    @property
+    def o2oTables(self):
+        return {object_type: self.__get_table(self.O2O, object_type) for object_type in self.objectTypes}
+
+    @property
+    def eventTable(self) -> EventTable:
+        return self.__get_table(self.EVENT_TABLE)
+
+    @property
+    def objectEvolutionsTable(self) -> ObjectEvolutionsTable:
+        return self.__get_table(self.OBJECT_EVOLUTIONS)
+
+    @property
+    def eventInteractionTable(self) -> EventInteractionTable:
+        return self.__get_table(self.EVENT_INTERACTION)
+
+    @property
+    def objectInteractionTable(self) -> ObjectInteractionTable:
+        return self.__get_table(self.OBJECT_INTERACTION)
+
+    def get_object_type_code(self, object_type):
+        return self.objectTypeCodes.get(object_type, -1)
+
+    def get_qualifier_code(self, qualifier):
+        return self.qualifierCodes.get(qualifier, -1)
 
     def get_event_index(self):
         return self.eventIndex.get()
 
-    def get_event_objects(self, object_type):
-        return self.eventObjectsTables[object_type].get()
+    def get_event_objects(self, object_type, columns=None):
+        return self.__get_table(self.EVENT_OBJECTS, object_type).get(columns)
+
+    def get_event_table(self, columns=None):
+        return self.eventTable.get(columns)
+
+    def get_object_evolutions_table(self, columns=None):
+        return self.objectEvolutionsTable.get(columns)
 
-    def get_event_table(self):
-        return self.eventTable.get()
+    def get_o2o(self, object_type, columns=None):
+        return self.__get_table(self.O2O, object_type).get(columns)
 
-    def get_object_evolutions_table(self):
-        return self.objectEvolutionsTable.get()
+    def get_event_interaction_table(self, columns=None):
+        return self.eventInteractionTable.get(columns)
 
-    def get_o2o(self, object_type):
-        return self.o2oTables[object_type].get()
+    def get_object_interaction_table(self, columns=None):
+        return self.objectInteractionTable.get(columns)
 
-    def get_event_interaction_table(self):
-        return self.eventInteractionTable.get()
+    def get_event_objects_index(self) -> EventObjectsIndex:
+        return self.__get_table(self.EVENT_OBJECTS_INDEX)
+
+    def get_object_relations_index(self) -> ObjectRelationsIndex:
+        return self.__get_table(self.OBJECT_RELATIONS_INDEX)
+
+    def get_object_type_cardinalities(self) -> pd.DataFrame:
+        '''
+        The number of distinct objects of each object type that are related to each event, counted in one pass over
+        the EventObjectsIndex and kept until the tables are appended to. The cardinality patterns (Ot_card) and the
+        search plans (PatternMiningManager.__make_object_type_cardinality_patterns) are derived from these counts.
+
+        :return: A frame indexed by the event index with one column of counts per object type
+        '''
+        cardinalities = self.objectTypeCardinalities
+        if cardinalities is not None:
+            return cardinalities
+        with self.lock:
+            if self.objectTypeCardinalities is None:
+                self.objectTypeCardinalities = self.__count_object_type_cardinalities()
+            return self.objectTypeCardinalities
 
-    def get_object_interaction_table(self):
-        return self.objectInteractionTable.get()
+    def __count_object_type_cardinalities(self) -> pd.DataFrame:
+        event_objects_index = self.get_event_objects_index()
+        event_ids = self.get_event_index().index
+        object_type_codes = pd.Index([self.get_object_type_code(object_type) for object_type in self.objectTypes])
+        # the first edge of each (event, object) pair stands for the object
+        pair_starts = event_objects_index.pairStarts
+        event_positions = event_ids.get_indexer(event_objects_index.get_column("ocel:eid")[pair_starts])
+        type_positions = object_type_codes.get_indexer(event_objects_index.get_column("ocel:type")[pair_starts])
+        is_counted = (event_positions >= 0) & (type_positions >= 0)
+        counts = np.bincount(event_positions[is_counted] * len(object_type_codes) + type_positions[is_counted],
+                             minlength=len(event_ids) * len(object_type_codes))
+        return pd.DataFrame(counts.reshape(len(event_ids), len(object_type_codes)), index=event_ids,
+                            columns=list(self.objectTypes))
 
 
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from pm4py import OCEL
+
+from pattern_mining.tables.event_interaction_table import EventInteractionTable
+from pattern_mining.tables.table import Table, concat_rows
+
+
+class AdjacencyIndex(Table):
+
+    def __init__(self, event_type):
+        '''
+        An AdjacencyIndex stores relations in compressed sparse row form: the table holds the edges sorted by their
+        source, and the edges of the i-th source are the rows offsets[i] to offsets[i + 1] - 1. Counting, membership
+        and aggregation per source are then computed on the NumPy arrays of the edges, without joins.
+
+        :param event_type: The event type.
+        '''
+        super().__init__(event_type)
+        self.sourceColumn = None
+        self.sources = None
+        self.offsets = None
+
+    def _set_edges(self, edges: DataFrame, source_column, sort_columns):
+        edges = edges.sort_values(sort_columns, kind="stable").reset_index(drop=True)
+        self.sourceColumn = source_column
+        self.sources, starts = np.unique(edges[source_column].to_numpy(), return_index=True)
+        self.offsets = np.append(starts, len(edges)).astype(np.int64)
+        self.table = edges
+
+    def get_column(self, column) -> np.ndarray:
+        return self.table[column].to_numpy()
+
+    def get_segment_ids(self) -> np.ndarray:
+        '''
+        :return: For each edge, the position of its source in sources
+        '''
+        return np.repeat(np.arange(len(self.sources)), np.diff(self.offsets))
+
+    def count(self, mask) -> np.ndarray:
+        '''
+        :param mask: A boolean array over the edges
+        :return: For each source, the number of its edges that are selected by the mask
+        '''
+        return np.bincount(self.get_segment_ids()[mask], minlength=len(self.sources))
+
+    def get_positions(self, sources) -> np.ndarray:
+        '''
+        :return: The positions of the given sources in sources, -1 for sources without edges
+        '''
+        sources = np.asarray(sources)
+        if len(self.sources) == 0:
+            return np.full(len(sources), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.sources, sources), len(self.sources) - 1)
+        return np.where(self.sources[positions] == sources, positions, -1)
+
+    def expand(self, sources):
+        '''
+        The edges of a sequence of sources, as with an inner join of the sources with the edges.
+
+        :param sources: The sources (codes), may contain duplicates
+        :return: For each resulting edge, the position of its source in the given sequence, and the row of the edge
+        '''
+        positions = self.get_positions(sources)
+        queries = np.flatnonzero(positions >= 0)
+        starts = self.offsets[positions[queries]]
+        lengths = self.offsets[positions[queries] + 1] - starts
+        query_positions = np.repeat(queries, lengths)
+        first_edges = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        edge_rows = np.arange(len(query_positions)) - first_edges + np.repeat(starts, lengths)
+        return query_positions, edge_rows
+
+
+class EventObjectsIndex(AdjacencyIndex):
+
+    def __init__(self, event_type, object_types):
+        '''
+        An EventObjectsIndex (after calling EventObjectsIndex.create) indexes the objects of each event of a particular
+        event type, with the qualifier and the type of each relation. The edges are the rows of the
+        EventInteractionTable, sorted by event and object; the column interaction_row refers to the row in that table.
+
+        :param event_type: The event type.
+        :param object_types: A pre-selection of object types relevant for that event type.
+        '''
+        super().__init__(event_type)
+        self.objectTypes = object_types
+        self.pairStarts = None
+
+    def create(self, event_interaction_table: EventInteractionTable):
+        self._set_edges(self.__make_edges(event_interaction_table, 0), "ocel:eid", ["ocel:eid", "ocel:oid"])
+        self.__set_pair_starts()
+
+    def append(self, event_interaction_table: EventInteractionTable, first_appended_row):
+        '''
+        Adds the edges of the rows that have been appended to the EventInteractionTable. Appended events have larger
+        codes than the known ones (see OcelDictionary.extend), so their edges are appended to the sorted edges.
+
+        :param event_interaction_table: The event interaction table, with the appended rows
+        :param first_appended_row: The first appended row of the table
+        '''
+        edges = self.__make_edges(event_interaction_table, first_appended_row)
+        if len(self.sources) > 0 and len(edges) > 0 and edges["ocel:eid"].min() <= self.sources[-1]:
+            self.create(event_interaction_table)
+            return
+        self._set_edges(concat_rows(self.table, edges.sort_values(["ocel:eid", "ocel:oid"], kind="stable")),
+                        "ocel:eid", ["ocel:eid", "ocel:oid"])
+        self.__set_pair_starts()
+
+    def __make_edges(self, event_interaction_table: EventInteractionTable, first_row):
+        interactions = event_interaction_table.table.iloc[first_row:]
+        return pd.DataFrame({
+            "ocel:eid": interactions["ocel:eid"].to_numpy(),
+            "ocel:oid": interactions["ocel:oid"].to_numpy(),
+            "ocel:qualifier": interactions["ocel:qualifier"].to_numpy(),
+            "ocel:type": interactions["ocel:type"].to_numpy(),
+            "interaction_row": first_row + np.arange(len(interactions))
+        })
+
+    def __set_pair_starts(self):
+        eids = self.get_column("ocel:eid")
+        oids = self.get_column("ocel:oid")
+        # an object may be related to an event with several qualifiers
+        is_pair_start = np.ones(len(eids), dtype=bool)
+        is_pair_start[1:] = (eids[1:] != eids[:-1]) | (oids[1:] != oids[:-1])
+        self.pairStarts = np.flatnonzero(is_pair_start)
+
+    def any_per_pair(self, mask) -> DataFrame:
+        '''
+        :param mask: A boolean array over the edges
+        :return: Per related (event, object) pair, whether any of its edges is selected by the mask
+        '''
+        evaluation = np.logical_or.reduceat(mask, self.pairStarts) if len(self.pairStarts) > 0 \
+            else np.array([], dtype=bool)
+        return pd.DataFrame({
+            "ocel:eid": self.get_column("ocel:eid")[self.pairStarts],
+            "ocel:oid": self.get_column("ocel:oid")[self.pairStarts],
+            "ox:evaluation": evaluation
+        })
+
+
+class ObjectRelationsIndex(AdjacencyIndex):
+
+    def __init__(self, event_type):
+        '''
+        An ObjectRelationsIndex (after calling ObjectRelationsIndex.create) indexes the O2O relations of the objects
+        that occur at a particular event type: per object, the related objects with the qualifier of the relation and
+        their type.
+
+        :param event_type: The event type.
+        '''
+        super().__init__(event_type)
+
+    def create(self, ocel: OCEL):
+        o2o = ocel.o2o
+        objects = ocel.objects
+        event_type_e2o = ocel.relations[ocel.relations["ocel:activity"] == self.eventType]
+        edges = o2o[o2o["ocel:oid"].isin(event_type_e2o["ocel:oid"]) & o2o["ocel:oid"].isin(objects["ocel:oid"])]
+        objects = objects.drop_duplicates("ocel:oid")
+        object_types = pd.Series(objects["ocel:type"].to_numpy(), index=objects["ocel:oid"].to_numpy())
+        edges = edges[edges["ocel:oid_2"].isin(object_types.index)]
+        edges = pd.DataFrame({
+            "ocel:oid": edges["ocel:oid"].to_numpy(),
+            "ocel:qualifier": edges["ocel:qualifier"].to_numpy(),
+            "ocel:oid_2": edges["ocel:oid_2"].to_numpy(),
+            "ocel:type_2": object_types.reindex(edges["ocel:oid_2"].to_numpy()).to_numpy()
+        })
+        self._set_edges(edges, "ocel:oid", ["ocel:oid", "ocel:qualifier", "ocel:oid_2"])
+
+    def contains(self, sources, targets, qualifier) -> np.ndarray:
+        '''
+        :return: For each (source, target) pair, whether the source is related to the target with the qualifier
+        '''
+        # the edges are sorted by source and target within a qualifier, so are the keys of the selected edges
+        is_qualifier = self.get_column("ocel:qualifier") == qualifier
+        edge_keys = get_pair_keys(self.get_column("ocel:oid")[is_qualifier],
+                                   self.get_column("ocel:oid_2")[is_qualifier])
+        query_keys = get_pair_keys(sources, targets)
+        if len(edge_keys) == 0:
+            return np.zeros(len(query_keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(edge_keys, query_keys), len(edge_keys) - 1)
+        return edge_keys[positions] == query_keys
+
+
+def get_pair_keys(sources, targets) -> np.ndarray:
+    # codes are int32, so the keys of pairs of codes do not overflow
+    return np.asarray(sources, dtype=np.int64) * 2 ** 31 + np.asarray(targets, dtype=np.int64)
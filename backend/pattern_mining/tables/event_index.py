@@ -2,7 +2,7 @@ import pandas as pd
 from pandas import DataFrame
 from pm4py import OCEL
 
-from pattern_mining.tables.table import Table
+from pattern_mining.tables.table import Table, concat_rows
 
 
 class EventIndex(Table):
@@ -17,10 +17,19 @@ class EventIndex(Table):
         super().__init__(event_type)
 
     def create(self, ocel: OCEL):
+        self.table = self.__make_index(ocel)
+
+    def append(self, ocel: OCEL):
+        '''
+        :param ocel: The appended part of the log, with new events only
+        '''
+        self.table = concat_rows(self.table, self.__make_index(ocel))
+
+    def __make_index(self, ocel: OCEL):
         all_events = ocel.events[:]
         events = all_events[all_events['ocel:activity'] == self.eventType]
         events_index = pd.DataFrame(index=events['ocel:eid'])
-        self.table = events_index
+        return events_index
 
     def join(self, df: DataFrame):
         if 'ocel:eid' not in df.columns:
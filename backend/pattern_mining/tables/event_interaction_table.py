@@ -1,68 +1,98 @@
+import numpy as np
 import pandas as pd
 from pm4py import OCEL
 
 from pattern_mining.tables.object_evolutions_table import ObjectEvolutionsTable
-from pattern_mining.tables.table import Table
-import math
+from pattern_mining.tables.table import Table, concat_rows, replace_rows
 
 
 class EventInteractionTable(Table):
 
-    def __init__(self, event_type, object_types):
+    def __init__(self, event_type, object_types, object_attributes):
         '''
         An EventInteractionTable (after calling EventInteractionTable.create) stores per event of a particular event type
         the associated objects and their attributes at time of the event occurrence.
 
         :param event_type: The event type.
         :param object_types: A pre-selection of object types relevant for that event type.
+        :param object_attributes: The attributes of these object types.
         '''
         super().__init__(event_type)
         self.objectTypes = object_types
+        self.objectAttributes = object_attributes
 
     def create(self, ocel: OCEL, object_evolutions_table: ObjectEvolutionsTable):
+        self.table = self.__make_interactions(ocel, object_evolutions_table)
+
+    def append(self, ocel: OCEL, object_evolutions_table: ObjectEvolutionsTable, first_changes: pd.Series):
+        '''
+        Appends the rows of new events, and resolves the rows of known events again whose objects have changed before
+        the event (see ObjectEvolutionStore.append).
+
+        :param ocel: The appended part of the log, with new events only
+        :param object_evolutions_table: The object evolutions, with the appended rows
+        :param first_changes: Per known object that changed, the time of its first new change
+        :return: The codes of the known events whose rows have been resolved again
+        '''
+        table = self.table
+        positions = np.flatnonzero((table["ocel:timestamp"] >= table["ocel:oid"].map(first_changes)).to_numpy()) \
+            if len(first_changes) > 0 else np.array([], dtype=np.int64)
+        if len(positions) > 0:
+            resolved = table.iloc[positions][[col for col in table.columns if col.startswith('ocel:')]]
+            table = replace_rows(table, positions, self.__resolve_states(resolved, object_evolutions_table))
+        interactions = self.__make_interactions(ocel, object_evolutions_table)
+        next_row = table.index.max() + 1 if len(table) > 0 else 0
+        interactions.index = pd.RangeIndex(next_row, next_row + len(interactions))
+        self.table = concat_rows(table, interactions)
+        return np.unique(table["ocel:eid"].to_numpy()[positions])
+
+    def __make_interactions(self, ocel: OCEL, object_evolutions_table: ObjectEvolutionsTable):
         all_events = ocel.events[:]
         all_e2o = ocel.relations[:]
         events = all_events[all_events['ocel:activity'] == self.eventType]
         e2o = pd.merge(all_e2o, events, left_on='ocel:eid', right_on='ocel:eid', how='inner')
         e2o = e2o[["ocel:eid", "ocel:oid", "ocel:qualifier", "ocel:type"]]
-        object_evolutions = object_evolutions_table.table
         event_interactions = events[:]
         # extend with information about related objects
         event_interactions = event_interactions.merge(e2o, on='ocel:eid', how='inner')
         # create rows corresponding to pairs of objects that interact
         event_attributes = [col for col in event_interactions.columns if not col.startswith('ocel:')]
         event_interactions = event_interactions.drop(event_attributes, axis=1)
-        object_evolutions_windows = object_evolutions[["object_evolution_index", "ocel:oid", "ox:from", "ox:to"]]
-        event_interactions = self.__merge_event_interactions_with_evolutions(
-            event_interactions,
-            object_evolutions_windows
-        )
-        self.table = event_interactions
+        return self.__resolve_states(event_interactions, object_evolutions_table)
+
+    def __resolve_states(self, event_interactions, object_evolutions_table: ObjectEvolutionsTable):
+        # the state of each object at the time of the event
+        event_interactions["object_evolution_index"] = object_evolutions_table.lookup(
+            event_interactions["ocel:oid"], event_interactions["ocel:timestamp"])
+        event_interactions = event_interactions[event_interactions["object_evolution_index"] >= 0]
+        # the attribute values at the time of the event, resolved once instead of per attribute pattern. Categorical
+        # values are dictionary-encoded, so that comparisons are evaluated once per label (see compare_values)
+        evolution_indices = event_interactions["object_evolution_index"].to_numpy()
+        object_evolutions = object_evolutions_table.store.table
+        attribute_columns = {}
+        for attribute in self.objectAttributes:
+            values = object_evolutions[attribute].take(evolution_indices)
+            if values.dtype == object:
+                values = values.astype("category")
+            attribute_columns[attribute] = values.array
+        return pd.concat(
+            [event_interactions, pd.DataFrame(attribute_columns, index=event_interactions.index)], axis=1)
+
+def compare_values(values: pd.Series, comparison, value):
+    '''
+    Compares attribute values with a value. For dictionary-encoded values, the comparison is evaluated on the labels
+    and mapped to the rows by their codes, missing values never satisfy it.
 
-    def __merge_event_interactions_with_evolutions(self, event_interactions, object_evolutions_windows):
-        n_event_interactions = len(event_interactions)
-        batches = math.floor(n_event_interactions / 5000 ) + 1
-        while True:
-            event_interactions_split = []
-            splits_with_evolutions = []
-            batch_size = n_event_interactions / batches
-            for i in range(batches):
-                event_interactions_split.append(
-                    event_interactions.iloc[round(i * batch_size):round((i + 1) * batch_size)]
-                )
-            try:
-                for sub_split in event_interactions_split:
-                    sub_split_with_evolutions = sub_split.merge(object_evolutions_windows, on=["ocel:oid"], how="inner")
-                    sub_split_with_evolutions = sub_split_with_evolutions[
-                        (sub_split_with_evolutions['ocel:timestamp'] >= sub_split_with_evolutions['ox:from'])
-                        & (sub_split_with_evolutions['ocel:timestamp'] < sub_split_with_evolutions['ox:to'])
-                    ]
-                    sub_split_with_evolutions = sub_split_with_evolutions.drop(["ox:from", "ox:to"], axis=1)
-                    splits_with_evolutions.append(sub_split_with_evolutions)
-                break
-            except:
-                print("Merging of event interactions with object evolutions failed, likely because of memory issues. "
-                      + "Trying to split...")
-                batches = batches + 1
-        conc_interactions = pd.concat(splits_with_evolutions)
-        return conc_interactions
\ No newline at end of file
+    :param values: The attribute values
+    :param comparison: The comparison, e.g. operator.eq
+    :param value: The value
+    :return: The boolean evaluation per row
+    '''
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return comparison(values, value)
+    labels = values.cat.categories
+    codes = values.cat.codes.to_numpy()
+    if len(labels) == 0:
+        return pd.Series(np.zeros(len(values), dtype=bool), index=values.index)
+    label_evaluations = np.asarray(comparison(labels, value), dtype=bool)
+    return pd.Series(np.where(codes >= 0, label_evaluations[codes], False), index=values.index)
@@ -1,6 +1,7 @@
+import pandas as pd
 from pm4py import OCEL
 
-from pattern_mining.tables.table import Table
+from pattern_mining.tables.table import Table, concat_rows
 
 
 class EventObjects(Table):
@@ -16,9 +17,20 @@ class EventObjects(Table):
         self.objectType = object_type
 
     def create(self, ocel: OCEL):
+        self.table = self.__make_relations(ocel)
+
+    def append(self, ocel: OCEL):
+        '''
+        :param ocel: The appended part of the log, with new events only
+        '''
+        relations = self.__make_relations(ocel)
+        relations.index = pd.RangeIndex(len(self.table), len(self.table) + len(relations))
+        self.table = concat_rows(self.table, relations)
+
+    def __make_relations(self, ocel: OCEL):
         all_events = ocel.events[:]
         all_relations = ocel.relations[:][["ocel:eid", "ocel:oid", "ocel:type"]]
         typed_relations = all_relations[all_relations["ocel:type"] == self.objectType]
         events = all_events[all_events['ocel:activity'] == self.eventType][["ocel:eid"]]
         relations = events.merge(typed_relations, on=["ocel:eid"], how="inner")
-        self.table = relations[["ocel:eid", "ocel:oid"]]
+        return relations[["ocel:eid", "ocel:oid"]]
@@ -1,6 +1,6 @@
 from pm4py import OCEL
 
-from pattern_mining.tables.table import Table
+from pattern_mining.tables.table import Table, concat_rows
 
 
 class EventTable(Table):
@@ -18,4 +18,12 @@ class EventTable(Table):
     def create(self, ocel: OCEL):
         all_events = ocel.events[:]
         events = all_events[all_events['ocel:activity'] == self.eventType]
-        self.table = events
\ No newline at end of file
+        self.table = events
+
+    def append(self, ocel: OCEL):
+        '''
+        :param ocel: The appended part of the log, with new events only
+        '''
+        all_events = ocel.events[:]
+        events = all_events[all_events['ocel:activity'] == self.eventType]
+        self.table = concat_rows(self.table, events)
\ No newline at end of file
@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+import pandas as pd
+from flask import session
+from pandas import DataFrame
+from pm4py import OCEL
+
+from pattern_mining.tables.table import concat_rows, read_only_view
+from utils.columnar_utils import load_frame, replace_frame
+from utils.session_utils import get_session_path
+
+
+class ObjectEvolutionStore:
+
+    @classmethod
+    def get_name(cls):
+        session_key = session.get('session_key', None)
+        name = 'evolutions_' + str(session_key)
+        return name
+
+    def save(self):
+        path = os.path.join(get_session_path(), ObjectEvolutionStore.get_name())
+        # a store that has been loaded from the same directory is unchanged
+        if self.path == path:
+            return
+        replace_frame(self.table, path)
+        self.path = path
+
+    @classmethod
+    def load(cls):
+        '''
+        Opens the store of the session. The table is only loaded (memory-mapped) on first access.
+        '''
+        path = os.path.join(get_session_path(), ObjectEvolutionStore.get_name())
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        store = cls()
+        store.path = path
+        return store
+
+    def __init__(self):
+        '''
+        An ObjectEvolutionStore (after calling ObjectEvolutionStore.create) stores for all objects of a log the object
+        attributes at each point in time, that is, per row an object and its attributes as well as the time window in
+        which the attribute assignment is valid. It is built once per log and shared by the ObjectEvolutionsTables of
+        all event types, which only select rows of it.
+        The rows are sorted by object and window start (except for appended rows, see ObjectEvolutionStore.append), and
+        the column object_evolution_index is the row position.
+        '''
+        self.path = None
+        self.__table = None
+
+    @property
+    def table(self) -> DataFrame:
+        if self.__table is None and self.path is not None:
+            self.__table = load_frame(self.path)
+        return self.__table
+
+    @table.setter
+    def table(self, table: DataFrame):
+        self.__table = table
+        self.path = None
+
+    def create(self, ocel: OCEL):
+        events = ocel.events
+        objects = ocel.objects.copy()
+        object_changes = ocel.object_changes
+        change_times = object_changes["ocel:timestamp"].values
+        event_times = events["ocel:timestamp"].values
+        mintime = min(min(event_times), min(change_times)) if len(change_times) > 0 else min(event_times)
+        maxtime = max(max(event_times), max(change_times)) if len(change_times) > 0 else max(event_times)
+        maxtime = maxtime + pd.Timedelta(365, 'D')
+        objects["ocel:field"] = pd.NA
+        objects.loc[:, "ocel:timestamp"] = mintime
+        object_evolutions = pd.concat([objects, object_changes])
+        object_evolutions['ocel:timestamp'] = pd.to_datetime(object_evolutions['ocel:timestamp'], utc=False)
+        object_evolutions["ox:from"] = object_evolutions['ocel:timestamp']
+        object_evolutions.drop("ocel:timestamp", axis=1, inplace=True)
+        object_evolutions.drop("ocel:type", axis=1, inplace=True)
+        object_evolutions["ox:to"] = pd.to_datetime(maxtime, utc=False)
+        object_evolutions.sort_values(["ocel:oid", "ox:from"], kind="stable", inplace=True)
+        object_evolutions.reset_index(drop=True, inplace=True)
+        mask = object_evolutions["ocel:oid"] == object_evolutions["ocel:oid"].shift(-1)
+        object_evolutions.loc[mask, "ox:to"] = object_evolutions["ox:from"].shift(-1)
+        not_attribute_columns = ["ocel:oid", "ocel:type", "ocel:field", "ox:from", "ox:to"]
+        attribute_columns = [col for col in object_evolutions.columns if col not in not_attribute_columns]
+        # forward-fill: propagate attribute value changes to future change points
+        object_evolutions[attribute_columns] = object_evolutions[["ocel:oid"] + attribute_columns].groupby('ocel:oid').ffill()
+        object_evolutions.drop("ocel:field", axis=1, inplace=True)
+        object_evolutions["object_evolution_index"] = object_evolutions.index
+        self.table = object_evolutions
+
+    def append(self, ocel: OCEL):
+        '''
+        Appends the evolutions of new objects and new object changes as rows at the end of the store, so that the rows
+        that are referred to by object_evolution_index do not move. The open window (up to ox:to) of each changed object
+        is closed at its first new change. Changes that precede the last known state of an object cannot be appended.
+
+        :param ocel: The appended part of the log (encoded): new events, new objects and new object changes
+        :return: Per known object that changed, the time of its first new change
+        '''
+        table = self.table
+        objects = ocel.objects
+        object_changes = ocel.object_changes.copy()
+        object_changes["ocel:timestamp"] = pd.to_datetime(object_changes["ocel:timestamp"], utc=False)
+        open_end = table["ox:to"].max()
+        times = pd.concat([ocel.events["ocel:timestamp"], object_changes["ocel:timestamp"]])
+        new_open_end = open_end if len(times) == 0 else max(open_end, times.max() + pd.Timedelta(365, 'D'))
+        # the current state of each object is its open window
+        open_rows = np.flatnonzero((table["ox:to"] == open_end).to_numpy())
+        open_rows = pd.Series(open_rows, index=table["ocel:oid"].to_numpy()[open_rows])
+        open_rows = open_rows[~open_rows.index.duplicated(keep="last")]
+        changed_known = object_changes[object_changes["ocel:oid"].isin(open_rows.index)]
+        first_changes = changed_known.groupby("ocel:oid")["ocel:timestamp"].min()
+        states = table.take(open_rows[first_changes.index].to_numpy())
+        if (first_changes.to_numpy() < states["ox:from"].to_numpy()).any():
+            raise ValueError("Object changes that precede the last known state of an object cannot be appended")
+        new_objects = objects[~objects["ocel:oid"].isin(open_rows.index)].drop("ocel:type", axis=1)
+        new_objects["ox:from"] = table["ox:from"].min()
+        new_objects["ox:state"] = False
+        object_changes = object_changes.drop("ocel:type", axis=1).rename(columns={"ocel:timestamp": "ox:from"})
+        object_changes["ox:state"] = False
+        # the current states are the starting point of the forward-fill, they come first among rows of the same time
+        states = states.drop(["ox:to", "object_evolution_index"], axis=1)
+        states["ox:state"] = True
+        evolutions = pd.concat([states, new_objects, object_changes], ignore_index=True)
+        evolutions.sort_values(["ocel:oid", "ox:from"], kind="stable", inplace=True)
+        evolutions.reset_index(drop=True, inplace=True)
+        not_attribute_columns = ["ocel:oid", "ocel:field", "ox:from", "ox:state"]
+        attribute_columns = [col for col in evolutions.columns if col not in not_attribute_columns]
+        evolutions[attribute_columns] = evolutions[["ocel:oid"] + attribute_columns].groupby('ocel:oid').ffill()
+        evolutions["ox:to"] = pd.to_datetime(new_open_end, utc=False)
+        mask = evolutions["ocel:oid"] == evolutions["ocel:oid"].shift(-1)
+        evolutions.loc[mask, "ox:to"] = evolutions["ox:from"].shift(-1)
+        evolutions = evolutions[~evolutions["ox:state"]].drop(["ox:state", "ocel:field"], axis=1)
+        evolutions.index = pd.RangeIndex(len(table), len(table) + len(evolutions))
+        evolutions["object_evolution_index"] = evolutions.index
+        appended = concat_rows(table, evolutions)
+        # close the windows of the changed objects, and extend the open windows if the log has grown beyond them
+        window_ends = appended["ox:to"].to_numpy().copy()
+        window_ends[window_ends == open_end] = new_open_end
+        window_ends[open_rows[first_changes.index].to_numpy()] = first_changes.to_numpy()
+        appended["ox:to"] = window_ends
+        self.table = appended
+        return first_changes
+
+    def get(self, columns=None) -> DataFrame:
+        return read_only_view(self.table, columns)
+
+    def get_attributes(self):
+        return [col for col in self.table.columns if col not in ["ocel:oid", "ox:from", "ox:to", "object_evolution_index"]]
+
+    def lookup(self, oids, timestamps) -> np.ndarray:
+        '''
+        An as-of join of (object, timestamp) pairs with the evolution windows: for every pair, the row of the object
+        whose window contains the timestamp (ox:from <= timestamp < ox:to). Since the windows of an object are
+        consecutive, this is the last row of the object starting at or before the timestamp, so no pair is joined with
+        more than one row and no intermediate result is larger than the input.
+
+        :param oids: The objects (codes)
+        :param timestamps: The timestamps
+        :return: The object_evolution_index per pair, -1 if no window of the object contains the timestamp
+        '''
+        queries = pd.DataFrame({
+            "ocel:oid": np.asarray(oids, dtype=np.int64),
+            "ocel:timestamp": np.asarray(timestamps),
+            "ox:position": np.arange(len(oids))
+        }).sort_values("ocel:timestamp", kind="stable")
+        windows = self.table[["ocel:oid", "ox:from", "ox:to", "object_evolution_index"]] \
+            .astype({"ocel:oid": np.int64}) \
+            .sort_values("ox:from", kind="stable")
+        # for equal window starts, the stable sort keeps the later (non-empty) window of an object last
+        matched = pd.merge_asof(queries, windows, left_on="ocel:timestamp", right_on="ox:from", by="ocel:oid",
+                                direction="backward")
+        is_contained = matched["object_evolution_index"].notna() & (matched["ocel:timestamp"] < matched["ox:to"])
+        evolution_indices = np.full(len(queries), -1, dtype=np.int64)
+        evolution_indices[matched.loc[is_contained, "ox:position"].to_numpy()] = \
+            matched.loc[is_contained, "object_evolution_index"].to_numpy(dtype=np.int64)
+        return evolution_indices
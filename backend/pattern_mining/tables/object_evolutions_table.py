@@ -1,8 +1,9 @@
 import numpy as np
-import pandas as pd
+from pandas import DataFrame
 from pm4py import OCEL
 
-from pattern_mining.tables.table import Table
+from pattern_mining.tables.object_evolution_store import ObjectEvolutionStore
+from pattern_mining.tables.table import Table, read_only_view
 
 
 class ObjectEvolutionsTable(Table):
@@ -12,54 +13,59 @@ class ObjectEvolutionsTable(Table):
         An ObjectEvolutionsTable (after calling ObjectEvolutionsTable.create) stores per object
         the object attributes at each point in time, that is, by per row an object and its attributes as well
         as the time window in which the attribute assignment is valid.
+        The rows are not copied: the table selects the rows of the objects relevant for the event type from the
+        ObjectEvolutionStore of the log, which is shared by all event types and not pickled with the table.
 
         :param event_type: The event type.
         :param object_types: A pre-selection of object types relevant for that event type.
         '''
         super().__init__(event_type)
         self.objectTypes = object_types
+        self.store = None
+        self.rows = None
 
-    def create(self, ocel: OCEL):
-        all_events = ocel.events[:]
-        all_e2o = ocel.relations[:]
-        all_objects = ocel.objects[:]
-        all_object_changes = ocel.object_changes[:]
+    def create(self, ocel: OCEL, store: ObjectEvolutionStore):
+        self.store = store
+        self.rows = np.flatnonzero(store.table["ocel:oid"].isin(self.__get_event_oids(ocel)))
+
+    def append(self, ocel: OCEL, first_appended_row):
+        '''
+        Selects the rows of the store that have been appended (see ObjectEvolutionStore.append) for the relevant
+        objects, and all rows of objects that occur at the event type for the first time.
+
+        :param ocel: The appended part of the log, with new events only
+        :param first_appended_row: The first row of the store that has been appended
+        '''
+        oids = self.store.table["ocel:oid"].to_numpy()
+        known_oids = np.unique(oids[self.rows])
+        event_oids = self.__get_event_oids(ocel)
+        added_oids = np.setdiff1d(event_oids, known_oids)
+        appended_rows = first_appended_row + np.flatnonzero(
+            np.isin(oids[first_appended_row:], np.union1d(known_oids, event_oids)))
+        rows = [self.rows, appended_rows]
+        if len(added_oids) > 0:
+            rows.append(np.flatnonzero(np.isin(oids[:first_appended_row], added_oids)))
+        self.rows = np.unique(np.concatenate(rows))
+
+    def __get_event_oids(self, ocel: OCEL):
+        all_events = ocel.events
+        all_e2o = ocel.relations
         events = all_events[all_events['ocel:activity'] == self.eventType]
-        objects = all_objects[all_objects['ocel:type'].isin(self.objectTypes)]
-        object_changes = all_object_changes[all_object_changes['ocel:type'].isin(self.objectTypes)]
-        # event-type specific table: filter out irrelevant objects
-        event_oids = all_e2o.merge(events, on="ocel:eid")[["ocel:oid"]].drop_duplicates()
-        objects = objects.merge(event_oids, on="ocel:oid", how="inner")
-        object_changes = object_changes.merge(event_oids, on="ocel:oid", how="inner")
-        del all_events
-        del all_e2o
-        del all_objects
-        del all_object_changes
-        #########################
-        change_times = object_changes["ocel:timestamp"].values
-        event_times = events["ocel:timestamp"].values
-        mintime = min(min(event_times), min(change_times)) if len(change_times) > 0 else min(event_times)
-        maxtime = max(max(event_times), max(change_times)) if len(change_times) > 0 else max(event_times)
-        maxtime = maxtime + pd.Timedelta(365, 'D')
-        changetimes = object_changes["ocel:timestamp"].values
-        if len(changetimes) > 0:
-            mintime = min(mintime, changetimes.min())
-        objects["ocel:field"] = pd.NA
-        objects.loc[:, "ocel:timestamp"] = mintime
-        object_evolutions = pd.concat([objects, object_changes])
-        object_evolutions['ocel:timestamp'] = pd.to_datetime(object_evolutions['ocel:timestamp'], utc=False)
-        object_evolutions.reset_index(drop=True, inplace=True)
-        object_evolutions["ox:from"] = object_evolutions['ocel:timestamp']
-        object_evolutions.drop("ocel:timestamp", axis=1, inplace=True)
-        object_evolutions.drop("ocel:type", axis=1, inplace=True)
-        object_evolutions["ox:to"] = pd.to_datetime(maxtime, utc=False)
-        object_evolutions.sort_values(["ocel:oid", "ox:from"], inplace=True)
-        mask = object_evolutions["ocel:oid"] == object_evolutions["ocel:oid"].shift(-1)
-        object_evolutions.loc[mask, "ox:to"] = object_evolutions["ox:from"].shift(-1)
-        not_attribute_columns = ["ocel:oid", "ocel:type", "ocel:field", "ox:from", "ox:to"]
-        attribute_columns = [col for col in object_evolutions.columns if col not in not_attribute_columns]
-        # forward-fill: propagate attribute value changes to future change points
-        object_evolutions[attribute_columns] = object_evolutions[["ocel:oid"] + attribute_columns].groupby('ocel:oid').ffill()
-        object_evolutions.drop("ocel:field", axis=1, inplace=True)
-        object_evolutions["object_evolution_index"] = object_evolutions.index
-        self.table = object_evolutions
+        # event-type specific table: select the relevant objects
+        e2o = all_e2o[all_e2o["ocel:type"].isin(self.objectTypes)]
+        return e2o[e2o["ocel:eid"].isin(events["ocel:eid"])]["ocel:oid"].unique()
+
+    def set_store(self, store: ObjectEvolutionStore):
+        self.store = store
+
+    def lookup(self, oids, timestamps) -> np.ndarray:
+        return self.store.lookup(oids, timestamps)
+
+    def get(self, columns=None) -> DataFrame:
+        # only the projected columns of the selected rows are copied
+        return read_only_view(self.store.table, columns).take(self.rows)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["store"] = None
+        return state
@@ -1,10 +1,10 @@
-import math
-
+import numpy as np
 import pandas as pd
 from pm4py import OCEL
 
+from pattern_mining.tables.adjacency_index import get_pair_keys
 from pattern_mining.tables.object_evolutions_table import ObjectEvolutionsTable
-from pattern_mining.tables.table import Table
+from pattern_mining.tables.table import Table, concat_rows, replace_rows
 
 
 class ObjectInteractionTable(Table):
@@ -23,39 +23,85 @@ class ObjectInteractionTable(Table):
         self.objectTypes = object_types
 
     def create(self, ocel: OCEL, object_evolutions_table: ObjectEvolutionsTable):
-        all_e2o = ocel.relations[:]
-        o2o = ocel.o2o[:]
-        events = ocel.events[["ocel:eid", "ocel:timestamp"]]
-        object_evolutions = object_evolutions_table.get()
+        self.table = self.__make_interactions(ocel.relations, ocel.o2o, ocel.o2o, ocel.events, object_evolutions_table)
+
+    def append(self, ocel: OCEL, appended_ocel: OCEL, object_evolutions_table: ObjectEvolutionsTable,
+               first_changes: pd.Series):
+        '''
+        Appends the interactions at new events and the new interactions at known events, resolves the rows of known
+        events again whose objects have changed before the event (see ObjectEvolutionStore.append), and removes the
+        rows whose pair is now related in both directions, but kept in the other one.
+
+        :param ocel: The log, including the appended part
+        :param appended_ocel: The appended part of the log, with new events, relations and object changes only
+        :param object_evolutions_table: The object evolutions, with the appended rows
+        :param first_changes: Per known object that changed, the time of its first new change
+        :return: The codes of the known events whose rows have been changed or appended
+        '''
+        table = self.table
+        first_change_times = pd.DataFrame({
+            "x": table["ocel:oid_x"].map(first_changes), "y": table["ocel:oid_y"].map(first_changes)
+        }).min(axis=1)
+        positions = np.flatnonzero((table["ocel:timestamp"] >= first_change_times).to_numpy()) \
+            if len(first_changes) > 0 else np.array([], dtype=np.int64)
+        if len(positions) > 0:
+            resolved = table.iloc[positions][["ocel:eid", "ocel:oid_x", "ocel:oid_y", "ocel:qualifier",
+                                              "ocel:timestamp"]]
+            table = replace_rows(table, positions, self.__resolve_states(resolved, object_evolutions_table))
+        resolved_eids = table["ocel:eid"].to_numpy()[positions]
+        # a new O2O relation that reverses the pair of a row relates the pair in both directions, which is kept in the
+        # direction of the smaller code only (see ObjectInteractionTable.__make_interactions)
+        reverse_keys = get_pair_keys(appended_ocel.o2o["ocel:oid_2"], appended_ocel.o2o["ocel:oid"])
+        is_reversed = np.isin(get_pair_keys(table["ocel:oid_x"], table["ocel:oid_y"]), reverse_keys) \
+            & (table["ocel:oid_x"] > table["ocel:oid_y"]).to_numpy()
+        reversed_eids = table["ocel:eid"].to_numpy()[is_reversed]
+        table = table[~is_reversed]
+        # the interactions at new events, and those of new O2O relations at known events
+        new_eids = appended_ocel.events["ocel:eid"]
+        known_e2o = ocel.relations[~ocel.relations["ocel:eid"].isin(new_eids)]
+        interactions = pd.concat([
+            self.__make_interactions(appended_ocel.relations, ocel.o2o, ocel.o2o, appended_ocel.events,
+                                     object_evolutions_table),
+            self.__make_interactions(known_e2o, appended_ocel.o2o, ocel.o2o, ocel.events, object_evolutions_table)
+        ], ignore_index=True)
+        next_row = table.index.max() + 1 if len(table) > 0 else 0
+        interactions.index = pd.RangeIndex(next_row, next_row + len(interactions))
+        self.table = concat_rows(table, interactions)
+        changed_eids = np.concatenate([resolved_eids, reversed_eids, interactions["ocel:eid"].to_numpy()])
+        return np.unique(changed_eids[~np.isin(changed_eids, new_eids)])
+
+    def __make_interactions(self, all_e2o, o2o, all_o2o, events, object_evolutions_table: ObjectEvolutionsTable):
+        events = events[["ocel:eid", "ocel:timestamp"]]
         e2o = all_e2o[all_e2o["ocel:activity"] == self.eventType]
         e2o = e2o[["ocel:eid", "ocel:oid"]]
-        # extend with information about related objects
-        interaction_table = pd.merge(e2o, e2o, on='ocel:eid', how='inner', suffixes=("_x", "_y")) \
-
-        # change to left join if also interested in interactions between non-related objects
+        # start from the O2O relations instead of all pairs of objects of an event, which are quadratic in the number
+        # of objects per event: keep the relations between objects that occur at this event type, and do not keep
+        # every pair twice. A pair that is related in both directions is kept in the direction of the smaller code,
+        # which does not depend on the order of the codes (see OcelDictionary.extend) otherwise.
+        event_type_oids = e2o["ocel:oid"].unique()
+        o2o = o2o[o2o["ocel:oid"].isin(event_type_oids) & o2o["ocel:oid_2"].isin(event_type_oids)]
+        reverse_keys = get_pair_keys(all_o2o["ocel:oid_2"], all_o2o["ocel:oid"])
+        is_reversed = np.isin(get_pair_keys(o2o["ocel:oid"], o2o["ocel:oid_2"]), reverse_keys)
+        o2o = o2o[(o2o["ocel:oid"] < o2o["ocel:oid_2"]).to_numpy() | ~is_reversed][
+            ["ocel:oid", "ocel:oid_2", "ocel:qualifier"]]
+        o2o = o2o.rename(columns={"ocel:oid": "ocel:oid_x", "ocel:oid_2": "ocel:oid_y"})
+        # event-membership index: the events of the source object, then keep those that the target object shares
+        interaction_table = o2o \
+            .merge(e2o.rename(columns={"ocel:oid": "ocel:oid_x"}), on="ocel:oid_x", how="inner") \
+            .merge(e2o.rename(columns={"ocel:oid": "ocel:oid_y"}), on=["ocel:eid", "ocel:oid_y"], how="inner")
+        # change to also consider interactions between non-related objects if interested
         # for example, for comparing object attributes between objects that are not in a qualified relationship
-        # .merge(o2o, left_on=['ocel:oid_x', 'ocel:oid_y'], right_on=["ocel:oid", "ocel:oid_2"], how='left') \
-        interaction_table = interaction_table \
-            .merge(o2o, left_on=['ocel:oid_x', 'ocel:oid_y'], right_on=["ocel:oid", "ocel:oid_2"], how='inner') \
-            .drop(["ocel:oid", "ocel:oid_2"], axis=1)
-        # do not keep every pair twice
-        interaction_table = interaction_table[
-            interaction_table['ocel:oid_x'] < interaction_table['ocel:oid_y']
-        ]
+        interaction_table = interaction_table[["ocel:eid", "ocel:oid_x", "ocel:oid_y", "ocel:qualifier"]]
         # add timestamp
         interaction_table = interaction_table.merge(events, on="ocel:eid")
-        object_attributes = [col for col in object_evolutions.columns if col not in ["ocel:oid", "ox:from", "ox:to"]]
-        object_evolutions_windows = object_evolutions[["object_evolution_index", "ocel:oid", "ox:from", "ox:to"]]
-        interaction_table = interaction_table.merge(object_evolutions_windows, left_on=["ocel:oid_x"], right_on=["ocel:oid"], how="inner")
-        interaction_table = interaction_table[(interaction_table['ocel:timestamp'] > interaction_table['ox:from'])
-                                            & (interaction_table['ocel:timestamp'] <= interaction_table['ox:to'])]
-        interaction_table = interaction_table.rename(columns={"object_evolution_index": "object_evolution_index_x"})
-        interaction_table = interaction_table.rename(columns={key: key + "_x" for key in object_attributes})
-        interaction_table = interaction_table.drop(["ox:from", "ox:to", "ocel:oid"], axis=1)
-        interaction_table = interaction_table.merge(object_evolutions_windows, left_on=["ocel:oid_y"], right_on=["ocel:oid"], how="inner")
-        interaction_table = interaction_table[(interaction_table['ocel:timestamp'] > interaction_table['ox:from'])
-                                            & (interaction_table['ocel:timestamp'] <= interaction_table['ox:to'])]
-        interaction_table = interaction_table.rename(columns={"object_evolution_index": "object_evolution_index_y"})
-        interaction_table = interaction_table.rename(columns={key: key + "_y" for key in object_attributes})
-        interaction_table = interaction_table.drop(["ox:from", "ox:to", "ocel:oid"], axis=1)
-        self.table = interaction_table
+        return self.__resolve_states(interaction_table, object_evolutions_table)
+
+    def __resolve_states(self, interaction_table, object_evolutions_table: ObjectEvolutionsTable):
+        # the states of both objects at the time of the event
+        interaction_table["object_evolution_index_x"] = object_evolutions_table.lookup(
+            interaction_table["ocel:oid_x"], interaction_table["ocel:timestamp"])
+        interaction_table["object_evolution_index_y"] = object_evolutions_table.lookup(
+            interaction_table["ocel:oid_y"], interaction_table["ocel:timestamp"])
+        interaction_table = interaction_table[(interaction_table["object_evolution_index_x"] >= 0)
+                                              & (interaction_table["object_evolution_index_y"] >= 0)]
+        return interaction_table
@@ -1,8 +1,18 @@
+import copy
+import os
+import pickle
+
 import pandas as pd
 import numpy as np
 from pandas import DataFrame
+from pandas.api.types import union_categoricals
 from pm4py import OCEL
 
+from utils.columnar_utils import load_frame, replace_frame
+
+TABLE_FILE = "table.pkl"
+FRAME_FOLDER = "frame"
+
 
 class Table:
 
@@ -10,5 +20,86 @@ class Table:
         self.eventType = event_type
         self.table = None
 
-    def get(self) -> DataFrame:
-        return self.table[:]
+    def get(self, columns=None) -> DataFrame:
+        '''
+        A zero-copy view of the table: the returned frame shares the column arrays of the table, which are marked
+        read-only (except for object columns), so that evaluating a pattern does not copy the whole table.
+        Callers may add, replace, drop or rename columns of the view (copy-on-write: only the view changes), but
+        in-place writes into existing values fail. Those callers have to copy the view first.
+
+        :param columns: The columns to project to, all columns if None
+        :return: The view
+        '''
+        return read_only_view(self.table, columns)
+
+    def save(self, path):
+        '''
+        Stores the table in a directory: the frame in the columnar format of columnar_utils, and the other attributes
+        pickled.
+
+        :param path: The directory
+        '''
+        os.makedirs(path, exist_ok=True)
+        if self.table is not None:
+            replace_frame(self.table, os.path.join(path, FRAME_FOLDER))
+        attributes = copy.copy(self)
+        attributes.table = None
+        tmp_path = os.path.join(path, TABLE_FILE + ".tmp")
+        with open(tmp_path, "wb") as wf:
+            pickle.dump(attributes, wf)
+        os.replace(tmp_path, os.path.join(path, TABLE_FILE))
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Loads a table stored by Table.save. The numeric columns (including all identifier codes) are memory-mapped, so
+        only the pages that are read are loaded.
+
+        :param path: The directory
+        '''
+        with open(os.path.join(path, TABLE_FILE), "rb") as rf:
+            table = pickle.load(rf)
+        frame_path = os.path.join(path, FRAME_FOLDER)
+        if os.path.exists(frame_path):
+            table.table = load_frame(frame_path)
+        return table
+
+
+def read_only_view(frame: DataFrame, columns=None) -> DataFrame:
+    if columns is None:
+        columns = frame.columns
+    view_columns = {}
+    for column in columns:
+        values = frame[column].array
+        if isinstance(values, pd.arrays.NumpyExtensionArray):
+            values = values.to_numpy().view()
+            # pandas' comparisons of object arrays need writable buffers
+            values.flags.writeable = values.dtype == object
+        view_columns[column] = values
+    return pd.DataFrame(view_columns, index=frame.index, columns=list(columns), copy=False)
+
+
+def concat_rows(table: DataFrame, rows: DataFrame) -> DataFrame:
+    '''
+    Appends rows to a table. Unlike pd.concat, categorical columns stay categorical if the rows have other labels,
+    and columns that only one of the frames has are filled with missing values.
+    '''
+    columns = {}
+    for column in table.columns.append(rows.columns.difference(table.columns, sort=False)):
+        parts = [frame[column] if column in frame.columns else pd.Series(np.nan, index=frame.index)
+                 for frame in [table, rows]]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[column] = union_categoricals([part.array for part in parts])
+        else:
+            columns[column] = pd.concat(parts).array
+    return pd.DataFrame(columns, index=table.index.append(rows.index))
+
+
+def replace_rows(table: DataFrame, positions, rows: DataFrame) -> DataFrame:
+    '''
+    Replaces the rows of a table at the given positions, see concat_rows.
+    '''
+    row_positions = np.arange(len(table))
+    row_positions[positions] = len(table) + np.arange(len(positions))
+    replaced = concat_rows(table, rows.set_axis(table.index[positions], axis=0)).iloc[row_positions]
+    return replaced
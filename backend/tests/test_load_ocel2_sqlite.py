@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+import pm4py
+from pm4py import OCEL
+
+from event_log_management.load_ocel2_sqlite import load_ocel
+
+FILTER_CASES = [
+    {},
+    {"filters": ["order", "item"]},
+    {"acts": ["pick item"]},
+    {"acts": ["place order", "ship"]},
+    {"red_flag_acts": ["cancel order"]},
+    {"seed_type": "order", "seed_objects": ["o7"]},
+    {"filters": ["order", "item"], "acts": ["pick item"]},
+    {"acts": ["pick item"], "red_flag_acts": ["cancel order"]},
+    {"filters": ["order", "item"], "acts": ["pick item"], "seed_type": "order", "seed_objects": ["o7"]},
+    {"filters": ["order", "item", "courier"], "acts": ["pick item", "ship"], "red_flag_acts": ["cancel order"],
+     "seed_type": "order", "seed_objects": ["o6", "o7"]},
+]
+
+
+def _make_log():
+    # orders with items and customers, couriers only occur at ship events, some items are shipped without being
+    # picked and some orders are cancelled
+    events, relations, objects, o2o, object_changes = [], [], [], [], []
+    start = pd.Timestamp("2024-01-01")
+    for i in range(4):
+        objects.append({"ocel:oid": "c" + str(i), "ocel:type": "customer", "segment": ["b2b", "b2c"][i % 2]})
+        objects.append({"ocel:oid": "k" + str(i), "ocel:type": "courier", "region": ["north", "south"][i % 2]})
+    for o in range(10):
+        order = "o" + str(o)
+        objects.append({"ocel:oid": order, "ocel:type": "order", "price": float(10 * o)})
+        items = ["i" + str(o) + "_" + str(i) for i in range(1 + o % 3)]
+        objects += [{"ocel:oid": item, "ocel:type": "item", "color": ["red", "blue"][i % 2]}
+                    for i, item in enumerate(items)]
+        customer, courier = "c" + str(o % 4), "k" + str(o % 4)
+        o2o += [{"ocel:oid": order, "ocel:oid_2": item, "ocel:qualifier": "contains"} for item in items]
+        o2o.append({"ocel:oid": order, "ocel:oid_2": customer, "ocel:qualifier": "placed by"})
+        o2o.append({"ocel:oid": courier, "ocel:oid_2": order, "ocel:qualifier": "delivers"})
+        activities = ["place order", "pick item", "cancel order"] if o % 5 == 4 else \
+            ["place order", "pick item", "ship"]
+        picked_items = items[:1] if o % 4 == 3 else items
+        for a, activity in enumerate(activities):
+            eid = "e" + str(o) + "_" + str(a)
+            timestamp = start + pd.Timedelta(hours=10 * o + a)
+            events.append({"ocel:eid": eid, "ocel:activity": activity, "ocel:timestamp": timestamp})
+            related = {"place order": [order, customer], "pick item": [order] + picked_items,
+                       "cancel order": [order, customer], "ship": [order, courier] + items}[activity]
+            relations += [{"ocel:eid": eid, "ocel:activity": activity, "ocel:timestamp": timestamp, "ocel:oid": oid,
+                           "ocel:qualifier": "rel"} for oid in related]
+        object_changes.append({"ocel:oid": order, "ocel:type": "order", "ocel:field": "price", "price": float(o),
+                               "ocel:timestamp": start + pd.Timedelta(hours=10 * o + 1, minutes=30)})
+    objects = pd.DataFrame(objects)
+    relations = pd.DataFrame(relations)
+    relations["ocel:type"] = relations["ocel:oid"].map(objects.set_index("ocel:oid")["ocel:type"])
+    return OCEL(events=pd.DataFrame(events), objects=objects, relations=relations, o2o=pd.DataFrame(o2o),
+                object_changes=pd.DataFrame(object_changes))
+
+
+def _canonical(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.reindex(sorted(frame.columns), axis=1)
+    return frame.sort_values(list(frame.columns), key=lambda values: values.astype(str)).reset_index(drop=True)
+
+
+class LoadOcelPushDownTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, "log.sqlite")
+        pm4py.write_ocel2_sqlite(_make_log(), cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_push_down_filters_yield_the_same_log(self):
+        for filter_case in FILTER_CASES:
+            with self.subTest(**filter_case):
+                filtered = load_ocel(self.path, **filter_case)
+                pushed_down = load_ocel(self.path, push_down_filters=True, **filter_case)
+                for frame_name in ["events", "objects", "relations", "o2o", "object_changes"]:
+                    pd.testing.assert_frame_equal(_canonical(getattr(filtered, frame_name)),
+                                                  _canonical(getattr(pushed_down, frame_name)),
+                                                  obj=frame_name)
+
+    def test_activity_filter_keeps_objects_of_other_activities(self):
+        # couriers only occur at ship events, but the relation propagation keeps them
+        for push_down_filters in [False, True]:
+            ocel = load_ocel(self.path, acts=["pick item"], push_down_filters=push_down_filters)
+            self.assertEqual(set(ocel.events["ocel:activity"]), {"pick item"})
+            self.assertIn("courier", set(ocel.objects["ocel:type"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
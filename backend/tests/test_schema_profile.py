@@ -0,0 +1,35 @@
+import unittest
+
+import pandas as pd
+from pm4py import OCEL
+
+from pattern_mining.schema_profile import SchemaProfile
+
+
+class SchemaProfileTest(unittest.TestCase):
+
+    def test_log_without_attributes(self):
+        # events and objects with only ocel:* columns, every type still has an (empty) entry
+        timestamps = pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"])
+        events = pd.DataFrame({"ocel:eid": ["e1", "e2", "e3"], "ocel:activity": ["A", "A", "B"],
+                               "ocel:timestamp": timestamps})
+        objects = pd.DataFrame({"ocel:oid": ["o1", "o2"], "ocel:type": ["T", "U"]})
+        relations = pd.DataFrame({"ocel:eid": ["e1", "e2", "e3"], "ocel:activity": ["A", "A", "B"],
+                                  "ocel:timestamp": timestamps, "ocel:oid": ["o1", "o2", "o1"],
+                                  "ocel:type": ["T", "U", "T"], "ocel:qualifier": ["q", "q", "q"]})
+        schema_profile = SchemaProfile(OCEL(events=events, objects=objects, relations=relations))
+        self.assertEqual(schema_profile.eventTypeAttributes, {"A": [], "B": []})
+        self.assertEqual(schema_profile.objectTypeAttributes, {"T": [], "U": []})
+        self.assertEqual(schema_profile.eventTypeAttributeLabels, {"A": {}, "B": {}})
+
+    def test_attributes_per_type(self):
+        timestamps = pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"])
+        events = pd.DataFrame({"ocel:eid": ["e1", "e2", "e3"], "ocel:activity": ["A", "A", "B"],
+                               "ocel:timestamp": timestamps, "price": [1.0, None, None]})
+        objects = pd.DataFrame({"ocel:oid": ["o1"], "ocel:type": ["T"]})
+        schema_profile = SchemaProfile(OCEL(events=events, objects=objects))
+        self.assertEqual(schema_profile.eventTypeAttributes, {"A": ["price"], "B": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
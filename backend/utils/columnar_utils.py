@@ -0,0 +1,143 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+
+COLUMNS_FILE = "columns.json"
+
+# numeric columns and the codes of categorical/object columns are mapped copy-on-write: the data is paged in from
+# the file on demand, and in-place writes of a caller stay private to the process
+DEFAULT_MMAP_MODE = "c"
+
+
+def save_frame(frame: pd.DataFrame, path):
+    '''
+    Stores a frame in a directory with one .npy file per column (and one for the index).
+    Numeric columns are stored as they are, timestamps as int64, and categorical as well as object columns as int32
+    codes plus a small array of their labels.
+
+    :param frame: The frame to be stored
+    :param path: The (new or empty) directory
+    '''
+    os.makedirs(path, exist_ok=True)
+    columns = []
+    for i, column in enumerate(frame.columns):
+        columns.append(_save_column(frame[column], path, "c" + str(i)))
+    meta = {
+        "n_rows": len(frame),
+        "columns": [column for column in frame.columns],
+        "column_formats": columns,
+        "index": _save_index(frame.index, path),
+        "index_name": frame.index.name
+    }
+    with open(os.path.join(path, COLUMNS_FILE), "w") as wf:
+        json.dump(meta, wf)
+
+
+def load_frame(path, columns=None, mmap_mode=DEFAULT_MMAP_MODE) -> pd.DataFrame:
+    '''
+    Loads a frame stored by save_frame.
+
+    :param path: The directory of the frame
+    :param columns: If given, only these columns are loaded
+    :param mmap_mode: The numpy memory-map mode for numeric columns and codes, None for reading them into memory
+    '''
+    with open(os.path.join(path, COLUMNS_FILE)) as rf:
+        meta = json.load(rf)
+    data = {}
+    for column, column_format in zip(meta["columns"], meta["column_formats"]):
+        if columns is None or column in columns:
+            data[column] = _load_column(column_format, path, mmap_mode)
+    index = _load_index(meta["index"], path, mmap_mode, meta["index_name"])
+    frame = pd.DataFrame(data, index=index, copy=False)
+    if columns is not None:
+        frame = frame[[column for column in columns if column in frame.columns]]
+    return frame
+
+
+def replace_frame(frame: pd.DataFrame, path):
+    '''
+    Stores a frame like save_frame, replacing the frame stored at the path. The new version is written next to the
+    old one and swapped in by renaming, so that readers never see a partially written frame and processes that still
+    have the old version memory-mapped keep reading it.
+
+    :param frame: The frame to be stored
+    :param path: The directory of the frame
+    '''
+    tmp_path = path + ".tmp_" + uuid.uuid4().hex
+    save_frame(frame, tmp_path)
+    old_path = None
+    if os.path.exists(path):
+        old_path = path + ".old_" + uuid.uuid4().hex
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if old_path is not None:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+def get_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def _save_column(series: pd.Series, path, name):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        np.save(os.path.join(path, name + ".npy"), series.cat.codes.to_numpy(dtype=np.int32))
+        _save_labels(series.cat.categories.to_numpy(dtype=object), path, name)
+        return {"kind": "category", "file": name, "ordered": bool(dtype.ordered)}
+    if is_datetime64_any_dtype(dtype):
+        values = series.array
+        np.save(os.path.join(path, name + ".npy"), values.asi8)
+        tz = str(values.tz) if values.tz is not None else None
+        return {"kind": "datetime", "file": name, "unit": values.unit, "tz": tz}
+    if not isinstance(dtype, pd.api.extensions.ExtensionDtype) and (is_numeric_dtype(dtype) or is_bool_dtype(dtype)):
+        np.save(os.path.join(path, name + ".npy"), series.to_numpy())
+        return {"kind": "numeric", "file": name}
+    codes, labels = pd.factorize(series, use_na_sentinel=True)
+    np.save(os.path.join(path, name + ".npy"), codes.astype(np.int32))
+    _save_labels(np.asarray(labels, dtype=object), path, name)
+    return {"kind": "object", "file": name, "dtype": str(dtype)}
+
+
+def _save_index(index: pd.Index, path):
+    if isinstance(index, pd.RangeIndex):
+        return {"kind": "range", "start": index.start, "stop": index.stop, "step": index.step}
+    return _save_column(index.to_series(), path, "index")
+
+
+def _load_index(index_format, path, mmap_mode, name):
+    if index_format["kind"] == "range":
+        return pd.RangeIndex(index_format["start"], index_format["stop"], index_format["step"], name=name)
+    return pd.Index(_load_column(index_format, path, mmap_mode), name=name)
+
+
+def _load_column(column_format, path, mmap_mode):
+    values = np.load(os.path.join(path, column_format["file"] + ".npy"), mmap_mode=mmap_mode)
+    kind = column_format["kind"]
+    if kind == "numeric":
+        return values
+    if kind == "datetime":
+        timestamps = pd.array(values.view("datetime64[" + column_format["unit"] + "]"))
+        if column_format["tz"] is not None:
+            timestamps = timestamps.tz_localize("UTC").tz_convert(column_format["tz"])
+        return timestamps
+    labels = _load_labels(path, column_format["file"])
+    if kind == "category":
+        return pd.Categorical.from_codes(values, categories=labels, ordered=column_format["ordered"])
+    decoded = take(labels, np.asarray(values, dtype=np.intp), allow_fill=True)
+    if column_format["dtype"] != "object":
+        decoded = pd.array(decoded, dtype=column_format["dtype"])
+    return decoded
+
+
+def _save_labels(labels, path, name):
+    np.save(os.path.join(path, name + ".labels.npy"), labels, allow_pickle=True)
+
+
+def _load_labels(path, name):
+    return np.load(os.path.join(path, name + ".labels.npy"), allow_pickle=True)
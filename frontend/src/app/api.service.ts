@@ -25,6 +25,10 @@ export class ApiService {
     return this.http.post<any>(this.backendUrl + 'upload-ocel', formData)
   }
 
+  getUploadStatus(job_id: string) {
+    return this.http.get<any>(this.backendUrl + 'upload-status?job-id=' + job_id)
+  }
+
   confirmEventTypes(session_key: string, selected_event_types: EventType[]) {
     const headers = new HttpHeaders({
       'Content-Type': 'application/json'
@@ -5,6 +5,10 @@ import { PatternType, SearchPlans } from './dtos/search_plans';
 import { EventType, ObjectType, PatternID } from './dtos/utils';
 import { ModelEvaluation } from './dtos/model-response';
 import { PrefixesLookup } from './dtos/prefixes_lookup';
+import { interval } from 'rxjs';
+import { filter, switchMap, takeWhile } from 'rxjs/operators';
+
+const UPLOAD_STATUS_POLL_INTERVAL = 1000
 
 @Component({
   selector: 'app-root',
@@ -57,7 +61,19 @@ export class AppComponent {
     if (file) {
       const formData = new FormData();
       formData.append("file", file);
-      const upload$ = this.apiService.postOCEL(formData).subscribe((resp: UploadResponse) => {
+      const upload$ = this.apiService.postOCEL(formData).pipe(
+        // the log is ingested in a background job, its status is polled until the session metadata is available
+        switchMap((job: any) => interval(UPLOAD_STATUS_POLL_INTERVAL).pipe(
+          switchMap(() => this.apiService.getUploadStatus(job.job_id)),
+          takeWhile((status: any) => status.status == "running", true),
+          filter((status: any) => status.status != "running")
+        ))
+      ).subscribe((status: any) => {
+        if (status.status != "finished") {
+          console.log(status.err)
+          return
+        }
+        let resp: UploadResponse = status.result
         this.logUploaded = true
         this.eventTypesConfirmed = false
         this.sessionKey = resp.session_key